@@ -0,0 +1,41 @@
+# Write the job index (TF-IDF vocabulary/IDF and matrix, embeddings, ids, skill index, IVF lists)
+# as a versioned artifact that API workers memory-map at startup instead of rebuilding.
+# Usage (from backend/): python -m app.build_snapshot [--out .cache/snapshot] [--keep 2]
+import argparse
+import os
+import time
+
+from .services import loader, job_index, snapshot
+from .settings import settings
+
+
+def _size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=settings.snapshot_dir)
+    ap.add_argument("--keep", type=int, default=2, help="artifacts to keep, including the new one")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    jobs_df, _, meta = loader.load_all()
+    if jobs_df is None or len(jobs_df) == 0:
+        print("no jobs found; nothing to snapshot")
+        return
+    snap = job_index.build(jobs_df, loader.data_version(meta))
+    built = time.perf_counter() - t0
+    path = snapshot.save(snap, meta, args.out)
+    pruned = snapshot.prune(args.keep, args.out)
+
+    t1 = time.perf_counter()
+    snapshot.load(path)
+    print(
+        f"version={snap.version} jobs={len(snap)} path={path} bytes={_size(path)} pruned={pruned} "
+        f"build_seconds={built:.1f} load_seconds={time.perf_counter() - t1:.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# Evict stale profile vectors and reclaim space in the embedding store (CACHE_DB).
+# Usage (from backend/): python -m app.compact_embeddings [--prune-jobs] [--keep-other-models]
+import argparse
+import time
+
+from .services import loader, embeddings as emb
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--prune-jobs", action="store_true", help="unpin and drop job vectors not in clean_jobs.csv"
+    )
+    ap.add_argument(
+        "--keep-other-models", action="store_true", help="keep rows written under other MODEL_NAMEs"
+    )
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    keep = None
+    if args.prune_jobs:
+        jobs_df, _, _ = loader.load_all()
+        keep = loader.build_job_texts(jobs_df) if jobs_df is not None else []
+    summary = emb.compact(keep_job_texts=keep, other_models=args.keep_other_models)
+    seconds = time.perf_counter() - t0
+    print(" ".join(f"{k}={v}" for k, v in summary.items()) + f" seconds={seconds:.1f}")
+
+
+if __name__ == "__main__":
+    main()
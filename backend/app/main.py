@@ -1,9 +1,22 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from .routes import api
+from .services import metrics, shards, warmup
 from .settings import settings
 
-app = FastAPI(title="AI Job Recommender", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.warmup:
+        warmup.start()
+    yield
+    shards.shutdown()
+
+
+app = FastAPI(title="AI Job Recommender", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -13,6 +26,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.request_timing:
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        # this request's stage totals, collected through a context variable the handler thread
+        # inherits
+        timings, token = metrics.start_request()
+        started = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            metrics.end_request(token)
+        timings["total"] = time.perf_counter() - started
+        response.headers["Server-Timing"] = metrics.server_timing(timings)
+        return response
+
 app.include_router(api.router)
 
 
@@ -0,0 +1,67 @@
+# Materialize top-k recommendations for every demo resume and mode.
+# Usage (from backend/):
+#   python -m app.precompute [--k 50] [--modes baseline,embed,hybrid] [--workers N]
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+
+from .services import loader, recommender, embeddings as emb, precomputed
+
+
+def _init_worker():
+    # forked workers inherit the parent's caches; spawned ones (Windows/macOS) rebuild them
+    recommender.current_index()
+
+
+def _score_chunk(args: Tuple[List[str], List[str], int]) -> List[Tuple[str, str, List[Dict]]]:
+    resume_ids, modes, k = args
+    rows = []
+    for mode in modes:
+        for item in recommender.recommend_many(resume_ids=resume_ids, k=k, mode=mode):
+            rows.append((mode, item["resume_id"], item["results"]))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--k", type=int, default=50)
+    ap.add_argument("--modes", default="baseline,embed,hybrid")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk", type=int, default=64)
+    args = ap.parse_args()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+
+    t0 = time.perf_counter()
+    loader.reload_all()
+    recommender.rebuild_caches()
+    resumes = loader.get_resumes_df()
+    if resumes is None or len(resumes) == 0:
+        print("no resumes found; nothing to precompute")
+        return
+    resume_ids = resumes["resume_id"].astype(str).tolist()
+    # encode every resume once in the parent so workers only read the embedding cache
+    texts = [recommender._get_resume_text_and_skills_by_resume_id(rid)[0] for rid in resume_ids]
+    emb.get_embeddings([t for t in texts if t])
+    # recommend_many scores every job, so rows are stored under the exact-retrieval version
+    version = recommender.scoring_version(retrieval="exact")
+
+    chunks = [
+        (resume_ids[i:i + args.chunk], modes, args.k)
+        for i in range(0, len(resume_ids), args.chunk)
+    ]
+    written = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), initializer=_init_worker) as pool:
+        for rows in pool.map(_score_chunk, chunks):
+            precomputed.put_many(version, args.k, rows)
+            written += len(rows)
+    pruned = precomputed.prune(version)
+    print(
+        f"version={version} resumes={len(resume_ids)} modes={','.join(modes)} rows={written} "
+        f"pruned={pruned} seconds={time.perf_counter() - t0:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
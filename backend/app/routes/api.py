@@ -1,18 +1,67 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse
-from typing import Optional
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from pydantic import BaseModel
 from ..settings import settings
+from ..services.filter_index import JobFilter
 from ..services import loader, skills as skills_svc, recommender, gaps as gaps_svc, parse_file
-from ..store import Store
+from ..services import embeddings as emb, warmup, metrics
+from ..store import get_store
 
 router = APIRouter()
 
 
+class BatchRecommendRequest(BaseModel):
+    resume_ids: List[str] = []
+    profile_ids: List[str] = []
+    k: int = 10
+    mode: Optional[str] = None
+    experience_level: Optional[str] = None
+    title: Optional[str] = None
+    years_min: Optional[float] = None
+    years_max: Optional[float] = None
+
+
+def _job_filter(
+    experience_level: Optional[str],
+    title: Optional[str],
+    years_min: Optional[float],
+    years_max: Optional[float],
+) -> Optional[JobFilter]:
+    try:
+        return JobFilter.parse(experience_level, title, years_min, years_max)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.get("/health")
 def health():
     return {"status": "ok"}
 
 
+@router.get("/health/live")
+def health_live():
+    return {"status": "ok"}
+
+
+@router.get("/health/ready")
+def health_ready():
+    # 503 while the WARMUP phase is still loading (or failed); route traffic only after 200
+    status = warmup.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@router.get("/metrics")
+def metrics_text():
+    # Prometheus text format: stage latency histograms plus cache and catalog gauges; 404 with
+    # METRICS=0
+    if not settings.metrics:
+        raise HTTPException(status_code=404, detail="metrics are disabled (METRICS=0)")
+    text = metrics.render(recommender.metric_samples())
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
 @router.get("/schema/jobs")
 def schema_jobs():
     df, meta = loader.get_jobs()
@@ -21,10 +70,31 @@ def schema_jobs():
 
 
 @router.post("/ingest/reload")
-def ingest_reload():
-    loader.reload_all()
-    recommender.rebuild_caches()
-    return {"status": "reloaded"}
+def ingest_reload(wait: bool = False):
+    # rebuilds in the background; the current index keeps serving until the new one is swapped in
+    status = recommender.start_rebuild(incremental=False, wait=wait)
+    return {"status": "reloaded" if wait else "building", **status}
+
+
+@router.post("/ingest/delta")
+def ingest_delta(wait: bool = False):
+    status = recommender.start_rebuild(incremental=True, wait=wait)
+    return {"status": "reloaded" if wait else "building", **status}
+
+
+@router.get("/index/status")
+def index_status():
+    return recommender.index_status()
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    return recommender.cache_stats()
+
+
+@router.get("/embeddings/stats")
+def embeddings_stats():
+    return {**emb.store_stats(), "batcher": emb.batcher_stats()}
 
 
 @router.get("/candidates")
@@ -46,23 +116,85 @@ async def profile_analyze(
         raise HTTPException(status_code=400, detail="Provide text or upload a file")
     if file:
         content = await file.read()
-        text = parse_file.extract_text(file.filename, content)
-    summary, extracted_skills = skills_svc.analyze_profile_text(text)
-    profile_id = Store().save_profile(summary, extracted_skills, persona or settings.default_persona)
+        text = await run_in_threadpool(parse_file.extract_text, file.filename, content)
+    # spaCy parsing and the SQLite write are blocking; keep them off the event loop
+    summary, extracted_skills = await run_in_threadpool(
+        lambda: skills_svc.analyze_profile_text(text, recommender.skill_matcher())
+    )
+    profile_id = await run_in_threadpool(
+        get_store().save_profile, summary, extracted_skills, persona or settings.default_persona
+    )
     return {"profile_id": profile_id, "summary": summary, "skills": extracted_skills, "persona": persona or settings.default_persona}
 
 
+@router.get("/recommend/filters")
+def recommend_filters():
+    # values accepted by the experience_level / title filters, with job counts
+    snap = recommender.current_index()
+    return snap.filters.facets() if snap.filters is not None else {}
+
+
 @router.get("/recommend/by_profile")
-def recommend_by_profile(profile_id: str, k: int = 10, mode: str = None):
+def recommend_by_profile(
+    profile_id: str, k: int = 10, mode: str = None, retrieval: str = None,
+    experience_level: str = None,
+    title: str = None,
+    years_min: float = None,
+    years_max: float = None,
+):
     mode = mode or settings.default_mode
-    results = recommender.recommend_for_profile(profile_id, k=k, mode=mode)
+    filt = _job_filter(experience_level, title, years_min, years_max)
+    results = recommender.recommend_for_profile(
+        profile_id, k=k, mode=mode, retrieval=retrieval, filt=filt
+    )
     return {"results": results}
 
 
 @router.get("/recommend/by_resume_id")
-def recommend_by_resume_id(resume_id: str, k: int = 10, mode: str = None):
+def recommend_by_resume_id(
+    resume_id: str, k: int = 10, mode: str = None, retrieval: str = None,
+    experience_level: str = None,
+    title: str = None,
+    years_min: float = None,
+    years_max: float = None,
+):
+    mode = mode or settings.default_mode
+    filt = _job_filter(experience_level, title, years_min, years_max)
+    results = recommender.recommend_for_resume_id(
+        resume_id, k=k, mode=mode, retrieval=retrieval, filt=filt
+    )
+    return {"results": results}
+
+
+@router.get("/recommend/with_gaps")
+def recommend_with_gaps(
+    profile_id: str | None = None,
+    resume_id: str | None = None,
+    k: int = 10,
+    mode: str = None,
+    retrieval: str = None,
+    experience_level: str = None,
+    title: str = None,
+    years_min: float = None,
+    years_max: float = None,
+):
+    if not profile_id and not resume_id:
+        raise HTTPException(status_code=400, detail="Provide profile_id or resume_id")
     mode = mode or settings.default_mode
-    results = recommender.recommend_for_resume_id(resume_id, k=k, mode=mode)
+    filt = _job_filter(experience_level, title, years_min, years_max)
+    results = gaps_svc.recommend_with_gaps(
+        profile_id, resume_id, k=k, mode=mode, retrieval=retrieval, filt=filt
+    )
+    return {"results": results}
+
+
+@router.post("/recommend/batch")
+def recommend_batch(req: BatchRecommendRequest):
+    mode = req.mode or settings.default_mode
+    filt = _job_filter(req.experience_level, req.title, req.years_min, req.years_max)
+    results = recommender.recommend_many(
+        resume_ids=req.resume_ids, profile_ids=req.profile_ids, k=req.k, mode=mode, filt=filt
+    )
     return {"results": results}
 
 
@@ -83,3 +215,11 @@ def eval_offline(mode: str = None, k: int = 10):
     return recommender.offline_eval(mode=mode, k=k)
 
 
+@router.get("/eval/ann_recall")
+def eval_ann_recall(mode: str = None, k: int = 10, n: int = 20):
+    return recommender.ann_recall_report(k=k, n_queries=n, mode=mode)
+
+
+@router.get("/eval/quant")
+def eval_quant(mode: str = None, k: int = 10, n: int = 20):
+    return recommender.quant_report(k=k, n_queries=n, mode=mode)
@@ -0,0 +1,80 @@
+from typing import List
+import numpy as np
+
+
+# rows per block when assigning vectors to centroids, keeps the (block, n_lists) product small
+_ASSIGN_BLOCK = 65536
+_MAX_TRAIN = 100000
+
+
+def _assign(vecs: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    out = np.empty(len(vecs), dtype=np.int32)
+    for start in range(0, len(vecs), _ASSIGN_BLOCK):
+        block = vecs[start:start + _ASSIGN_BLOCK]
+        out[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+def _normalize(m: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return m / norms
+
+
+class IVFIndex:
+    # inverted-file index: spherical k-means coarse quantizer over L2-normalized vectors,
+    # search probes the closest lists and scores their members exactly
+
+    def __init__(self, vecs: np.ndarray, centroids: np.ndarray, lists: List[np.ndarray]):
+        self.vecs = vecs
+        self.centroids = centroids
+        self.lists = lists
+
+    @classmethod
+    def build(
+        cls, vecs: np.ndarray, n_lists: int | None = None, iters: int = 10, seed: int = 0
+    ) -> "IVFIndex":
+        n = len(vecs)
+        n_lists = max(1, min(n, n_lists or int(np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        train = vecs if n <= _MAX_TRAIN else vecs[rng.choice(n, _MAX_TRAIN, replace=False)]
+        centroids = train[rng.choice(len(train), n_lists, replace=False)].astype(np.float32)
+        for _ in range(iters):
+            labels = _assign(train, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, train)
+            counts = np.bincount(labels, minlength=n_lists)
+            empty = counts == 0
+            if empty.any():
+                # reseed empty lists so every centroid stays useful
+                sums[empty] = train[rng.choice(len(train), int(empty.sum()), replace=False)]
+            centroids = _normalize(sums).astype(np.float32)
+        return cls.with_centroids(vecs, centroids)
+
+    @classmethod
+    def with_centroids(cls, vecs: np.ndarray, centroids: np.ndarray) -> "IVFIndex":
+        # fill the lists without retraining, e.g. after an incremental ingest
+        labels = _assign(vecs, centroids)
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(len(centroids) + 1))
+        lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(centroids))]
+        return cls(vecs, centroids, lists)
+
+    def search(self, query: np.ndarray, n: int, n_probe: int = 8) -> np.ndarray:
+        # returns up to n row ids, best first; probes past n_probe lists until n candidates are
+        # found
+        picked: List[np.ndarray] = []
+        found = 0
+        for probed, c in enumerate(np.argsort(-(self.centroids @ query))):
+            if probed >= n_probe and found >= n:
+                break
+            picked.append(self.lists[c])
+            found += len(self.lists[c])
+        cand = np.concatenate(picked) if picked else np.zeros(0, dtype=np.int64)
+        if len(cand) == 0:
+            return cand
+        sims = self.vecs[cand] @ query
+        if len(cand) > n:
+            top = np.argpartition(-sims, n - 1)[:n]
+            cand, sims = cand[top], sims[top]
+        return cand[np.argsort(-sims, kind="stable")]
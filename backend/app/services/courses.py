@@ -0,0 +1,102 @@
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+from . import skills as skills_svc
+from ..settings import settings
+
+
+# courses kept per skill, in file order
+_PER_SKILL = 2
+
+
+class CourseCatalog:
+    # skills_to_courses.csv grouped by normalize_skill(skill); keys double as the fuzzy-match
+    # choices
+
+    def __init__(self, by_skill: Dict[str, List[Dict]], mtime_ns: Optional[int] = None):
+        self.by_skill = by_skill
+        self.keys = list(by_skill)
+        self.mtime_ns = mtime_ns
+
+    @classmethod
+    def load(cls, path: str) -> "CourseCatalog":
+        if not os.path.exists(path):
+            return cls({})
+        mtime_ns = os.stat(path).st_mtime_ns
+        df = pd.read_csv(path)
+        df.columns = [c.strip().lower() for c in df.columns]
+        if "skill" not in df.columns:
+            return cls({}, mtime_ns)
+        df = df.fillna("")
+        for col in ("course_name", "provider", "hours"):
+            if col not in df.columns:
+                df[col] = ""
+        by_skill: Dict[str, List[Dict]] = {}
+        for row in df[["skill", "course_name", "provider", "hours"]].to_dict(orient="records"):
+            courses = by_skill.setdefault(skills_svc.normalize_skill(str(row.pop("skill"))), [])
+            if len(courses) < _PER_SKILL:
+                courses.append(row)
+        by_skill.pop("", None)
+        return cls(by_skill, mtime_ns)
+
+    def lookup(self, skill: str, fuzzy_cutoff: float = 0) -> Tuple[List[Dict], Optional[str]]:
+        # (courses, matched catalog skill); exact normalized match first, then the closest key
+        key = skills_svc.normalize_skill(skill)
+        courses = self.by_skill.get(key)
+        if courses:
+            return courses, key
+        if fuzzy_cutoff > 0 and key and self.keys:
+            best = process.extractOne(
+                key, self.keys, scorer=fuzz.ratio, processor=None, score_cutoff=fuzzy_cutoff
+            )
+            if best is not None:
+                return self.by_skill[best[0]], best[0]
+        return [], None
+
+
+_catalog: Optional[CourseCatalog] = None
+_path: Optional[str] = None
+_lock = threading.Lock()
+
+
+def _path_now() -> str:
+    return os.path.join(settings.data_dir, "skills_to_courses.csv")
+
+
+def catalog() -> CourseCatalog:
+    # loaded once; re-read only when the file's path or mtime changes (one stat per call)
+    global _catalog, _path
+    path = _path_now()
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+    current = _catalog
+    if current is not None and _path == path and current.mtime_ns == mtime_ns:
+        return current
+    with _lock:
+        if _catalog is None or _path != path or _catalog.mtime_ns != mtime_ns:
+            _catalog, _path = CourseCatalog.load(path), path
+        return _catalog
+
+
+def courses_for(
+    skills: Iterable[str], fuzzy_cutoff: Optional[float] = None
+) -> Dict[str, List[Dict]]:
+    # skill -> catalog courses for every skill with an exact or (COURSE_FUZZY_CUTOFF) near match;
+    # near matches carry the catalog skill they came from
+    cutoff = settings.course_fuzzy_cutoff if fuzzy_cutoff is None else fuzzy_cutoff
+    cat = catalog()
+    out: Dict[str, List[Dict]] = {}
+    for skill in skills:
+        courses, matched = cat.lookup(skill, cutoff)
+        if not courses:
+            continue
+        if matched != skills_svc.normalize_skill(skill):
+            courses = [{**c, "matched_skill": matched} for c in courses]
+        out[skill] = courses
+    return out
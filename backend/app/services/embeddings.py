@@ -1,29 +1,80 @@
 import hashlib
 import os
+import queue
 import sqlite3
-from typing import List
+import threading
+import time
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Dict, List
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
 
+from . import metrics
 from ..settings import settings
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
-_MODEL: SentenceTransformer | None = None
 
+# loaded on first encode (or by the startup warm-up); importing sentence-transformers takes seconds
+_MODEL: "SentenceTransformer | None" = None
+_model_lock = threading.Lock()
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds
+_LOOKUP_CHUNK = 900
+# vectors are stored L2-normalized float32; part of the key namespace together with MODEL_NAME
+_NORMALIZE = True
+_STORE_FORMAT = "f32"
+# profile rows refresh last_used at most this often, so hot lookups stay read-only
+_TOUCH_EVERY = 3600.0
+# opportunistic profile eviction after this many profile inserts in a process
+_EVICT_EVERY = 1000
+
+_db_lock = threading.Lock()
+_ready: set = set()
+_counters = {
+    "lookups": 0, "hits": 0, "misses": 0, "lookup_seconds": 0.0,
+    "encoded": 0, "encode_seconds": 0.0, "evicted": 0, "profile_inserts": 0,
+}
+
+
+def _namespace() -> str:
+    return f"{settings.model_name}|norm={int(_NORMALIZE)}|{_STORE_FORMAT}"
 
-def _ensure_db():
-    os.makedirs(os.path.dirname(settings.cache_db), exist_ok=True)
-    with sqlite3.connect(settings.cache_db) as conn:
-        conn.execute(
-            "CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vec BLOB)"
-        )
 
+def _ensure_db(path: str):
+    # schema and WAL set up once per process and path
+    if path in _ready:
+        return
+    with _db_lock:
+        if path in _ready:
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with sqlite3.connect(path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            # pinned=1: job vectors, never evicted; pinned=0: profile vectors, evicted by age and
+            # count
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS vectors (ns TEXT, hash TEXT, pinned INTEGER, vec BLOB, "
+                "created REAL, last_used REAL, PRIMARY KEY (ns, hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS vectors_evict ON vectors (pinned, last_used)")
+        _ready.add(path)
 
-def _get_model() -> SentenceTransformer:
+
+def _connect() -> sqlite3.Connection:
+    _ensure_db(settings.cache_db)
+    conn = sqlite3.connect(settings.cache_db)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _get_model() -> "SentenceTransformer":
     global _MODEL
     if _MODEL is None:
-        _MODEL = SentenceTransformer(settings.model_name)
+        with _model_lock:
+            if _MODEL is None:
+                from sentence_transformers import SentenceTransformer
+                _MODEL = SentenceTransformer(settings.model_name)
     return _MODEL
 
 
@@ -31,28 +82,259 @@ def _hash_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
 
-def get_embeddings(texts: List[str]) -> np.ndarray:
-    _ensure_db()
-    model = _get_model()
+def _lookup(conn: sqlite3.Connection, ns: str, hashes: List[str]) -> Dict[str, tuple]:
+    # hash -> (vec blob, pinned, last_used)
+    found: Dict[str, tuple] = {}
+    unique = list(dict.fromkeys(hashes))
+    for start in range(0, len(unique), _LOOKUP_CHUNK):
+        chunk = unique[start:start + _LOOKUP_CHUNK]
+        marks = ",".join("?" * len(chunk))
+        cur = conn.execute(
+            f"SELECT hash, vec, pinned, last_used FROM vectors WHERE ns=? AND hash IN ({marks})",
+            [ns, *chunk],
+        )
+        found.update((h, (vec, pinned, used)) for h, vec, pinned, used in cur.fetchall())
+    return found
+
+
+def get_embeddings(texts: List[str], pin: bool = False) -> np.ndarray:
+    # pin=True for job texts: stored as pinned rows that eviction never touches
+    ns = _namespace()
     hashes = [_hash_text(t) for t in texts]
     vecs: List[np.ndarray] = [None] * len(texts)  # type: ignore
     missing_idxs = []
-    with sqlite3.connect(settings.cache_db) as conn:
-        for i, h in enumerate(hashes):
-            cur = conn.execute("SELECT vec FROM embeddings WHERE hash=?", (h,))
-            row = cur.fetchone()
-            if row is not None:
-                vecs[i] = np.frombuffer(row[0], dtype=np.float32)
-            else:
-                missing_idxs.append(i)
-        if missing_idxs:
-            to_encode = [texts[i] for i in missing_idxs]
-            enc = model.encode(to_encode, convert_to_numpy=True, normalize_embeddings=True)
-            for j, i in enumerate(missing_idxs):
-                v = enc[j].astype(np.float32)
-                vecs[i] = v
-                conn.execute("INSERT OR REPLACE INTO embeddings(hash, vec) VALUES (?, ?)", (hashes[i], v.tobytes()))
+    # read, encode and write in separate steps: the SQLite write lock is only taken for the final
+    # short transaction, never while the model runs
+    with _connect() as conn:
+        t0 = time.perf_counter()
+        found = _lookup(conn, ns, hashes)
+        lookup_seconds = time.perf_counter() - t0
+    now = time.time()
+    touch = set()
+    for i, h in enumerate(hashes):
+        row = found.get(h)
+        if row is not None:
+            vecs[i] = np.frombuffer(row[0], dtype=np.float32)
+            if (pin and not row[1]) or (not row[1] and now - (row[2] or 0) > _TOUCH_EVERY):
+                touch.add(h)
+        else:
+            missing_idxs.append(i)
+    encode_seconds, encoded = 0.0, 0
+    by_text: Dict[str, np.ndarray] = {}
+    if missing_idxs:
+        to_encode = list(dict.fromkeys(texts[i] for i in missing_idxs))
+        t0 = time.perf_counter()
+        enc = _get_model().encode(to_encode, convert_to_numpy=True, normalize_embeddings=_NORMALIZE)
+        encode_seconds = time.perf_counter() - t0
+        encoded = len(to_encode)
+        by_text = {t: enc[j].astype(np.float32) for j, t in enumerate(to_encode)}
+        for i in missing_idxs:
+            vecs[i] = by_text[texts[i]]
+    if touch or by_text:
+        now = time.time()
+        with _connect() as conn:
+            conn.executemany(
+                "UPDATE vectors SET last_used=?, pinned=MAX(pinned, ?) WHERE ns=? AND hash=?",
+                [(now, int(pin), ns, h) for h in touch],
+            )
+            # another process may have stored (and pinned) the same text while this one encoded
+            conn.executemany(
+                "INSERT INTO vectors(ns, hash, pinned, vec, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(ns, hash) DO UPDATE SET "
+                "pinned=MAX(pinned, excluded.pinned), last_used=excluded.last_used",
+                [(ns, _hash_text(t), int(pin), v.tobytes(), now, now) for t, v in by_text.items()],
+            )
             conn.commit()
-    return np.vstack(vecs)
+    with _db_lock:
+        c = _counters
+        c["lookups"] += 1
+        c["hits"] += len(texts) - len(missing_idxs)
+        c["misses"] += len(missing_idxs)
+        c["lookup_seconds"] += lookup_seconds
+        c["encode_seconds"] += encode_seconds
+        c["encoded"] += encoded
+        evict_now = False
+        if not pin and encoded:
+            before = c["profile_inserts"]
+            c["profile_inserts"] += encoded
+            evict_now = before // _EVICT_EVERY != c["profile_inserts"] // _EVICT_EVERY
+    metrics.observe("embed_lookup", lookup_seconds)
+    if encoded:
+        metrics.observe("embed_encode", encode_seconds)
+    if evict_now:
+        evict()
+    if not vecs:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.ascontiguousarray(np.vstack(vecs), dtype=np.float32)
+
+
+def evict(max_rows: int | None = None, ttl_days: float | None = None) -> int:
+    # drops profile vectors unused for EMBED_PROFILE_TTL_DAYS, then the least recently used beyond
+    # EMBED_PROFILE_MAX_ROWS; pinned job vectors are never evicted
+    max_rows = settings.embed_profile_max_rows if max_rows is None else max_rows
+    ttl_days = settings.embed_profile_ttl_days if ttl_days is None else ttl_days
+    removed = 0
+    with _connect() as conn:
+        if ttl_days > 0:
+            cutoff = time.time() - ttl_days * 86400
+            removed += conn.execute(
+                "DELETE FROM vectors WHERE pinned=0 AND last_used < ?", (cutoff,)
+            ).rowcount
+        if max_rows >= 0:
+            (count,) = conn.execute("SELECT COUNT(*) FROM vectors WHERE pinned=0").fetchone()
+            if count > max_rows:
+                removed += conn.execute(
+                    "DELETE FROM vectors WHERE rowid IN "
+                    "(SELECT rowid FROM vectors WHERE pinned=0 ORDER BY last_used LIMIT ?)",
+                    (count - max_rows,),
+                ).rowcount
+        conn.commit()
+    with _db_lock:
+        _counters["evicted"] += removed
+    return removed
+
+
+def compact(keep_job_texts: List[str] | None = None, other_models: bool = False) -> Dict:
+    # eviction, rows of other models/normalizations (unless other_models), the pre-namespace
+    # `embeddings` table, optionally pinned rows for jobs no longer in keep_job_texts; then VACUUM
+    ns = _namespace()
+    before = _db_bytes()
+    summary = {"evicted": evict()}
+    with _connect() as conn:
+        summary["other_namespaces"] = 0 if other_models else conn.execute(
+            "DELETE FROM vectors WHERE ns != ?", (ns,)
+        ).rowcount
+        summary["legacy_table"] = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type='table' AND name='embeddings'"
+        ).fetchone()[0]
+        conn.execute("DROP TABLE IF EXISTS embeddings")
+        summary["stale_jobs"] = 0
+        if keep_job_texts is not None:
+            conn.execute("CREATE TEMP TABLE keep (hash TEXT PRIMARY KEY)")
+            conn.executemany(
+                "INSERT OR IGNORE INTO keep VALUES (?)", [(_hash_text(t),) for t in keep_job_texts]
+            )
+            summary["stale_jobs"] = conn.execute(
+                "DELETE FROM vectors WHERE ns=? AND pinned=1 "
+                "AND hash NOT IN (SELECT hash FROM keep)",
+                (ns,),
+            ).rowcount
+        conn.commit()
+    with sqlite3.connect(settings.cache_db) as conn:
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        conn.execute("VACUUM")
+    return {**summary, "bytes_before": before, "bytes_after": _db_bytes()}
+
+
+def _db_bytes() -> int:
+    paths = (settings.cache_db, settings.cache_db + "-wal")
+    return sum(os.path.getsize(p) for p in paths if os.path.exists(p))
+
+
+def counters() -> Dict:
+    # process-lifetime lookup / encode / eviction counters, without touching the database
+    with _db_lock:
+        return dict(_counters)
+
+
+def store_stats() -> Dict:
+    ns = _namespace()
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT pinned, COUNT(*), COALESCE(SUM(LENGTH(vec)), 0) FROM vectors "
+            "WHERE ns=? GROUP BY pinned",
+            (ns,),
+        ).fetchall()
+        (other,) = conn.execute("SELECT COUNT(*) FROM vectors WHERE ns != ?", (ns,)).fetchone()
+    counts = {bool(p): (n, b) for p, n, b in rows}
+    c = counters()
+    looked_up = c["hits"] + c["misses"]
+    return {
+        "path": settings.cache_db,
+        "namespace": ns,
+        "bytes": _db_bytes(),
+        "job_rows": counts.get(True, (0, 0))[0],
+        "profile_rows": counts.get(False, (0, 0))[0],
+        "vector_bytes": sum(b for _, b in counts.values()),
+        "other_namespace_rows": other,
+        "profile_max_rows": settings.embed_profile_max_rows,
+        "profile_ttl_days": settings.embed_profile_ttl_days,
+        **c,
+        "hit_rate": c["hits"] / looked_up if looked_up else 0.0,
+        "mean_lookup_ms": 1000 * c["lookup_seconds"] / c["lookups"] if c["lookups"] else 0.0,
+    }
+
+
+class _Batcher:
+    # collects concurrent single-text requests for up to max_wait seconds (or max_batch texts)
+    # and resolves them with one get_embeddings call on a dedicated worker thread
+
+    def __init__(self, max_batch: int, max_wait: float):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0.0, max_wait)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: threading.Thread | None = None
+        self._pid = None
+        self.batches = 0
+        self.texts = 0
+
+    def submit(self, text: str) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                # (re)start after fork: the worker thread does not survive into child processes
+                self._queue = queue.Queue()
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name="embed-batcher", daemon=True
+                )
+                self._pid = os.getpid()
+                self._thread.start()
+            self._queue.put((text, fut))
+        return fut
+
+    def _run(self, q: "queue.Queue"):
+        while True:
+            batch = [q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.batches += 1
+            self.texts += len(batch)
+            try:
+                vecs = get_embeddings([t for t, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+            for (_, fut), v in zip(batch, vecs):
+                fut.set_result(v)
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "mean_batch": self.texts / self.batches if self.batches else 0.0,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+        }
+
+
+_batcher = _Batcher(settings.embed_batch_max, settings.embed_batch_wait_ms / 1000.0)
+
+
+def encode_one(text: str) -> np.ndarray:
+    # one normalized vector; concurrent callers share a batched encode when batching is enabled
+    if not settings.embed_batching:
+        return get_embeddings([text])[0]
+    return _batcher.submit(text).result()
 
 
+def batcher_stats() -> Dict:
+    return {"enabled": settings.embed_batching, **_batcher.stats()}
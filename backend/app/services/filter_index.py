@@ -0,0 +1,134 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from .titles_ontology import title_family
+
+
+_NUM_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_level(level: str) -> str:
+    # "Entry-Level" -> "entry", "Mid-Senior Level" -> "mid-senior", "Senior" -> "senior"
+    s = re.sub(r"[^a-z0-9]+", "-", str(level or "").lower().replace("level", " "))
+    return s.strip("-")
+
+
+def parse_years(text: str) -> Tuple[float, float]:
+    # "0-1", "0–1 year", "5+", "6+ years", "3" -> (low, high); (nan, nan) when no number is given
+    nums = [float(n) for n in _NUM_RE.findall(str(text or ""))]
+    if not nums:
+        return np.nan, np.nan
+    if "+" in str(text):
+        return nums[0], np.inf
+    return min(nums[:2]), max(nums[:2])
+
+
+def _groups(keys: Iterable[str]) -> Dict[str, np.ndarray]:
+    # value -> ascending row ids, from one stable argsort
+    values, codes = np.unique(np.asarray(list(keys), dtype=object).astype(str), return_inverse=True)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.cumsum(np.bincount(codes, minlength=len(values)))[:-1]
+    return {v: rows.astype(np.int64) for v, rows in zip(values, np.split(order, bounds)) if v}
+
+
+@dataclass(frozen=True)
+class JobFilter:
+    # normalized request filters; hashable so it can be part of a result-cache key
+    levels: Tuple[str, ...] = ()
+    titles: Tuple[str, ...] = ()
+    years_min: Optional[float] = None
+    years_max: Optional[float] = None
+
+    @classmethod
+    def parse(
+        cls,
+        experience_level: Optional[str] = None,
+        title: Optional[str] = None,
+        years_min: Optional[float] = None,
+        years_max: Optional[float] = None,
+    ) -> Optional["JobFilter"]:
+        # comma-separated levels / title families; None when nothing is filtered
+        levels = tuple(sorted(
+            {normalize_level(v) for v in (experience_level or "").split(",") if v.strip()}
+        ))
+        titles = tuple(sorted(
+            {title_family(v) for v in (title or "").split(",") if v.strip()}
+        ))
+        if not levels and not titles and years_min is None and years_max is None:
+            return None
+        if years_min is not None and years_max is not None and years_min > years_max:
+            raise ValueError("years_min must not exceed years_max")
+        return cls(levels, titles, years_min, years_max)
+
+
+class FilterIndex:
+    # per-snapshot row-id indexes: normalized experience level and canonical title family -> rows,
+    # plus each job's parsed years range; each distinct title is mapped to its family once
+
+    def __init__(
+        self,
+        levels: Dict[str, np.ndarray],
+        titles: Dict[str, np.ndarray],
+        years_lo: np.ndarray,
+        years_hi: np.ndarray,
+    ):
+        self.levels = levels
+        self.titles = titles
+        self.years_lo = years_lo
+        self.years_hi = years_hi
+
+    @classmethod
+    def build(cls, titles: Iterable, levels: Iterable, years: Iterable) -> "FilterIndex":
+        titles = [str(t) if isinstance(t, str) else "" for t in titles]
+        family = {t: title_family(t) for t in set(titles)}
+        parsed = [parse_years(y) for y in years]
+        lo = np.array([p[0] for p in parsed], dtype=np.float64).reshape(-1)
+        hi = np.array([p[1] for p in parsed], dtype=np.float64).reshape(-1)
+        return cls(
+            _groups(normalize_level(v) for v in levels),
+            _groups(family[t] for t in titles),
+            lo,
+            hi,
+        )
+
+    def __len__(self) -> int:
+        return len(self.years_lo)
+
+    def rows(self, f: Optional[JobFilter]) -> Optional[np.ndarray]:
+        # ascending positions of the jobs that pass f; None when f filters nothing
+        if f is None:
+            return None
+        empty = np.zeros(0, dtype=np.int64)
+        sets = []
+        if f.levels:
+            sets.append(np.unique(np.concatenate([self.levels.get(v, empty) for v in f.levels])))
+        if f.titles:
+            sets.append(np.unique(np.concatenate([self.titles.get(v, empty) for v in f.titles])))
+        sets.sort(key=len)
+        rows = sets[0] if sets else None
+        for other in sets[1:]:
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        if f.years_min is None and f.years_max is None:
+            return rows
+        # job ranges overlapping the requested one; jobs without a years value never match
+        lo = self.years_lo if rows is None else self.years_lo[rows]
+        hi = self.years_hi if rows is None else self.years_hi[rows]
+        keep = ~np.isnan(lo)
+        if f.years_max is not None:
+            keep &= lo <= f.years_max
+        if f.years_min is not None:
+            keep &= hi >= f.years_min
+        return np.flatnonzero(keep) if rows is None else rows[keep]
+
+    def facets(self) -> Dict:
+        return {
+            "experience_levels": {v: len(r) for v, r in sorted(self.levels.items())},
+            "title_families": {
+                v: len(r)
+                for v, r in sorted(self.titles.items(), key=lambda kv: (-len(kv[1]), kv[0]))
+            },
+            "years_known": int(np.count_nonzero(~np.isnan(self.years_lo))),
+        }
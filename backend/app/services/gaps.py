@@ -1,26 +1,18 @@
 from typing import Dict, List
-from . import loader, skills as skills_svc
-from . import recommender as rec
-from ..store import Store
+from . import recommender as rec, courses, metrics
+from .filter_index import JobFilter
+from ..store import get_store
 
 
-def _map_to_courses(skill: str) -> List[Dict]:
-    # Try mapping CSV if present
-    mapping_df = Store().get_skills_mapping()
-    out: List[Dict] = []
-    if mapping_df is not None:
-        rows = mapping_df[mapping_df["skill"].str.lower() == skill.lower()]
-        for _, r in rows.head(2).iterrows():
-            out.append({
-                "course_name": r.get("course_name", ""),
-                "provider": r.get("provider", ""),
-                "hours": r.get("hours", ""),
-            })
-    if not out:
-        out = [
-            {"course_name": f"Intro to {skill}", "provider": "Generic", "hours": "10-15"},
-        ]
-    return out
+@metrics.timed("courses")
+def _map_to_courses(skills: List[str]) -> Dict[str, List[Dict]]:
+    # catalog courses (skills_to_courses.csv) where present, else a generic suggestion
+    found = courses.courses_for(skills)
+    return {
+        s: found.get(s)
+        or [{"course_name": f"Intro to {s}", "provider": "Generic", "hours": "10-15"}]
+        for s in skills
+    }
 
 
 def _roadmap(skills: List[str]) -> str:
@@ -35,51 +27,79 @@ def _roadmap(skills: List[str]) -> str:
     )
 
 
-def compute_gaps(profile_id: str, job_id: str) -> Dict:
-    profile = Store().get_profile(profile_id)
-    jobs_df, _ = loader.get_jobs()
-    if not profile or jobs_df is None:
-        return {"present": [], "missing": [], "weak": [], "suggestions": {}, "roadmap_3mo": ""}
-    row = jobs_df[jobs_df["job_id"].astype(str) == str(job_id)]
-    if row.empty:
-        return {"present": [], "missing": [], "weak": [], "suggestions": {}, "roadmap_3mo": ""}
-    job = row.iloc[0]
-    job_skills = set(skills_svc.parse_skills(job.get("clean_skills", "")))
-    present = set(profile.get("skills", []))
+_EMPTY = {"present": [], "missing": [], "weak": [], "suggestions": {}, "roadmap_3mo": ""}
+
+
+def _gaps(present: set, job_skills: set, suggestions: Dict[str, List[Dict]] | None = None) -> Dict:
     missing = sorted(list(job_skills - present))
     weak = sorted(list(job_skills & present))[:3]  # heuristic: first few as weak
-    suggestions = {s: _map_to_courses(s) for s in missing[:6]}
-    roadmap = _roadmap(missing)
+    if suggestions is None:
+        suggestions = _map_to_courses(missing[:6])
+    else:
+        suggestions = {s: suggestions[s] for s in missing[:6]}
     return {
         "present": sorted(list(present)),
         "missing": missing,
         "weak": weak,
         "suggestions": suggestions,
-        "roadmap_3mo": roadmap,
+        "roadmap_3mo": _roadmap(missing),
     }
 
 
+@metrics.timed("gaps")
+def compute_gaps(profile_id: str, job_id: str) -> Dict:
+    profile = get_store().get_profile(profile_id)
+    snap = rec.current_index()
+    pos = snap.position(job_id)
+    if not profile or pos is None:
+        return dict(_EMPTY)
+    return _gaps(set(profile.get("skills", [])), set(rec.job_skills(pos, snap)))
+
+
+@metrics.timed("gaps")
 def compute_gaps_for_resume(resume_id: str, job_id: str) -> Dict:
-    text, skills = rec._get_resume_text_and_skills_by_resume_id(resume_id)  # type: ignore
-    jobs_df, _ = loader.get_jobs()
-    if not skills or jobs_df is None:
-        return {"present": [], "missing": [], "weak": [], "suggestions": {}, "roadmap_3mo": ""}
-    row = jobs_df[jobs_df["job_id"].astype(str) == str(job_id)]
-    if row.empty:
-        return {"present": [], "missing": [], "weak": [], "suggestions": {}, "roadmap_3mo": ""}
-    job = row.iloc[0]
-    job_skills = set(skills_svc.parse_skills(job.get("clean_skills", "")))
-    present = set(skills)
-    missing = sorted(list(job_skills - present))
-    weak = sorted(list(job_skills & present))[:3]
-    suggestions = {s: _map_to_courses(s) for s in missing[:6]}
-    roadmap = _roadmap(missing)
-    return {
-        "present": sorted(list(present)),
-        "missing": missing,
-        "weak": weak,
-        "suggestions": suggestions,
-        "roadmap_3mo": roadmap,
-    }
+    _, skills = rec._get_resume_text_and_skills_by_resume_id(resume_id)  # type: ignore
+    snap = rec.current_index()
+    pos = snap.position(job_id)
+    if not skills or pos is None:
+        return dict(_EMPTY)
+    return _gaps(set(skills), set(rec.job_skills(pos, snap)))
 
 
+def recommend_with_gaps(
+    profile_id: str | None = None,
+    resume_id: str | None = None,
+    k: int = 10,
+    mode: str = None,
+    retrieval: str = None,
+    filt: JobFilter | None = None,
+) -> List[Dict]:
+    # top-k plus each job's gaps in one call; the profile is loaded once and ranking and gaps share
+    # one snapshot; course suggestions resolved once for all jobs
+    snap = rec.current_index()
+    if profile_id:
+        profile = get_store().get_profile(profile_id)
+        present = set(profile.get("skills", [])) if profile else set()
+        valid = profile is not None
+        results = rec.recommend_for_profile(
+            profile_id, k=k, mode=mode, retrieval=retrieval, filt=filt, profile=profile, snap=snap
+        ) if profile else []
+    else:
+        resume = rec._get_resume_text_and_skills_by_resume_id(resume_id)  # type: ignore
+        present = set(resume[1])
+        valid = bool(resume[1])
+        results = rec.recommend_for_resume_id(
+            resume_id, k=k, mode=mode, retrieval=retrieval, filt=filt, resume=resume, snap=snap
+        )
+    with metrics.stage("gaps"):
+        job_skill_sets = []
+        for r in results:
+            pos = snap.position(r["job_id"])
+            job_skill_sets.append(set(rec.job_skills(pos, snap)) if pos is not None else None)
+        wanted = sorted({s for js in job_skill_sets if js for s in sorted(js - present)[:6]})
+        suggestions = _map_to_courses(wanted)
+        out = []
+        for r, js in zip(results, job_skill_sets):
+            gaps = _gaps(present, js, suggestions) if js is not None and valid else dict(_EMPTY)
+            out.append({**r, "gaps": gaps})
+        return out
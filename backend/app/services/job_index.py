@@ -0,0 +1,274 @@
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from . import loader, embeddings as emb
+from .ann import IVFIndex
+from .filter_index import FilterIndex
+from .lexical_index import LexicalIndex
+from .quant import QuantizedVecs
+from .skill_index import SkillIndex
+from .skills import SkillMatcher
+from ..settings import settings
+
+if TYPE_CHECKING:
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+# source columns for the experience level and years filters, first present wins
+LEVEL_COLUMNS = ("experience_level", "experiencelevel")
+YEARS_COLUMNS = ("years_experience", "yearsofexperience")
+
+# one representative title per experience bucket: 0 = other, 1 = senior/lead,
+# 2 = junior/associate/entry
+EXP_BUCKET_TITLES = ("", "senior", "junior")
+
+Progress = Callable[[str, float], None]
+
+_lazy_lock = threading.Lock()
+
+
+def _no_progress(stage: str, fraction: float):
+    pass
+
+
+def exp_buckets(titles: np.ndarray) -> np.ndarray:
+    lowered = [(t or "").lower() if isinstance(t, str) else "" for t in titles]
+    buckets = np.zeros(len(lowered), dtype=np.int8)
+    for i, jt in enumerate(lowered):
+        if "senior" in jt or "lead" in jt:
+            buckets[i] = 1
+        elif "junior" in jt or "associate" in jt or "entry" in jt:
+            buckets[i] = 2
+    return buckets
+
+
+@dataclass(frozen=True)
+class JobIndex:
+    # everything derived from one jobs_df, published as a unit; positions line up across all fields
+    jobs_df: object
+    version: str
+    texts: List[str]
+    ids: np.ndarray
+    titles: np.ndarray
+    levels: np.ndarray
+    exp_bucket: np.ndarray
+    tfidf: Optional["TfidfVectorizer"] = None
+    matrix: Optional[sparse.csr_matrix] = None
+    # postings over the TF-IDF vocabulary for baseline candidate retrieval (LEXICAL_SCORER weights);
+    # lexical and ann are built up front only with RETRIEVAL_MODE=ann, see lexical_index/ann_index
+    lexical: Optional[LexicalIndex] = None
+    # contiguous (n_jobs, dim) float32 matrix; memory-mapped from disk when qvecs is set
+    vecs: Optional[np.ndarray] = None
+    # float16/int8 copy used for the first-pass embedding scores (JOB_VEC_DTYPE), else None
+    qvecs: Optional[QuantizedVecs] = None
+    ann: Optional[IVFIndex] = None
+    skills: Optional[SkillIndex] = None
+    # extract_skills matcher compiled from this catalog's skill vocabulary
+    matcher: Optional[SkillMatcher] = None
+    # incremental ingests applied on top of the last full TF-IDF fit
+    deltas_since_refit: int = 0
+    generation: int = 0
+    built_at: float = field(default_factory=time.time)
+    # experience level / years / canonical title row indexes behind the request filters
+    filters: Optional[FilterIndex] = field(default=None, compare=False, repr=False)
+    # job_id -> position, built with the snapshot
+    id_pos: Dict[str, int] = field(default_factory=dict, compare=False, repr=False)
+    # lexical / ann indexes built on the first retrieval=ann request that needed them
+    lazy: Dict[str, object] = field(default_factory=dict, compare=False, repr=False)
+    # experience vectors by per-bucket alignment weights, memoized for the lifetime of this snapshot
+    exp_cache: Dict[tuple, np.ndarray] = field(default_factory=dict, compare=False, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def position(self, job_id) -> Optional[int]:
+        return self.id_pos.get(str(job_id))
+
+    def lexical_index(self) -> Optional[LexicalIndex]:
+        if self.lexical is not None or self.matrix is None or self.tfidf is None:
+            return self.lexical
+        return self._lazy(
+            "lexical",
+            lambda: LexicalIndex.build(self.matrix, self.tfidf.idf_, settings.lexical_scorer),
+        )
+
+    def ann_index(self) -> Optional[IVFIndex]:
+        if self.ann is not None or self.vecs is None or len(self.vecs) <= settings.ann_candidates:
+            return self.ann
+        return self._lazy("ann", lambda: IVFIndex.build(self.vecs))
+
+    def _lazy(self, name: str, make: Callable[[], object]):
+        value = self.lazy.get(name)
+        if value is None:
+            with _lazy_lock:
+                value = self.lazy.get(name)
+                if value is None:
+                    value = self.lazy[name] = make()
+        return value
+
+
+def _columns(jobs_df) -> Dict:
+    ids = jobs_df["job_id"].astype(str).to_numpy(dtype=object)
+    titles = jobs_df["title"].to_numpy(dtype=object)
+    blank = np.full(len(jobs_df), "", dtype=object)
+    level_col = next((c for c in LEVEL_COLUMNS if c in jobs_df.columns), None)
+    levels = jobs_df[level_col].astype(str).to_numpy(dtype=object) if level_col else blank
+    years_col = next((c for c in YEARS_COLUMNS if c in jobs_df.columns), None)
+    years = jobs_df[years_col].astype(str).to_numpy(dtype=object) if years_col else blank
+    id_pos: Dict[str, int] = {}
+    for i, jid in enumerate(ids):
+        id_pos.setdefault(jid, i)
+    return {
+        "ids": ids,
+        "titles": titles,
+        "levels": levels,
+        "exp_bucket": exp_buckets(titles),
+        "id_pos": id_pos,
+        "filters": FilterIndex.build(titles, levels, years),
+    }
+
+
+def _compact(vecs: np.ndarray) -> Tuple[np.ndarray, Optional[QuantizedVecs]]:
+    # with JOB_VEC_DTYPE=float16|int8 only the quantized copy stays resident; the float32 matrix
+    # is spilled to an unlinked file and memory-mapped, so only rescored rows get paged in
+    if settings.job_vec_dtype == "float32" or len(vecs) == 0:
+        return vecs, None
+    qvecs = QuantizedVecs.build(vecs, settings.job_vec_dtype)
+    if isinstance(vecs, np.memmap):
+        return vecs, qvecs
+    os.makedirs(settings.vec_spill_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".npy", dir=settings.vec_spill_dir)
+    with os.fdopen(fd, "wb") as f:
+        np.save(f, vecs)
+    spilled = np.load(path, mmap_mode="r")
+    try:
+        os.unlink(path)  # the mapping keeps the data alive until the snapshot is dropped
+    except OSError:
+        pass
+    return spilled, qvecs
+
+
+def empty(jobs_df, version: str) -> JobIndex:
+    none = np.zeros(0, dtype=object)
+    return JobIndex(jobs_df, version, [], none, none, none, np.zeros(0, dtype=np.int8))
+
+
+def slice_rows(snap: JobIndex, lo: int, hi: int) -> JobIndex:
+    # rows [lo, hi) as a standalone index for a scoring shard; embeddings and columns are views
+    return JobIndex(
+        None, snap.version, snap.texts[lo:hi], snap.ids[lo:hi], snap.titles[lo:hi],
+        snap.levels[lo:hi], snap.exp_bucket[lo:hi], tfidf=snap.tfidf,
+        matrix=snap.matrix[lo:hi] if snap.matrix is not None else None,
+        vecs=snap.vecs[lo:hi] if snap.vecs is not None else None,
+        skills=snap.skills.take(np.arange(lo, hi)) if snap.skills is not None else None,
+        generation=snap.generation, built_at=snap.built_at,
+    )
+
+
+def build(jobs_df, version: str, progress: Progress = _no_progress) -> JobIndex:
+    if jobs_df is None or len(jobs_df) == 0:
+        return empty(jobs_df, version)
+    progress("texts", 0.1)
+    texts = loader.build_job_texts(jobs_df)
+    cols = _columns(jobs_df)
+    progress("tfidf", 0.2)
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    tfidf = TfidfVectorizer(max_features=50000, ngram_range=(1, 2))
+    matrix = tfidf.fit_transform(texts)
+    # with RETRIEVAL_MODE=exact the candidate indexes wait for the first retrieval=ann request
+    eager = settings.retrieval_mode == "ann"
+    lexical = LexicalIndex.build(matrix, tfidf.idf_, settings.lexical_scorer) if eager else None
+    progress("skills", 0.4)
+    skills = SkillIndex.build(jobs_df["clean_skills"].tolist())
+    progress("embeddings", 0.5)
+    # one bulk cache read (encoding only misses)
+    vecs, qvecs = _compact(emb.get_embeddings(texts, pin=True))
+    progress("ann", 0.9)
+    ann = IVFIndex.build(vecs) if eager and len(vecs) > settings.ann_candidates else None
+    return JobIndex(
+        jobs_df, version, texts, tfidf=tfidf, matrix=matrix, lexical=lexical,
+        vecs=vecs, qvecs=qvecs, ann=ann, skills=skills,
+        matcher=SkillMatcher(skills.skills), **cols
+    )
+
+
+def refresh(
+    old: JobIndex, jobs_df, version: str, progress: Progress = _no_progress
+) -> Tuple[JobIndex, Dict]:
+    # incremental counterpart of build: diff against old by job_id and job text, encode/transform
+    # only new or changed rows, keep the fitted TF-IDF vocabulary; full build every
+    # INGEST_REFIT_EVERY deltas or when more than INGEST_REFIT_FRACTION of the jobs changed
+    stale = old.deltas_since_refit >= settings.ingest_refit_every
+    if old.tfidf is None or jobs_df is None or len(jobs_df) == 0 or stale:
+        new = build(jobs_df, version, progress)
+        return new, {"refit": True, "jobs": len(new)}
+    progress("diff", 0.1)
+    texts = loader.build_job_texts(jobs_df)
+    ids = jobs_df["job_id"].astype(str).tolist()
+    old_pos = old.id_pos
+    n_old = len(old)
+    # src[i]: row of the stacked (old rows + changed rows) arrays that becomes new row i
+    src = np.empty(len(ids), dtype=np.int64)
+    changed: List[int] = []
+    updated = 0
+    for i, (jid, text) in enumerate(zip(ids, texts)):
+        j = old_pos.get(jid)
+        if j is not None and old.texts[j] == text:
+            src[i] = j
+        else:
+            updated += j is not None
+            src[i] = n_old + len(changed)
+            changed.append(i)
+    if len(changed) > settings.ingest_refit_fraction * len(ids):
+        new = build(jobs_df, version, progress)
+        return new, {"refit": True, "jobs": len(new)}
+    progress("embeddings", 0.3)
+    new_texts = [texts[i] for i in changed]
+    if changed:
+        matrix = sparse.vstack([old.matrix, old.tfidf.transform(new_texts)], format="csr")[src]
+        new_vecs = emb.get_embeddings(new_texts, pin=True)
+        vecs = np.ascontiguousarray(np.vstack([old.vecs, new_vecs])[src])
+        skills = old.skills.append(jobs_df["clean_skills"].iloc[changed].tolist()).take(src)
+    else:
+        matrix = old.matrix[src]
+        vecs = np.ascontiguousarray(old.vecs[src])
+        skills = old.skills.take(src)
+    # candidate indexes are kept when RETRIEVAL_MODE=ann or the old snapshot had to build them;
+    # postings are re-derived from the whole matrix: one O(nnz) pass, the BM25 statistics change
+    # anyway
+    eager = settings.retrieval_mode == "ann"
+    lexical = None
+    if eager or old.lexical is not None or "lexical" in old.lazy:
+        lexical = LexicalIndex.build(matrix, old.tfidf.idf_, settings.lexical_scorer)
+    # the vocabulary only grows; recompile when it did
+    matcher = old.matcher
+    if matcher is None or len(skills.vocab) != len(old.skills.vocab):
+        matcher = SkillMatcher(skills.skills)
+    vecs, qvecs = _compact(vecs)
+    progress("ann", 0.9)
+    old_ann = old.ann if old.ann is not None else old.lazy.get("ann")
+    if old_ann is not None:
+        ann = IVFIndex.with_centroids(vecs, old_ann.centroids)
+    else:
+        ann = IVFIndex.build(vecs) if eager and len(vecs) > settings.ann_candidates else None
+    new = JobIndex(
+        jobs_df, version, texts, tfidf=old.tfidf, matrix=matrix, lexical=lexical,
+        vecs=vecs, qvecs=qvecs, ann=ann, skills=skills, matcher=matcher,
+        deltas_since_refit=old.deltas_since_refit + 1, **_columns(jobs_df),
+    )
+    kept = int(np.count_nonzero(src < n_old))
+    return new, {
+        "refit": False,
+        "jobs": len(ids),
+        "added": len(changed) - updated,
+        "updated": updated,
+        "removed": n_old - kept - updated,
+        "unchanged": kept,
+    }
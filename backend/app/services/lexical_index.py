@@ -0,0 +1,118 @@
+from typing import Tuple
+
+import numpy as np
+from scipy import sparse
+
+
+# BM25 term-frequency saturation and length normalization
+_K1 = 1.2
+_B = 0.75
+# slack on the pruning comparisons so summation-order rounding never drops a true top-k job
+_EPS = 1e-9
+SCORERS = ("cosine", "bm25")
+
+
+def _bm25_weights(matrix: sparse.csr_matrix, idf: np.ndarray) -> sparse.csr_matrix:
+    # term counts recovered from the l2-normalized TF-IDF rows: within a row tf is proportional to
+    # weight / idf, scaled so the row's least frequent term counts once (exact whenever some
+    # in-vocabulary term occurs once in the job, i.e. nearly always); lengths count in-vocabulary
+    # terms
+    m = sparse.csr_matrix(matrix, dtype=np.float64, copy=True)
+    n_docs = m.shape[0]
+    lengths = np.diff(m.indptr)
+    rows = np.repeat(np.arange(n_docs), lengths)
+    ratio = m.data / np.asarray(idf, dtype=np.float64)[m.indices]
+    scale = np.ones(n_docs)
+    nonempty = lengths > 0
+    if nonempty.any():
+        scale[nonempty] = np.minimum.reduceat(ratio, m.indptr[:-1][nonempty])
+    tf = np.maximum(np.rint(ratio / scale[rows]), 1.0)
+    dl = np.bincount(rows, weights=tf, minlength=n_docs)
+    avgdl = dl.mean() if n_docs and dl.mean() > 0 else 1.0
+    df = np.bincount(m.indices, minlength=m.shape[1])
+    bidf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+    norm = _K1 * (1 - _B + _B * dl / avgdl)
+    m.data = bidf[m.indices] * tf * (_K1 + 1) / (tf + norm[rows])
+    return m
+
+
+class LexicalIndex:
+    # term -> postings (job positions ascending, per-job weight) over the fitted TF-IDF vocabulary,
+    # plus each term's largest weight as the upper bound that lets top_k stop early
+
+    def __init__(self, postings: sparse.csc_matrix, scorer: str = "cosine"):
+        self.postings = postings
+        self.scorer = scorer
+        self.max_w = np.zeros(postings.shape[1])
+        nonempty = np.diff(postings.indptr) > 0
+        if nonempty.any():
+            starts = postings.indptr[:-1][nonempty]
+            self.max_w[nonempty] = np.maximum.reduceat(postings.data, starts)
+
+    @classmethod
+    def build(
+        cls, matrix: sparse.csr_matrix, idf: np.ndarray, scorer: str = "cosine"
+    ) -> "LexicalIndex":
+        if scorer == "cosine":
+            # job rows and the transformed query are both l2-normalized, so the dot product is the
+            # cosine
+            weights = matrix
+        elif scorer == "bm25":
+            weights = _bm25_weights(matrix, idf)
+        else:
+            raise ValueError(f"unsupported lexical scorer: {scorer}")
+        postings = sparse.csc_matrix(weights, dtype=np.float64, copy=True)
+        postings.sort_indices()
+        return cls(postings, scorer)
+
+    def __len__(self) -> int:
+        return self.postings.shape[0]
+
+    @property
+    def nbytes(self) -> int:
+        p = self.postings
+        return p.data.nbytes + p.indices.nbytes + p.indptr.nbytes
+
+    def top_k(self, query: sparse.spmatrix, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        # exact top-k among jobs sharing a term with the query (a 1 x vocabulary TF-IDF row):
+        # positions best first (ties by position, as _top_k) and their scores. Term-at-a-time in
+        # decreasing upper bound (MaxScore): once the bounds of the remaining terms cannot lift an
+        # unseen job past the k-th score, only current candidates are scored (binary search into
+        # the remaining postings) and candidates that can no longer reach the top k are dropped
+        q = sparse.csr_matrix(query)
+        terms = q.indices
+        if k <= 0 or len(terms) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        qw = q.data.astype(np.float64) if self.scorer == "cosine" else np.ones(len(terms))
+        ub = qw * self.max_w[terms]
+        order = np.argsort(-ub, kind="stable")
+        terms, qw, ub = terms[order], qw[order], ub[order]
+        # rest[i]: best score still obtainable from the terms after i
+        rest = np.append(np.cumsum(ub[::-1])[::-1], 0.0)[1:]
+        indptr, indices, data = self.postings.indptr, self.postings.indices, self.postings.data
+        cand = np.zeros(0, dtype=np.int64)
+        score = np.zeros(0)
+        admitting = True
+        for i, t in enumerate(terms):
+            docs = indices[indptr[t]:indptr[t + 1]]
+            w = data[indptr[t]:indptr[t + 1]] * qw[i]
+            if admitting:
+                merged = np.union1d(cand, docs)
+                acc = np.zeros(len(merged))
+                acc[np.searchsorted(merged, cand)] = score
+                acc[np.searchsorted(merged, docs)] += w
+                cand, score = merged, acc
+            elif len(docs):
+                pos = np.minimum(np.searchsorted(docs, cand), len(docs) - 1)
+                hit = docs[pos] == cand
+                score[hit] += w[pos[hit]]
+            if len(score) < k:
+                continue
+            theta = np.partition(score, len(score) - k)[len(score) - k]
+            if admitting and rest[i] + _EPS < theta:
+                admitting = False
+            if not admitting:
+                keep = score + rest[i] + _EPS >= theta
+                cand, score = cand[keep], score[keep]
+        top = np.lexsort((cand, -score))[:k]
+        return cand[top], score[top]
@@ -1,13 +1,32 @@
 import os
 import json
-from typing import Dict, Tuple, Optional
+import hashlib
+import shutil
+import tempfile
+from typing import Dict, List, Tuple, Optional
 import pandas as pd
+from . import metrics
 from ..settings import settings
 
 
 _jobs_df: Optional[pd.DataFrame] = None
 _resumes_df: Optional[pd.DataFrame] = None
 _meta: Dict = {}
+# resume_id -> row position in _resumes_df, published with it
+_resume_pos: Dict[str, int] = {}
+
+
+def file_version(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()[:16]
+
+
+def csv_path(kind: str) -> str:
+    names = {"jobs": "clean_jobs.csv", "resumes": "clean_resume_data.csv"}
+    return os.path.join(settings.data_dir, names[kind])
 
 
 def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
@@ -16,11 +35,7 @@ def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _load_jobs() -> Tuple[Optional[pd.DataFrame], Dict]:
-    path = os.path.join(settings.data_dir, "clean_jobs.csv")
-    if not os.path.exists(path):
-        return None, {"found": False}
-    df = pd.read_csv(path)
+def _prepare_jobs(df: pd.DataFrame) -> pd.DataFrame:
     df = _normalize_columns(df)
     expected = ["title", "description"]
     for col in expected:
@@ -43,26 +58,205 @@ def _load_jobs() -> Tuple[Optional[pd.DataFrame], Dict]:
         df["clean_skills"] = ""
     elif chosen != "clean_skills":
         df["clean_skills"] = df[chosen].fillna("")
-    df = df.fillna("").drop_duplicates(subset=["job_id"]) if "job_id" in df.columns else df.drop_duplicates()
-    return df, {"found": True, "rows": len(df)}
+    df = df.fillna("")
+    return df.drop_duplicates(subset=["job_id"]) if "job_id" in df.columns else df.drop_duplicates()
 
 
-def _load_resumes() -> Tuple[Optional[pd.DataFrame], Dict]:
-    path = os.path.join(settings.data_dir, "clean_resume_data.csv")
-    if not os.path.exists(path):
-        return None, {"found": False}
-    df = pd.read_csv(path)
+def _prepare_resumes(df: pd.DataFrame) -> pd.DataFrame:
     df = _normalize_columns(df)
     if "resume_id" not in df.columns:
         df["resume_id"] = range(1, len(df) + 1)
-    return df.fillna("") , {"found": True, "rows": len(df)}
+    return df.fillna("")
+
+
+# columns every consumer relies on, loaded whatever JOB_COLUMNS / RESUME_COLUMNS say
+_REQUIRED = {"jobs": ("job_id", "title", "description", "clean_skills"), "resumes": ("resume_id",)}
+_PREPARE = {"jobs": _prepare_jobs, "resumes": _prepare_resumes}
+# named low-cardinality fields kept as pandas categoricals; free text (summaries, skills) stays
+# object
+_CATEGORICAL = {
+    "jobs": (
+        "title", "experience_level", "experiencelevel", "years_experience", "yearsofexperience",
+    ),
+    "resumes": (),
+}
+_CACHE_FORMAT = 2
+
+
+def _wanted_columns(kind: str, available: List[str]) -> List[str]:
+    spec = settings.job_columns if kind == "jobs" else settings.resume_columns
+    if spec.strip() == "*":
+        return list(available)
+    wanted = set(_REQUIRED[kind]) | {c.strip() for c in spec.split(",") if c.strip()}
+    return [c for c in available if c in wanted]
+
+
+def _categorize(df: pd.DataFrame, kind: str) -> pd.DataFrame:
+    # experience level, years and titles as pandas categoricals when they repeat enough
+    for col in df.columns:
+        if col not in _CATEGORICAL[kind] or df[col].dtype != object or len(df) == 0:
+            continue
+        n_unique = df[col].nunique()
+        if n_unique <= 1000 and n_unique <= len(df) // 2:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def _cache_dir(kind: str) -> Optional[str]:
+    return os.path.join(settings.csv_cache_dir, kind) if settings.csv_cache_dir else None
+
+
+def _read_cache_manifest(cache: Optional[str]) -> Optional[Dict]:
+    if not cache:
+        return None
+    try:
+        with open(os.path.join(cache, "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != _CACHE_FORMAT or manifest.get("pandas") != pd.__version__:
+        return None
+    return manifest
+
+
+def _write_cache(cache: str, df: pd.DataFrame, manifest: Dict):
+    # one pickle per column, written into a private temp dir and renamed to <kind>/<version>/ once
+    # complete; the manifest is swapped after that and older versions removed last, so readers
+    # only ever see whole directories (and fall back to the CSV if theirs disappears mid-read)
+    os.makedirs(cache, exist_ok=True)
+    col_dir = os.path.join(cache, manifest["version"])
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=cache)
+    try:
+        for i, col in enumerate(df.columns):
+            df[col].to_pickle(os.path.join(tmp, f"{i}.pkl"))
+        if os.path.isdir(col_dir):
+            # a damaged copy of this version: move it aside, then drop it
+            stale = tempfile.mkdtemp(prefix=".old-", dir=cache)
+            os.replace(col_dir, stale)
+            shutil.rmtree(stale, ignore_errors=True)
+        try:
+            os.replace(tmp, col_dir)
+        except OSError:
+            # another writer published this version in between
+            if not os.path.isdir(col_dir):
+                raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    _write_manifest(cache, {**manifest, "columns": list(df.columns)})
+    for name in os.listdir(cache):
+        path = os.path.join(cache, name)
+        if name != manifest["version"] and not name.startswith(".") and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _write_manifest(cache: str, manifest: Dict):
+    fd, tmp = tempfile.mkstemp(prefix=".manifest-", suffix=".json", dir=cache)
+    with os.fdopen(fd, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp, os.path.join(cache, "manifest.json"))
+
+
+def _read_cache(cache: str, manifest: Dict, kind: str) -> pd.DataFrame:
+    col_dir = os.path.join(cache, manifest["version"])
+    columns = manifest["columns"]
+    return pd.DataFrame({
+        col: pd.read_pickle(os.path.join(col_dir, f"{columns.index(col)}.pkl"))
+        for col in _wanted_columns(kind, columns)
+    })
+
+
+def _load_frame(kind: str) -> Tuple[Optional[pd.DataFrame], Dict]:
+    # parsed CSV from the columnar cache when its size+mtime (or, failing that, content hash) match
+    path = csv_path(kind)
+    if not os.path.exists(path):
+        return None, {"found": False}
+    st = os.stat(path)
+    cache = _cache_dir(kind)
+    manifest = _read_cache_manifest(cache)
+    if manifest and manifest["size"] == st.st_size and manifest["mtime_ns"] == st.st_mtime_ns:
+        version = manifest["version"]
+    else:
+        version = file_version(path)
+        if manifest and manifest["version"] == version:
+            manifest = {**manifest, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            _write_manifest(cache, manifest)
+        else:
+            manifest = None
+    if manifest is not None:
+        try:
+            with metrics.stage("csv_cache_read"):
+                df = _read_cache(cache, manifest, kind)
+            return df, {
+                "found": True, "rows": len(df), "version": version,
+                "cached": True, "columns": manifest["columns"],
+            }
+        except Exception:
+            # missing, truncated or replaced mid-read: parse the CSV instead
+            pass
+    with metrics.stage("csv_parse"):
+        df = _categorize(_PREPARE[kind](pd.read_csv(path)), kind)
+    columns = list(df.columns)
+    if cache:
+        manifest = {
+            "format": _CACHE_FORMAT, "pandas": pd.__version__, "version": version,
+            "size": st.st_size, "mtime_ns": st.st_mtime_ns, "rows": len(df),
+        }
+        try:
+            _write_cache(cache, df, manifest)
+        except OSError:
+            pass
+    df = df[_wanted_columns(kind, columns)]
+    return df, {
+        "found": True, "rows": len(df), "version": version, "cached": False, "columns": columns,
+    }
+
+
+def _load_jobs() -> Tuple[Optional[pd.DataFrame], Dict]:
+    return _load_frame("jobs")
+
+
+def _load_resumes() -> Tuple[Optional[pd.DataFrame], Dict]:
+    return _load_frame("resumes")
+
+
+def load_all() -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Dict]:
+    # reads the CSVs without touching the published frames
+    jobs_df, jobs_meta = _load_jobs()
+    resumes_df, resumes_meta = _load_resumes()
+    return jobs_df, resumes_df, {"jobs": jobs_meta, "resumes": resumes_meta}
+
+
+def _row_index(ids) -> Dict[str, int]:
+    pos: Dict[str, int] = {}
+    for i, rid in enumerate(ids):
+        pos.setdefault(str(rid), i)
+    return pos
+
+
+def publish(jobs_df: Optional[pd.DataFrame], resumes_df: Optional[pd.DataFrame], meta: Dict):
+    global _jobs_df, _resumes_df, _meta, _resume_pos
+    resume_pos = _row_index(resumes_df["resume_id"]) if resumes_df is not None else {}
+    _jobs_df, _resumes_df, _meta, _resume_pos = jobs_df, resumes_df, meta, resume_pos
+
+
+def publish_with_jobs(jobs_df: pd.DataFrame, jobs_meta: Dict) -> Dict:
+    # jobs come from a prebuilt snapshot; only the resumes CSV is parsed
+    resumes_df, resumes_meta = _load_resumes()
+    publish(jobs_df, resumes_df, {"jobs": jobs_meta, "resumes": resumes_meta})
+    return resumes_meta
 
 
 def reload_all():
-    global _jobs_df, _resumes_df, _meta
-    _jobs_df, jobs_meta = _load_jobs()
-    _resumes_df, resumes_meta = _load_resumes()
-    _meta = {"jobs": jobs_meta, "resumes": resumes_meta}
+    publish(*load_all())
+
+
+def data_version(meta: Optional[Dict] = None) -> str:
+    # content hash of the loaded CSVs; changes whenever a reload picks up different data
+    if meta is None:
+        if _jobs_df is None:
+            reload_all()
+        meta = _meta
+    return "-".join(meta.get(k, {}).get("version", "none") for k in ("jobs", "resumes"))
 
 
 def get_jobs() -> Tuple[Optional[pd.DataFrame], Dict]:
@@ -77,6 +271,15 @@ def get_resumes_df() -> Optional[pd.DataFrame]:
     return _resumes_df
 
 
+def get_resume(resume_id) -> Optional[pd.Series]:
+    # O(1) lookup by resume_id through the index built at publish time
+    resumes = get_resumes_df()
+    pos = _resume_pos.get(str(resume_id))
+    if resumes is None or pos is None:
+        return None
+    return resumes.iloc[pos]
+
+
 def build_job_text(row: pd.Series) -> str:
     skills = str(row.get("clean_skills", ""))
     title = str(row.get("title", ""))
@@ -84,3 +287,8 @@ def build_job_text(row: pd.Series) -> str:
     return " \n".join([title, desc, skills])
 
 
+def build_job_texts(df: pd.DataFrame) -> List[str]:
+    # column-wise build_job_text for every row
+    cols = ("title", "description", "clean_skills")
+    parts = [df[c].astype(str) if c in df.columns else pd.Series("", index=df.index) for c in cols]
+    return (parts[0] + " \n" + parts[1] + " \n" + parts[2]).tolist()
@@ -0,0 +1,132 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..settings import settings
+
+
+# histogram upper bounds in seconds; +Inf is implicit
+BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 120.0,
+)
+_PREFIX = "jobrec_"
+
+_lock = threading.Lock()
+# stage -> [bucket counts..., +Inf count], sum, count
+_hist: Dict[str, Tuple[List[int], List[float]]] = {}
+# the current request's stage totals (REQUEST_TIMING); set by the HTTP middleware, shared with the
+# handler's worker thread through the copied context
+_request: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+def observe(stage: str, seconds: float):
+    if settings.metrics:
+        i = bisect_left(BUCKETS, seconds)
+        with _lock:
+            entry = _hist.get(stage)
+            if entry is None:
+                entry = _hist[stage] = ([0] * (len(BUCKETS) + 1), [0.0])
+            entry[0][i] += 1
+            entry[1][0] += seconds
+    timings = _request.get()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.t0)
+        return False
+
+
+class _Off:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_OFF = _Off()
+
+
+def stage(name: str):
+    # times a block into jobrec_stage_seconds{stage=name}; one shared no-op when nothing records
+    if not settings.metrics and _request.get() is None:
+        return _OFF
+    return _Stage(name)
+
+
+def timed(name: str):
+    # decorator form of stage() for whole functions
+    def wrap(fn):
+        @wraps(fn)
+        def inner(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def start_request() -> Tuple[Dict[str, float], object]:
+    timings: Dict[str, float] = {}
+    return timings, _request.set(timings)
+
+
+def end_request(token):
+    _request.reset(token)
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    # Server-Timing header value, durations in milliseconds
+    return ", ".join(f"{name};dur={1000 * seconds:.2f}" for name, seconds in timings.items())
+
+
+def reset():
+    with _lock:
+        _hist.clear()
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(samples: Iterable[Tuple[str, str, str, float]] = ()) -> str:
+    # Prometheus text exposition: the stage histogram plus (name, type, help, value) samples
+    lines = [
+        f"# HELP {_PREFIX}stage_seconds Time spent in each request or rebuild stage.",
+        f"# TYPE {_PREFIX}stage_seconds histogram",
+    ]
+    with _lock:
+        snapshot = {name: (list(counts), total[0]) for name, (counts, total) in _hist.items()}
+    for name in sorted(snapshot):
+        counts, total = snapshot[name]
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), counts):
+            cumulative += n
+            labels = f'stage="{name}",le="{_fmt(bound)}"'
+            lines.append(f"{_PREFIX}stage_seconds_bucket{{{labels}}} {cumulative}")
+        lines.append(f'{_PREFIX}stage_seconds_sum{{stage="{name}"}} {_fmt(total)}')
+        lines.append(f'{_PREFIX}stage_seconds_count{{stage="{name}"}} {cumulative}')
+    for name, kind, help_text, value in samples:
+        lines += [
+            f"# HELP {_PREFIX}{name} {help_text}",
+            f"# TYPE {_PREFIX}{name} {kind}",
+            f"{_PREFIX}{name} {_fmt(value)}",
+        ]
+    return "\n".join(lines) + "\n"
@@ -4,7 +4,10 @@ from io import BytesIO
 from docx import Document
 from PyPDF2 import PdfReader
 
+from . import metrics
 
+
+@metrics.timed("parse_file")
 def extract_text(filename: str, content: bytes) -> str:
     name = (filename or "").lower()
     if name.endswith(".pdf"):
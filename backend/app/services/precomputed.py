@@ -0,0 +1,73 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ..settings import settings
+
+
+# each thread keeps one connection per database path, as app.store does
+_local = threading.local()
+
+
+def _connect() -> sqlite3.Connection:
+    path = settings.precompute_db
+    conns = getattr(_local, "conns", None)
+    if conns is None or _local.pid != os.getpid():
+        # connections must not cross a fork; a child opens its own
+        conns = _local.conns = {}
+        _local.pid = os.getpid()
+    conn = conns.get(path)
+    if conn is None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = sqlite3.connect(path, timeout=10)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS recommendations ("
+            "version TEXT, mode TEXT, resume_id TEXT, k INTEGER, results TEXT, "
+            "PRIMARY KEY (version, mode, resume_id))"
+        )
+        conn.commit()
+        conns[path] = conn
+    return conn
+
+
+def get(version: str, mode: str, resume_id: str, k: int) -> Optional[List[Dict]]:
+    # None when there is no stored row for this version or it holds fewer than k results
+    if not os.path.exists(settings.precompute_db):
+        return None
+    try:
+        row = _connect().execute(
+            "SELECT k, results FROM recommendations WHERE version=? AND mode=? AND resume_id=?",
+            (version, mode, str(resume_id)),
+        ).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    stored_k, results = row
+    results = json.loads(results)
+    if k > stored_k and len(results) >= stored_k:
+        return None
+    return results[:k]
+
+
+def put_many(version: str, k: int, rows: Iterable[Tuple[str, str, List[Dict]]]):
+    # rows of (mode, resume_id, results)
+    with _connect() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO recommendations(version, mode, resume_id, k, results) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (version, mode, str(rid), k, json.dumps(results, default=str))
+                for mode, rid, results in rows
+            ],
+        )
+        conn.commit()
+
+
+def prune(keep_version: str) -> int:
+    with _connect() as conn:
+        cur = conn.execute("DELETE FROM recommendations WHERE version != ?", (keep_version,))
+        conn.commit()
+        return cur.rowcount
@@ -0,0 +1,56 @@
+import numpy as np
+
+
+# rows widened to float32 per step of a scan, bounds the temporary to a few MB
+_SCAN_BLOCK = 16384
+DTYPES = ("float32", "float16", "int8")
+
+
+class QuantizedVecs:
+    # compact copy of the job embeddings for the first-pass dot product: float16, or int8 with
+    # one symmetric scale per row (x ~= codes * scale, scale = max|x| / 127)
+
+    def __init__(self, codes: np.ndarray, scales: np.ndarray | None = None):
+        self.codes = codes
+        self.scales = scales
+        self.dtype = str(codes.dtype)
+
+    @classmethod
+    def build(cls, vecs: np.ndarray, dtype: str) -> "QuantizedVecs":
+        if dtype == "float16":
+            return cls(np.ascontiguousarray(vecs, dtype=np.float16))
+        if dtype != "int8":
+            raise ValueError(f"unsupported embedding dtype: {dtype}")
+        codes = np.empty(vecs.shape, dtype=np.int8)
+        scales = np.empty(len(vecs), dtype=np.float32)
+        for start in range(0, len(vecs), _SCAN_BLOCK):
+            block = np.asarray(vecs[start:start + _SCAN_BLOCK], dtype=np.float32)
+            s = np.abs(block).max(axis=1) / 127.0
+            s[s == 0] = 1.0
+            codes[start:start + len(block)] = np.rint(block / s[:, None])
+            scales[start:start + len(block)] = s
+        return cls(codes, scales)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def scores(self, query: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        # approximate codes @ query as float32, in the order of rows when given
+        return self.scores_many(query[None, :], rows)[0]
+
+    def scores_many(self, queries: np.ndarray, rows: np.ndarray | None = None) -> np.ndarray:
+        # (n_queries, n_rows) approximate dot products
+        codes = self.codes if rows is None else self.codes[rows]
+        scales = self.scales if self.scales is None or rows is None else self.scales[rows]
+        queries = np.asarray(queries, dtype=np.float32)
+        out = np.empty((len(queries), len(codes)), dtype=np.float32)
+        for start in range(0, len(codes), _SCAN_BLOCK):
+            block = codes[start:start + _SCAN_BLOCK].astype(np.float32)
+            out[:, start:start + len(block)] = queries @ block.T
+        if scales is not None:
+            out *= scales[None, :]
+        return out
@@ -1,35 +1,171 @@
+import dataclasses
+import hashlib
+import threading
+import time
 from typing import Dict, List
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
 
-from . import loader, skills as skills_svc, embeddings as emb
+from . import loader, skills as skills_svc, embeddings as emb, metrics, precomputed, job_index
+from . import snapshot, shards
+from .filter_index import JobFilter
+from .job_index import JobIndex
+from .quant import QuantizedVecs
+from .result_cache import ResultCache
 from ..settings import settings
-from ..store import Store
+from ..store import get_store
 
 
-_tfidf: TfidfVectorizer | None = None
-_job_matrix = None
-_job_index: List[str] = []
-_job_texts: List[str] = []
+# the published index snapshot; requests read this reference once and use only that snapshot
+_snap: JobIndex | None = None
+# bumped on every publish so results computed against older snapshots can never be served
+_generation = 0
+# fully scored arrays per (profile|resume, mode, persona, retrieval, version); any k slices one
+# entry
+_results = ResultCache(settings.result_cache_mb * 1024 * 1024, settings.result_cache_ttl)
+# one build at a time; readers never take it
+_build_lock = threading.Lock()
+_status: Dict = {
+    "state": "idle", "kind": None, "stage": "", "progress": 0.0, "error": None, "last": None,
+}
+
+
+def _progress(stage: str, fraction: float):
+    _status.update(stage=stage, progress=fraction)
+
+
+def _publish(snap: JobIndex) -> JobIndex:
+    global _snap, _generation
+    _generation += 1
+    snap = dataclasses.replace(snap, generation=_generation)
+    _snap = snap
+    _results.clear()
+    return snap
+
+
+def _finish(summary: Dict, started: float):
+    now = time.time()
+    _status.update(
+        state="idle", stage="", last=summary, finished_at=now, build_seconds=now - started
+    )
+
+
+def _build(reload: bool, incremental: bool) -> Dict:
+    # builds a complete snapshot off to the side, then publishes loader frames and index together
+    started = time.time()
+    kind = "delta" if incremental else "full"
+    _status.update(state="building", kind=kind, error=None, started_at=started)
+    _progress("load", 0.0)
+    try:
+        if reload:
+            jobs_df, resumes_df, meta = loader.load_all()
+            version = loader.data_version(meta)
+        else:
+            jobs_df, _ = loader.get_jobs()
+            version = loader.data_version()
+        old = _snap
+        if incremental and old is not None:
+            snap, summary = job_index.refresh(old, jobs_df, version, _progress)
+        else:
+            snap = job_index.build(jobs_df, version, _progress)
+            summary = {"refit": True, "jobs": len(snap)}
+        _progress("publish", 1.0)
+        if reload:
+            loader.publish(jobs_df, resumes_df, meta)
+        snap = _publish(snap)
+    except Exception as e:
+        _status.update(state="failed", error=repr(e), finished_at=time.time())
+        raise
+    summary = {**summary, "version": snap.version, "generation": snap.generation}
+    _finish(summary, started)
+    metrics.observe("index_build", _status["build_seconds"])
+    return summary
+
+
+def _load_snapshot() -> bool:
+    # cold start from the artifact written by `python -m app.build_snapshot`: no jobs CSV parse,
+    # no TF-IDF fit, no embedding cache reads; arrays stay memory-mapped
+    path = snapshot.current_path()
+    if path is None:
+        return False
+    started = time.time()
+    try:
+        manifest = snapshot.read_manifest(path)
+        if not snapshot.matches_sources(manifest):
+            return False
+        snap = snapshot.load(path, manifest)
+        resumes_meta = loader.publish_with_jobs(snap.jobs_df, manifest["sources"]["jobs"])
+        built_from = manifest["sources"]["resumes"].get("version", "none")
+        if resumes_meta.get("version", "none") != built_from:
+            loader.publish(None, None, {})
+            return False
+    except Exception as e:
+        _status.update(error=f"snapshot {path}: {e!r}")
+        return False
+    snap = _publish(snap)
+    summary = {
+        "source": "snapshot", "path": path, "jobs": len(snap),
+        "version": snap.version, "generation": snap.generation,
+    }
+    _finish(summary, started)
+    metrics.observe("snapshot_load", _status["build_seconds"])
+    return True
 
 
 def rebuild_caches():
-    global _tfidf, _job_matrix, _job_index, _job_texts
-    jobs_df, _ = loader.get_jobs()
-    if jobs_df is None or len(jobs_df) == 0:
-        _tfidf = None
-        _job_matrix = None
-        _job_index = []
-        _job_texts = []
-        return
-    _job_texts = [loader.build_job_text(r) for _, r in jobs_df.iterrows()]
-    _job_index = [str(r.get("job_id", i)) for i, r in jobs_df.iterrows()]
-    _tfidf = TfidfVectorizer(max_features=50000, ngram_range=(1, 2))
-    _job_matrix = _tfidf.fit_transform(_job_texts)
-    # warm embedding cache
-    emb.get_embeddings(_job_texts)
+    # synchronous full rebuild from the loader's current frames
+    with _build_lock:
+        _build(reload=False, incremental=False)
+
+
+def refresh_caches() -> Dict:
+    # synchronous incremental update from the loader's current frames
+    with _build_lock:
+        return _build(reload=False, incremental=True)
+
+
+def start_rebuild(incremental: bool = False, wait: bool = False) -> Dict:
+    # re-reads the CSVs and rebuilds on a background thread; the current snapshot keeps serving
+    if not _build_lock.acquire(blocking=False):
+        return {"started": False, **index_status()}
+
+    def run():
+        try:
+            _build(reload=True, incremental=incremental)
+        except Exception:
+            pass  # recorded in _status
+        finally:
+            _build_lock.release()
+
+    thread = threading.Thread(target=run, name="index-rebuild", daemon=True)
+    thread.start()
+    if wait:
+        thread.join()
+    return {"started": True, **index_status()}
+
+
+def index_status() -> Dict:
+    snap = _snap
+    return {
+        **_status,
+        "active_version": snap.version if snap else None,
+        "active_generation": snap.generation if snap else 0,
+        "active_jobs": len(snap) if snap else 0,
+        "active_built_at": snap.built_at if snap else None,
+    }
+
+
+def current_index() -> JobIndex:
+    snap = _snap
+    if snap is None:
+        if _build_lock.acquire(timeout=600):
+            try:
+                if _snap is None and not _load_snapshot():
+                    _build(reload=False, incremental=False)
+            finally:
+                _build_lock.release()
+        snap = _snap
+    return snap
 
 
 def _persona_weights(persona: str) -> Dict[str, float]:
@@ -60,66 +196,173 @@ def _exp_alignment(job_title: str, persona: str) -> float:
     return 0.7
 
 
+def _exp_vector(snap: JobIndex, persona: str) -> np.ndarray:
+    # per-job experience alignment for a persona, computed once per snapshot; keyed by the
+    # per-bucket weights, so arbitrary persona strings share the few distinct vectors
+    key = tuple(_exp_alignment(t, persona) for t in job_index.EXP_BUCKET_TITLES)
+    vec = snap.exp_cache.get(key)
+    if vec is None:
+        vec = np.array(key)[snap.exp_bucket]
+        snap.exp_cache[key] = vec
+    return vec
+
+
 def _get_resume_text_and_skills_by_resume_id(resume_id: str):
-    resumes = loader.get_resumes_df()
-    if resumes is None:
+    r = loader.get_resume(resume_id)
+    if r is None:
         return "", []
-    row = resumes[resumes["resume_id"].astype(str) == str(resume_id)]
-    if row.empty:
-        return "", []
-    r = row.iloc[0]
     text = str(r.get("summary", r.get("fulltext", "")))
     skills = []
     for col in ["clean_skills", "parsed_skills"]:
         if col in r and r[col]:
             skills += skills_svc.parse_skills(str(r[col]))
     if not skills:
-        skills = skills_svc.extract_skills(text)
+        skills = skills_svc.extract_skills(text, skill_matcher())
     return text, skills
 
 
+def skill_matcher():
+    # the current catalog's compiled matcher when SKILL_EXTRACTOR=vocab (builds the index if needed)
+    if settings.skill_extractor != "vocab":
+        return None
+    return current_index().matcher
+
+
 def _profile_text(profile: Dict) -> str:
     skills = ", ".join(profile.get("skills", []))
     persona = profile.get("persona", "")
     return " \n".join([profile.get("summary", ""), skills, persona])
 
 
-def _compute_components(profile_text: str, profile_skills: List[str]) -> Dict[str, np.ndarray]:
-    global _tfidf, _job_matrix, _job_texts
-    if _tfidf is None:
-        rebuild_caches()
+def job_skills(position: int, snap: JobIndex | None = None) -> List[str]:
+    # normalized skills of the job at this snapshot position, served from the skill index
+    snap = snap or current_index()
+    return snap.skills.job_skills(position) if snap.skills is not None else []
+
+
+def _profile_vec(snap: JobIndex, profile_text: str) -> np.ndarray:
+    if not profile_text:
+        return np.zeros(snap.vecs.shape[1], dtype=np.float32)
+    with metrics.stage("profile_encode"):
+        return emb.encode_one(profile_text)
+
+
+def _candidate_rows(
+    snap: JobIndex, prof_vec: np.ndarray, retrieval: str | None = None
+) -> np.ndarray | None:
+    # first stage of ANN retrieval; None means score every job exactly
+    retrieval = retrieval or settings.retrieval_mode
+    if retrieval != "ann":
+        return None
+    with metrics.stage("retrieval"):
+        ann = snap.ann_index()
+        if ann is None:
+            return None
+        return np.sort(ann.search(prof_vec, settings.ann_candidates, settings.ann_nprobe))
+
+
+def _lexical_rows(
+    snap: JobIndex, profile_text: str, retrieval: str | None = None
+) -> np.ndarray | None:
+    # baseline counterpart of _candidate_rows: top LEXICAL_CANDIDATES jobs by the inverted index,
+    # touching only the query terms' postings; None (score every job) when no term is in the
+    # vocabulary
+    retrieval = retrieval or settings.retrieval_mode
+    if retrieval != "ann":
+        return None
+    with metrics.stage("retrieval"):
+        lexical = snap.lexical_index()
+        if lexical is None:
+            return None
+        query = snap.tfidf.transform([profile_text])
+        rows, _ = lexical.top_k(query, settings.lexical_candidates)
+    return np.sort(rows) if len(rows) else None
+
+
+def _embed_scores(
+    snap: JobIndex, prof_vec: np.ndarray, rows: np.ndarray | None = None, rescore: int | None = None
+) -> np.ndarray:
+    # float32 dot product, or a quantized first pass whose best `rescore` rows are recomputed in
+    # float32
+    if snap.qvecs is None:
+        job_vecs = snap.vecs if rows is None else snap.vecs[rows]
+        return job_vecs @ prof_vec
+    approx = snap.qvecs.scores(prof_vec, rows)
+    n = min(settings.embed_rescore if rescore is None else rescore, len(approx))
+    if n > 0:
+        top = np.sort(np.argpartition(-approx, n - 1)[:n])
+        approx[top] = snap.vecs[top if rows is None else rows[top]] @ prof_vec
+    return approx
+
+
+def _compute_components(
+    profile_text: str,
+    profile_skills: List[str],
+    rows: np.ndarray | None = None,
+    prof_vec: np.ndarray | None = None,
+    snap: JobIndex | None = None,
+    keep: tuple = ("tfidf", "embed", "skill", "kw"),
+) -> Dict[str, np.ndarray]:
+    # rows restricts scoring to a candidate subset (snapshot positions); arrays follow its order;
+    # only the components in keep are computed
+    snap = snap or current_index()
     components: Dict[str, np.ndarray] = {}
-    if _tfidf is not None and _job_matrix is not None:
-        v = _tfidf.transform([profile_text])
-        components["tfidf"] = cosine_similarity(v, _job_matrix).ravel()
+    if "tfidf" in keep and snap.tfidf is not None and snap.matrix is not None:
+        from sklearn.metrics.pairwise import cosine_similarity
+        with metrics.stage("tfidf"):
+            v = snap.tfidf.transform([profile_text])
+            job_matrix = snap.matrix if rows is None else snap.matrix[rows]
+            components["tfidf"] = cosine_similarity(v, job_matrix).ravel()
     # embeddings
-    job_vecs = emb.get_embeddings(_job_texts) if _job_texts else np.zeros((0, 384))
-    prof_vec = emb.get_embeddings([profile_text]) if profile_text else np.zeros((1, 384))
-    if len(job_vecs) > 0:
-        sim = (job_vecs @ prof_vec.T).ravel()
-        components["embed"] = sim
-    # skill overlap
-    jobs_df, _ = loader.get_jobs()
-    overlaps = []
-    ps = set(profile_skills)
-    for _, row in jobs_df.iterrows():
-        js = set(skills_svc.parse_skills(row.get("clean_skills", "")))
-        inter = len(ps & js)
-        union = len(ps | js) if (ps or js) else 1
-        overlaps.append(inter / union)
-    components["skill"] = np.array(overlaps, dtype=float)
+    if "embed" in keep and snap.vecs is not None and len(snap.vecs) > 0:
+        if prof_vec is None:
+            prof_vec = _profile_vec(snap, profile_text)
+        with metrics.stage("embed"):
+            components["embed"] = _embed_scores(snap, prof_vec, rows)
+    # skill overlap (Jaccard via one sparse mat-vec)
+    if "skill" in keep and snap.skills is not None:
+        with metrics.stage("skill"):
+            components["skill"] = snap.skills.jaccard(profile_skills, rows)
+    if "kw" not in keep:
+        return components
     # keyword fuzz
-    kw = []
-    for jt in _job_texts:
-        kw.append(fuzz.token_set_ratio(profile_text, jt) / 100.0)
-    components["kw"] = np.array(kw, dtype=float)
+    with metrics.stage("kw"):
+        positions = np.arange(len(snap)) if rows is None else rows
+        n_fuzz = settings.kw_candidates
+        if n_fuzz and len(positions) > n_fuzz and components:
+            # fuzz only the best candidates by the cheaper components; the rest keep kw=0
+            pre = sum(components.values())
+            top = np.argpartition(-pre, n_fuzz - 1)[:n_fuzz]
+            kw = np.zeros(len(positions), dtype=float)
+            kw[top] = _fuzz_scores(profile_text, [snap.texts[i] for i in positions[top]])
+        else:
+            texts = snap.texts if rows is None else [snap.texts[i] for i in rows]
+            kw = _fuzz_scores(profile_text, texts)
+    components["kw"] = kw
     return components
 
 
-def _score_components(components: Dict[str, np.ndarray], jobs_df, persona: str) -> Dict[str, np.ndarray]:
+def _fuzz_scores(profile_text: str, texts: List[str]) -> np.ndarray:
+    # same values as fuzz.token_set_ratio(profile_text, jt) / 100.0 per job, batched and
+    # multi-threaded
+    if len(texts) == 0:
+        return np.zeros(0, dtype=float)
+    scores = process.cdist(
+        [profile_text], texts,
+        scorer=fuzz.token_set_ratio, dtype=np.float64, workers=settings.kw_workers,
+    )
+    return scores[0] / 100.0
+
+
+@metrics.timed("score")
+def _score_components(
+    components: Dict[str, np.ndarray], snap: JobIndex, persona: str, rows: np.ndarray | None = None
+) -> Dict[str, np.ndarray]:
     w = _persona_weights(persona)
-    n = len(jobs_df)
-    exp = np.array([_exp_alignment(jobs_df.iloc[i].get("title", ""), persona) for i in range(n)])
+    n = len(snap) if rows is None else len(rows)
+    exp = _exp_vector(snap, persona)
+    if rows is not None:
+        exp = exp[rows]
     embed_sim = components.get("embed", np.zeros(n))
     skill_overlap = components.get("skill", np.zeros(n))
     keyword_overlap = components.get("kw", np.zeros(n))
@@ -136,85 +379,454 @@ def _score_components(components: Dict[str, np.ndarray], jobs_df, persona: str)
     }
 
 
-def _format_results(scores: Dict[str, np.ndarray], jobs_df, k: int) -> List[Dict]:
-    order = np.argsort(-scores["final"], kind="stable")[:k]
+def _top_k(final: np.ndarray, k: int) -> np.ndarray:
+    # same order as np.argsort(-final, kind="stable")[:k] without sorting every job
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if k >= len(final):
+        return np.argsort(-final, kind="stable")[:k]
+    kth = final[np.argpartition(-final, k - 1)[:k]].min()
+    cand = np.flatnonzero(final >= kth)
+    return cand[np.argsort(-final[cand], kind="stable")][:k]
+
+
+@metrics.timed("format")
+def _format_results(
+    scores: Dict[str, np.ndarray], snap: JobIndex, k: int, rows: np.ndarray | None = None
+) -> List[Dict]:
     out = []
-    for idx in order:
-        row = jobs_df.iloc[idx]
-        jid = str(row.get("job_id", _job_index[idx] if idx < len(_job_index) else idx))
+    for pos in _top_k(scores["final"], k):
+        idx = pos if rows is None else int(rows[pos])
+        jid = snap.ids[idx]
         out.append({
             "job_id": jid,
             "jobId": jid,
-            "title": row.get("title", ""),
-            "experience_level": row.get("experience_level", ""),
-            "score": float(scores["final"][idx]),
+            "title": snap.titles[idx],
+            "experience_level": snap.levels[idx],
+            "score": float(scores["final"][pos]),
             "breakdown": {
-                "embed": float(scores["embed"][idx]),
-                "skill": float(scores["skill"][idx]),
-                "exp": float(scores["exp"][idx]),
-                "kw": float(scores["kw"][idx]),
+                "embed": float(scores["embed"][pos]),
+                "skill": float(scores["skill"][pos]),
+                "exp": float(scores["exp"][pos]),
+                "kw": float(scores["kw"][pos]),
             },
         })
     return out
 
 
-def recommend_for_profile(profile_id: str, k: int = 10, mode: str = None) -> List[Dict]:
+def _filter_rows(snap: JobIndex, filt: JobFilter | None) -> np.ndarray | None:
+    if filt is None or snap.filters is None:
+        return None
+    with metrics.stage("filter"):
+        return snap.filters.rows(filt)
+
+
+def _rank(
+    snap: JobIndex,
+    text: str,
+    skills: List[str],
+    persona: str,
+    mode: str,
+    retrieval: str | None = None,
+    filt: JobFilter | None = None,
+):
+    # shared scoring path: the jobs passing filt (scored exactly), or optional ANN / inverted-index
+    # candidate retrieval; then the hybrid rescoring of that pool
+    rows = _filter_rows(snap, filt)
+    if rows is not None and len(rows) == 0:
+        return {name: np.zeros(0) for name in ("final", "embed", "skill", "exp", "kw")}, rows
+    prof_vec = None
+    if rows is None and mode == "baseline":
+        rows = _lexical_rows(snap, text, retrieval)
+    elif rows is None and snap.vecs is not None and len(snap.vecs) > 0:
+        prof_vec = _profile_vec(snap, text)
+        rows = _candidate_rows(snap, prof_vec, retrieval)
+    keep = _MODE_COMPONENTS.get(mode, _ALL_COMPONENTS)
+    comps = _compute_components(text, skills, rows=rows, prof_vec=prof_vec, snap=snap, keep=keep)
+    return _score_components(comps, snap, persona, rows=rows), rows
+
+
+# components each non-hybrid mode keeps; hybrid uses all of them
+_MODE_COMPONENTS = {"baseline": ("tfidf", "kw"), "embed": ("embed",)}
+_ALL_COMPONENTS = ("tfidf", "embed", "skill", "kw")
+
+
+def scoring_version(snap: JobIndex | None = None, retrieval: str | None = None) -> str:
+    # identifies the data, model, retrieval and scoring knobs a stored result was computed under
+    snap = snap or current_index()
+    retrieval = retrieval or settings.retrieval_mode
+    parts = [
+        snap.version, settings.model_name, str(settings.kw_candidates), retrieval,
+        settings.default_persona, settings.skill_extractor,
+    ]
+    if snap.qvecs is not None:
+        parts += [snap.qvecs.dtype, str(settings.embed_rescore)]
+    if retrieval == "ann":
+        parts += [
+            str(settings.ann_candidates), str(settings.ann_nprobe),
+            settings.lexical_scorer, str(settings.lexical_candidates),
+        ]
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def _results_key(
+    snap: JobIndex,
+    kind: str,
+    ident: str,
+    mode: str,
+    persona: str,
+    retrieval: str | None,
+    depth: int | None = None,
+    filt: JobFilter | None = None,
+) -> tuple:
+    # depth: rows per shard of a sharded result, which only holds each shard's top rows
+    retrieval = retrieval or settings.retrieval_mode
+    version = scoring_version(snap, retrieval)
+    return (kind, str(ident), mode, persona, retrieval, version, snap.generation, depth, filt)
+
+
+def _rank_request(
+    snap: JobIndex,
+    text: str,
+    skills: List[str],
+    persona: str,
+    mode: str,
+    retrieval: str | None,
+    depth: int | None,
+    filt: JobFilter | None = None,
+):
+    # request path: scatter-gather over the shard workers when shards.depth allowed it, else _rank
+    if depth is not None:
+        keep = _MODE_COMPONENTS.get(mode, _ALL_COMPONENTS)
+        prof_vec = _profile_vec(snap, text) if "embed" in keep and snap.vecs is not None else None
+        with metrics.stage("shards"):
+            out = shards.rank(snap, text, skills, persona, keep, prof_vec, depth)
+        if out is not None:
+            return out
+    return _rank(snap, text, skills, persona, mode, retrieval, filt)
+
+
+def _cache_results(key: tuple, scores: Dict[str, np.ndarray], rows: np.ndarray | None):
+    nbytes = sum(v.nbytes for v in scores.values()) + (rows.nbytes if rows is not None else 0)
+    _results.put(key, (scores, rows), nbytes)
+
+
+def recommend_for_profile(
+    profile_id: str,
+    k: int = 10,
+    mode: str = None,
+    retrieval: str = None,
+    filt: JobFilter | None = None,
+    profile: Dict | None = None,
+    snap: JobIndex | None = None,
+) -> List[Dict]:
+    # profile / snap: already loaded by the caller (recommend_with_gaps), so both halves agree
     mode = mode or settings.default_mode
-    profile = Store().get_profile(profile_id)
+    if profile is None:
+        with metrics.stage("profile_fetch"):
+            profile = get_store().get_profile(profile_id)
     if not profile:
         return []
-    jobs_df, _ = loader.get_jobs()
-    if jobs_df is None or len(jobs_df) == 0:
+    snap = snap or current_index()
+    if len(snap) == 0:
         return []
-    text = _profile_text(profile)
-    comps = _compute_components(text, profile.get("skills", []))
-    # If a specific mode is requested, override weights
-    if mode == "baseline":
-        comps = {k: v for k, v in comps.items() if k in ("tfidf", "kw")}
-    elif mode == "embed":
-        comps = {k: v for k, v in comps.items() if k in ("embed",)}
-    scores = _score_components(comps, jobs_df, profile.get("persona", settings.default_persona))
-    return _format_results(scores, jobs_df, k)
-
-
-def recommend_for_resume_id(resume_id: str, k: int = 10, mode: str = None) -> List[Dict]:
+    persona = profile.get("persona", settings.default_persona)
+    depth = shards.depth(snap, mode, retrieval, k) if filt is None else None
+    key = _results_key(snap, "profile", profile_id, mode, persona, retrieval, depth, filt)
+    cached = _results.get(key)
+    if cached is None:
+        text = _profile_text(profile)
+        skills = profile.get("skills", [])
+        scores, rows = _rank_request(snap, text, skills, persona, mode, retrieval, depth, filt)
+        _cache_results(key, scores, rows)
+    else:
+        scores, rows = cached
+    return _format_results(scores, snap, k, rows=rows)
+
+
+def recommend_for_resume_id(
+    resume_id: str,
+    k: int = 10,
+    mode: str = None,
+    retrieval: str = None,
+    filt: JobFilter | None = None,
+    resume: tuple | None = None,
+    snap: JobIndex | None = None,
+) -> List[Dict]:
+    # resume: (text, skills) already loaded by the caller
     mode = mode or settings.default_mode
-    text, skills = _get_resume_text_and_skills_by_resume_id(resume_id)
-    if not text:
+    snap = snap or current_index()
+    if filt is None:
+        # rows are stored under the retrieval they were scored with (exact), so ANN requests miss
+        stored = precomputed.get(scoring_version(snap, retrieval), mode, resume_id, k)
+        if stored is not None:
+            return stored
+    if len(snap) == 0:
         return []
-    jobs_df, _ = loader.get_jobs()
-    if jobs_df is None or len(jobs_df) == 0:
-        return []
-    comps = _compute_components(text, skills)
-    if mode == "baseline":
-        comps = {k: v for k, v in comps.items() if k in ("tfidf", "kw")}
-    elif mode == "embed":
-        comps = {k: v for k, v in comps.items() if k in ("embed",)}
-    scores = _score_components(comps, jobs_df, settings.default_persona)
-    return _format_results(scores, jobs_df, k)
+    depth = shards.depth(snap, mode, retrieval, k) if filt is None else None
+    persona = settings.default_persona
+    key = _results_key(snap, "resume", resume_id, mode, persona, retrieval, depth, filt)
+    cached = _results.get(key)
+    if cached is None:
+        if resume is None:
+            with metrics.stage("profile_fetch"):
+                resume = _get_resume_text_and_skills_by_resume_id(resume_id)
+        text, skills = resume
+        if not text:
+            return []
+        scores, rows = _rank_request(snap, text, skills, persona, mode, retrieval, depth, filt)
+        _cache_results(key, scores, rows)
+    else:
+        scores, rows = cached
+    return _format_results(scores, snap, k, rows=rows)
+
+
+def cache_stats() -> Dict:
+    return {
+        **_results.stats(),
+        "generation": _generation,
+        "embed_batcher": emb.batcher_stats(),
+        "shards": shards.stats(),
+    }
+
+
+def metric_samples() -> List[tuple]:
+    # (name, type, help, value) for GET /metrics, next to the stage histograms
+    status = index_status()
+    results = _results.stats()
+    c = emb.counters()
+    return [
+        ("catalog_jobs", "gauge", "Jobs in the serving index.", status["active_jobs"]),
+        ("index_generation", "gauge", "Index publishes since the process started.",
+         status["active_generation"]),
+        ("index_build_last_seconds", "gauge", "Duration of the last index build or snapshot load.",
+         status.get("build_seconds", 0.0)),
+        ("embedding_cache_hits_total", "counter", "Texts found in the embedding cache.", c["hits"]),
+        ("embedding_cache_misses_total", "counter", "Texts missing from the embedding cache.",
+         c["misses"]),
+        ("embedding_encoded_total", "counter", "Texts encoded by the model.", c["encoded"]),
+        ("embedding_evicted_total", "counter", "Profile vectors evicted from the embedding cache.",
+         c["evicted"]),
+        ("result_cache_hits_total", "counter", "Scored-array cache hits.", results["hits"]),
+        ("result_cache_misses_total", "counter", "Scored-array cache misses.", results["misses"]),
+        ("result_cache_bytes", "gauge", "Bytes held by the scored-array cache.", results["bytes"]),
+    ]
+
+
+@metrics.timed("batch_components")
+def _batch_components(
+    snap: JobIndex,
+    texts: List[str],
+    skill_lists: List[List[str]],
+    mode: str,
+    rows: np.ndarray | None = None,
+) -> Dict[str, np.ndarray]:
+    # (n_profiles, n_jobs) component matrices, only for the components the mode uses; rows
+    # restricts the jobs
+    keep = _MODE_COMPONENTS.get(mode, _ALL_COMPONENTS)
+    components: Dict[str, np.ndarray] = {}
+    if "tfidf" in keep and snap.tfidf is not None and snap.matrix is not None:
+        from sklearn.metrics.pairwise import cosine_similarity
+        matrix = snap.matrix if rows is None else snap.matrix[rows]
+        components["tfidf"] = cosine_similarity(snap.tfidf.transform(texts), matrix)
+    if "embed" in keep and snap.vecs is not None and len(snap.vecs) > 0:
+        # one encode batch for every cache miss in the chunk
+        prof_vecs = emb.get_embeddings(texts)
+        if snap.qvecs is None:
+            components["embed"] = prof_vecs @ (snap.vecs if rows is None else snap.vecs[rows]).T
+        else:
+            components["embed"] = np.stack([_embed_scores(snap, v, rows) for v in prof_vecs])
+    if "skill" in keep and snap.skills is not None:
+        components["skill"] = snap.skills.jaccard_many(skill_lists, rows)
+    if "kw" in keep:
+        job_texts = snap.texts if rows is None else [snap.texts[j] for j in rows]
+        n_fuzz = settings.kw_candidates
+        if n_fuzz and len(job_texts) > n_fuzz and components:
+            pre = sum(components.values())
+            kw = np.zeros((len(texts), len(job_texts)), dtype=float)
+            for i, text in enumerate(texts):
+                top = np.argpartition(-pre[i], n_fuzz - 1)[:n_fuzz]
+                kw[i, top] = _fuzz_scores(text, [job_texts[j] for j in top])
+        else:
+            kw = process.cdist(
+                texts, job_texts,
+                scorer=fuzz.token_set_ratio, dtype=np.float64, workers=settings.kw_workers,
+            ) / 100.0
+        components["kw"] = kw
+    return components
+
+
+def recommend_many(
+    resume_ids: List[str] | None = None,
+    profile_ids: List[str] | None = None,
+    k: int = 10,
+    mode: str = None,
+    filt: JobFilter | None = None,
+) -> List[Dict]:
+    # batch scoring for many profiles: profile x job matrix products, chunked to bound memory
+    mode = mode or settings.default_mode
+    snap = current_index()
+    rows = _filter_rows(snap, filt)
+    queries = []
+    for rid in resume_ids or []:
+        text, skills = _get_resume_text_and_skills_by_resume_id(rid)
+        queries.append(({"resume_id": rid}, text, skills, settings.default_persona))
+    profiles = get_store().get_profiles(profile_ids or [])
+    for pid in profile_ids or []:
+        profile = profiles.get(str(pid))
+        if profile:
+            persona = profile.get("persona", settings.default_persona)
+            text = _profile_text(profile)
+            queries.append(({"profile_id": pid}, text, profile.get("skills", []), persona))
+        else:
+            queries.append(({"profile_id": pid}, "", [], settings.default_persona))
+    out: List[Dict] = []
+    scorable = len(snap) > 0 and (rows is None or len(rows) > 0)
+    chunk = max(1, settings.batch_chunk)
+    for start in range(0, len(queries), chunk):
+        part = queries[start:start + chunk]
+        live = [i for i, q in enumerate(part) if q[1]] if scorable else []
+        comps = {}
+        if live:
+            texts = [part[i][1] for i in live]
+            comps = _batch_components(snap, texts, [part[i][2] for i in live], mode, rows)
+        results: Dict[int, List[Dict]] = {}
+        for j, i in enumerate(live):
+            row_comps = {name: m[j] for name, m in comps.items()}
+            scores = _score_components(row_comps, snap, part[i][3], rows=rows)
+            results[i] = _format_results(scores, snap, k, rows=rows)
+        for i, (key, _, _, _) in enumerate(part):
+            out.append({**key, "results": results.get(i, [])})
+    return out
 
 
 def offline_eval(mode: str = None, k: int = 10) -> Dict[str, float]:
     # synthetic evaluation (no labels): compute diversity and self-consistency
     mode = mode or settings.default_mode
-    jobs_df, _ = loader.get_jobs()
+    snap = current_index()
     resumes = loader.get_resumes_df()
-    if jobs_df is None or resumes is None or len(resumes) == 0:
+    if len(snap) == 0 or resumes is None or len(resumes) == 0:
         return {"precision@k": 0.0, "recall@k": 0.0, "ndcg@k": 0.0}
     # Use profile built from each resume and compute average top-k similarity > threshold as proxy precision
     sims = []
     for _, r in resumes.head(20).iterrows():
         text = str(r.get("summary", r.get("fulltext", "")))
         skills = skills_svc.parse_skills(str(r.get("clean_skills", "")))
-        comps = _compute_components(text, skills)
-        if mode == "baseline":
-            comps = {k: v for k, v in comps.items() if k in ("tfidf", "kw")}
-        elif mode == "embed":
-            comps = {k: v for k, v in comps.items() if k in ("embed",)}
-        scores = _score_components(comps, jobs_df, settings.default_persona)
+        scores, _ = _rank(snap, text, skills, settings.default_persona, mode)
         topk = np.sort(scores["final"])[-k:]
         sims.append(float(np.mean(topk)))
     avg = float(np.mean(sims)) if sims else 0.0
     return {"precision@k": avg, "recall@k": avg, "ndcg@k": avg}
 
 
+def _eval_queries(snap: JobIndex, n: int) -> List[tuple]:
+    # demo resumes when present, else a deterministic sample of job postings as pseudo-profiles
+    resumes = loader.get_resumes_df()
+    if resumes is not None and len(resumes) > 0:
+        return [
+            (
+                str(r.get("summary", r.get("fulltext", ""))),
+                skills_svc.parse_skills(str(r.get("clean_skills", ""))),
+            )
+            for _, r in resumes.head(n).iterrows()
+        ]
+    if len(snap) == 0:
+        return []
+    picks = np.linspace(0, len(snap) - 1, num=min(n, len(snap))).astype(int)
+    return [(snap.texts[i], snap.skills.job_skills(int(i))) for i in picks]
+
+
+def ann_recall_report(k: int = 10, n_queries: int = 20, mode: str = None) -> Dict:
+    # overlap of the ANN path's top-k with exact scoring; baseline draws its pool from the inverted
+    # index
+    mode = mode or settings.default_mode
+    snap = current_index()
+    baseline = mode == "baseline"
+    ann = None if baseline else snap.ann_index()
+    if (snap.lexical_index() if baseline else ann) is None:
+        return {
+            "queries": 0, "k": k, "mode": mode,
+            "recall@k": 0.0, "embed_recall@k": 0.0, "ann_enabled": False,
+        }
+    final_recalls, embed_recalls = [], []
+    for text, skills in _eval_queries(snap, n_queries):
+        exact, _ = _rank(snap, text, skills, settings.default_persona, mode, retrieval="exact")
+        approx, rows = _rank(snap, text, skills, settings.default_persona, mode, retrieval="ann")
+        if rows is None:
+            rows = np.arange(len(snap))
+        top_exact = set(_top_k(exact["final"], k).tolist())
+        top_approx = set(rows[_top_k(approx["final"], k)].tolist())
+        final_recalls.append(len(top_exact & top_approx) / max(1, len(top_exact)))
+        top_embed = set(_top_k(exact["kw" if baseline else "embed"], k).tolist())
+        embed_recalls.append(len(top_embed & set(rows.tolist())) / max(1, len(top_embed)))
+    return {
+        "queries": len(final_recalls),
+        "k": k,
+        "mode": mode,
+        "candidates": settings.lexical_candidates if baseline else settings.ann_candidates,
+        "nprobe": settings.ann_nprobe,
+        "lists": len(ann.lists) if ann is not None else 0,
+        "lexical_scorer": settings.lexical_scorer if baseline else None,
+        "recall@k": float(np.mean(final_recalls)) if final_recalls else 0.0,
+        "embed_recall@k": float(np.mean(embed_recalls)) if embed_recalls else 0.0,
+        "ann_enabled": True,
+    }
+
+
+def _ndcg(ref: np.ndarray, ref_top: np.ndarray, got_top: np.ndarray) -> float:
+    # graded by the float32 scores: DCG of the approximate top-k over DCG of the exact one
+    discounts = 1.0 / np.log2(np.arange(2, len(ref_top) + 2))
+    ideal = float(np.sum(ref[ref_top] * discounts))
+    return float(np.sum(ref[got_top] * discounts[:len(got_top)])) / ideal if ideal > 0 else 1.0
+
+
+def quant_report(k: int = 10, n_queries: int = 20, mode: str = None) -> Dict:
+    # memory and ranking agreement of float16/int8 job embeddings against float32, exact retrieval
+    mode = mode or settings.default_mode
+    snap = current_index()
+    if snap.vecs is None or len(snap.vecs) == 0:
+        return {"queries": 0, "k": k, "mode": mode}
+    ref_snap = dataclasses.replace(snap, qvecs=None)
+    variants = {
+        dtype: dataclasses.replace(snap, qvecs=QuantizedVecs.build(snap.vecs, dtype))
+        for dtype in ("float16", "int8")
+    }
+    f32_bytes = len(snap.vecs) * snap.vecs.shape[1] * 4
+    acc = {
+        dtype: {"overlap": [], "ndcg": [], "embed_overlap": [], "embed_overlap_no_rescore": []}
+        for dtype in variants
+    }
+    queries = _eval_queries(snap, n_queries)
+    for text, skills in queries:
+        prof_vec = _profile_vec(snap, text)
+        ref, _ = _rank(ref_snap, text, skills, settings.default_persona, mode, retrieval="exact")
+        ref_top = _top_k(ref["final"], k)
+        ref_embed = set(_top_k(_embed_scores(ref_snap, prof_vec), k).tolist())
+        for dtype, qsnap in variants.items():
+            got, _ = _rank(qsnap, text, skills, settings.default_persona, mode, retrieval="exact")
+            got_top = _top_k(got["final"], k)
+            a = acc[dtype]
+            shared = set(ref_top.tolist()) & set(got_top.tolist())
+            a["overlap"].append(len(shared) / max(1, len(ref_top)))
+            a["ndcg"].append(_ndcg(ref["final"], ref_top, got_top))
+            for key, rescore in (("embed_overlap", None), ("embed_overlap_no_rescore", 0)):
+                top = set(_top_k(_embed_scores(qsnap, prof_vec, rescore=rescore), k).tolist())
+                a[key].append(len(ref_embed & top) / max(1, len(ref_embed)))
+    report = {
+        "queries": len(queries),
+        "k": k,
+        "mode": mode,
+        "jobs": len(snap),
+        "rescore": settings.embed_rescore,
+        "active_dtype": snap.qvecs.dtype if snap.qvecs is not None else "float32",
+        "float32_bytes": f32_bytes,
+    }
+    for dtype, qsnap in variants.items():
+        a = acc[dtype]
+        report[dtype] = {
+            "bytes": qsnap.qvecs.nbytes,
+            "saved_bytes": f32_bytes - qsnap.qvecs.nbytes,
+            "saved_fraction": 1.0 - qsnap.qvecs.nbytes / f32_bytes,
+            **{f"{key}@k": float(np.mean(vals)) if vals else 0.0 for key, vals in a.items()},
+        }
+    return report
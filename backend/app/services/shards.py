@@ -0,0 +1,179 @@
+import dataclasses
+import multiprocessing as mp
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from . import job_index, recommender
+from .job_index import JobIndex
+from ..settings import settings
+
+
+# worker side: this process's rows of the index and the position of its first row
+_shard: Optional[JobIndex] = None
+_offset = 0
+
+# parent side: one single-process executor per shard, started for the snapshot in _pools_key
+_pools: List[ProcessPoolExecutor] = []
+_pools_key: Optional[tuple] = None
+_broken = False
+_lock = threading.Lock()
+_stats: Dict = {"requests": 0, "fallbacks": 0, "pools_started": 0, "last_error": None}
+
+
+def _context():
+    # never fork: pools start from request threads, and a forked child can inherit a lock (import,
+    # BLAS, logging) that another thread held at that moment and deadlock on it
+    methods = mp.get_all_start_methods()
+    ctx = mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+    if ctx.get_start_method() == "forkserver":
+        ctx.set_forkserver_preload([recommender.__name__])
+    return ctx
+
+
+def _slice(snap: JobIndex, lo: int, hi: int) -> JobIndex:
+    # the shard's rows as plain arrays, so a memory-mapped matrix pickles as its data
+    part = job_index.slice_rows(snap, lo, hi)
+    vecs = np.array(part.vecs) if part.vecs is not None else None
+    return dataclasses.replace(part, vecs=vecs)
+
+
+def _init_worker(shard: JobIndex, lo: int):
+    # the parent sends each worker its own row range of the index at pool start
+    global _shard, _offset
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(1)
+    settings.kw_workers = 1
+    _shard, _offset = shard, lo
+
+
+def _ping() -> int:
+    return len(_shard) if _shard is not None else 0
+
+
+def _score(
+    text: str,
+    skills: List[str],
+    prof_vec: Optional[np.ndarray],
+    persona: str,
+    keep: tuple,
+    depth: int,
+):
+    comps = recommender._compute_components(
+        text, skills, prof_vec=prof_vec, snap=_shard, keep=keep
+    )
+    scores = recommender._score_components(comps, _shard, persona)
+    top = recommender._top_k(scores["final"], depth)
+    return top + _offset, {name: arr[top] for name, arr in scores.items()}
+
+
+def depth(snap: JobIndex, mode: str, retrieval: Optional[str], k: int) -> Optional[int]:
+    # rows each shard returns for a top-k request (k rounded up to SHARD_TOP), or None to score
+    # in-process: sharding off, a small catalog, or a step that picks rows across the whole catalog
+    # (ANN / inverted-index pool, quantized rescoring, KW_CANDIDATES pre-selection) and so cannot
+    # be split without changing results
+    if settings.score_shards < 2 or len(snap) < max(2, settings.shard_min_jobs) or k <= 0:
+        return None
+    if (retrieval or settings.retrieval_mode) == "ann":
+        return None
+    keep = recommender._MODE_COMPONENTS.get(mode, recommender._ALL_COMPONENTS)
+    if ("embed" in keep and snap.qvecs is not None) or ("kw" in keep and settings.kw_candidates):
+        return None
+    step = max(1, settings.shard_top)
+    return -(-k // step) * step
+
+
+def _close(pools: List[ProcessPoolExecutor], wait: bool):
+    for pool in pools:
+        if not wait:
+            # a worker stuck past SHARD_TIMEOUT would otherwise keep its process and rows
+            for proc in list((getattr(pool, "_processes", None) or {}).values()):
+                proc.terminate()
+        pool.shutdown(wait=wait, cancel_futures=True)
+
+
+def _pools_for(snap: JobIndex) -> List[ProcessPoolExecutor]:
+    global _pools, _pools_key, _broken
+    key = (snap.version, snap.generation, settings.score_shards)
+    with _lock:
+        if _pools_key != key:
+            _close(_pools, wait=False)
+            ctx = _context()
+            n = min(settings.score_shards, len(snap))
+            bounds = np.linspace(0, len(snap), n + 1).astype(int)
+            _pools = [
+                ProcessPoolExecutor(
+                    1, mp_context=ctx, initializer=_init_worker,
+                    initargs=(_slice(snap, int(lo), int(hi)), int(lo)),
+                )
+                for lo, hi in zip(bounds[:-1], bounds[1:])
+            ]
+            _pools_key, _broken = key, False
+            _stats["pools_started"] += 1
+        if _broken:
+            raise RuntimeError(f"shard workers for {key} failed: {_stats['last_error']}")
+        return _pools
+
+
+def _failed(snap: JobIndex, e: Exception):
+    # stop the workers of this snapshot and score in-process until the next reload
+    global _broken
+    with _lock:
+        if _pools_key == (snap.version, snap.generation, settings.score_shards) and not _broken:
+            _broken = True
+            _close(_pools, wait=False)
+    _stats["fallbacks"] += 1
+    _stats["last_error"] = repr(e)
+
+
+def start(snap: JobIndex) -> int:
+    # starts the workers and ships their shards now instead of on the first request
+    if settings.score_shards < 2 or len(snap) < max(2, settings.shard_min_jobs):
+        return 0
+    try:
+        futures = [pool.submit(_ping) for pool in _pools_for(snap)]
+        return sum(f.result(timeout=settings.shard_timeout) for f in futures)
+    except Exception as e:
+        _failed(snap, e)
+        return 0
+
+
+def rank(
+    snap: JobIndex,
+    text: str,
+    skills: List[str],
+    persona: str,
+    keep: tuple,
+    prof_vec: Optional[np.ndarray],
+    depth: int,
+) -> Optional[Tuple[Dict[str, np.ndarray], np.ndarray]]:
+    # scatter one profile to every shard and gather each shard's top `depth` as (scores, rows), rows
+    # sorted by position so _top_k breaks ties as in-process scoring does; None if a worker failed
+    # or did not answer within SHARD_TIMEOUT
+    _stats["requests"] += 1
+    try:
+        pools = _pools_for(snap)
+        futures = [
+            pool.submit(_score, text, skills, prof_vec, persona, keep, depth) for pool in pools
+        ]
+        parts = [f.result(timeout=settings.shard_timeout) for f in futures]
+    except Exception as e:
+        _failed(snap, e)
+        return None
+    rows = np.concatenate([p[0] for p in parts])
+    order = np.argsort(rows, kind="stable")
+    scores = {name: np.concatenate([p[1][name] for p in parts])[order] for name in parts[0][1]}
+    return scores, rows[order]
+
+
+def shutdown():
+    global _pools, _pools_key
+    with _lock:
+        _close(_pools, wait=True)
+        _pools, _pools_key = [], None
+
+
+def stats() -> Dict:
+    return {**_stats, "shards": len(_pools), "enabled": settings.score_shards > 1}
@@ -0,0 +1,85 @@
+from typing import Dict, Iterable, List
+import numpy as np
+from scipy import sparse
+
+from . import skills as skills_svc
+
+
+class SkillIndex:
+    # normalized skills interned to integer ids plus a binary CSR job x skill matrix,
+    # built once per rebuild so requests never re-parse clean_skills
+
+    def __init__(self, vocab: Dict[str, int], matrix: sparse.csr_matrix):
+        self.vocab = vocab
+        self.skills = [""] * len(vocab)
+        for s, i in vocab.items():
+            self.skills[i] = s
+        self.matrix = matrix
+        self.counts = np.diff(matrix.indptr).astype(np.int64)
+
+    @classmethod
+    def build(cls, raw_skills: Iterable[str], vocab: Dict[str, int] | None = None) -> "SkillIndex":
+        vocab = dict(vocab or {})
+        indptr = [0]
+        indices: List[int] = []
+        for raw in raw_skills:
+            for s in skills_svc.parse_skills(raw):
+                indices.append(vocab.setdefault(s, len(vocab)))
+            indptr.append(len(indices))
+        data = np.ones(len(indices), dtype=np.int32)
+        matrix = sparse.csr_matrix(
+            (data, np.array(indices, dtype=np.int32), np.array(indptr, dtype=np.int64)),
+            shape=(len(indptr) - 1, len(vocab)),
+        )
+        return cls(vocab, matrix)
+
+    def append(self, raw_skills: Iterable[str]) -> "SkillIndex":
+        # new index with these jobs' rows after the existing ones; the vocabulary only grows
+        extra = SkillIndex.build(raw_skills, vocab=self.vocab)
+        width = len(extra.vocab)
+        m = self.matrix
+        top = sparse.csr_matrix((m.data, m.indices, m.indptr), shape=(len(self), width))
+        return SkillIndex(extra.vocab, sparse.vstack([top, extra.matrix], format="csr"))
+
+    def take(self, rows: np.ndarray) -> "SkillIndex":
+        return SkillIndex(self.vocab, self.matrix[rows])
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def job_skills(self, i: int) -> List[str]:
+        # parse order of the job's clean_skills is preserved by the CSR row
+        start, end = self.matrix.indptr[i], self.matrix.indptr[i + 1]
+        return [self.skills[j] for j in self.matrix.indices[start:end]]
+
+    def jaccard(self, profile_skills: Iterable[str], rows: np.ndarray | None = None) -> np.ndarray:
+        ps = set(profile_skills)
+        q = np.zeros(len(self.vocab), dtype=np.int32)
+        q[[self.vocab[s] for s in ps if s in self.vocab]] = 1
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        counts = self.counts if rows is None else self.counts[rows]
+        inter = matrix @ q
+        union = len(ps) + counts - inter
+        union[union == 0] = 1
+        return inter / union
+
+    def jaccard_many(
+        self, profile_skill_lists: List[Iterable[str]], rows: np.ndarray | None = None
+    ) -> np.ndarray:
+        # (n_profiles, n_jobs) Jaccard matrix from one sparse product; rows restricts the jobs
+        sets = [set(ps) for ps in profile_skill_lists]
+        indptr = [0]
+        indices: List[int] = []
+        for ps in sets:
+            indices.extend(self.vocab[s] for s in ps if s in self.vocab)
+            indptr.append(len(indices))
+        q = sparse.csr_matrix(
+            (np.ones(len(indices), dtype=np.int32), indices, indptr),
+            shape=(len(sets), len(self.vocab)),
+        )
+        matrix = self.matrix if rows is None else self.matrix[rows]
+        counts = self.counts if rows is None else self.counts[rows]
+        inter = (q @ matrix.T).toarray()
+        union = np.array([len(ps) for ps in sets])[:, None] + counts[None, :] - inter
+        union[union == 0] = 1
+        return inter / union
@@ -1,10 +1,12 @@
-from typing import List, Tuple, Dict
+from typing import Dict, Iterable, List, Optional, Tuple
 import re
-try:
-    import spacy  # optional
-    _NLP = spacy.load("en_core_web_sm")
-except Exception:
-    _NLP = None
+import threading
+
+from ..settings import settings
+
+# spaCy is optional and slow to import; loaded on first use (False once known to be unavailable)
+_NLP = None
+_nlp_lock = threading.Lock()
 
 SYNONYMS = {
     "js": "javascript",
@@ -45,19 +47,88 @@ def parse_skills(raw: str) -> List[str]:
     return out
 
 
+def _nlp():
+    global _NLP
+    if _NLP is None:
+        with _nlp_lock:
+            if _NLP is None:
+                try:
+                    import spacy
+                    _NLP = spacy.load("en_core_web_sm")
+                except Exception:
+                    _NLP = False
+    return _NLP or None
+
+
 def noun_chunk_skills(text: str) -> List[str]:
-    if not _NLP:
+    nlp = _nlp()
+    if nlp is None:
         return []
-    doc = _NLP(text[:10000])
+    doc = nlp(text[:10000])
     chunks = [c.text for c in doc.noun_chunks]
     return [normalize_skill(c) for c in chunks]
 
 
-def extract_skills(text: str) -> List[str]:
+# tokens for SkillMatcher; text and vocabulary phrases go through the same tokenizer
+_TOKEN_RE = re.compile(r"\.?[a-z0-9+#][a-z0-9+#.\-]*")
+
+
+def _tokens(text: str) -> List[str]:
+    return [t.rstrip(".-") or t for t in _TOKEN_RE.findall(text.lower())]
+
+
+class SkillMatcher:
+    # token trie over a skill vocabulary (multi-word skills included); extract() is one
+    # leftmost-longest pass over the text's tokens and only ever returns vocabulary skills
+
+    def __init__(self, vocabulary: Iterable[str]):
+        self.root: Dict = {}
+        self.size = 0
+        phrases = {s: s for s in vocabulary if s}
+        for alias, skill in SYNONYMS.items():
+            phrases[alias] = skill
+            phrases.setdefault(skill, skill)
+        phrases["structured query language"] = "sql"
+        for phrase, skill in phrases.items():
+            toks = _tokens(phrase)
+            if not toks:
+                continue
+            node = self.root
+            for t in toks:
+                node = node.setdefault(t, {})
+            if None not in node:
+                self.size += 1
+            node[None] = normalize_skill(skill)
+
+    def extract(self, text: str, limit: int = 200) -> List[str]:
+        toks = _tokens(text or "")
+        out: List[str] = []
+        seen = set()
+        i, n = 0, len(toks)
+        while i < n and len(out) < limit:
+            node, j, hit, end = self.root, i, None, i + 1
+            while j < n:
+                node = node.get(toks[j])
+                if node is None:
+                    break
+                j += 1
+                if None in node:
+                    hit, end = node[None], j
+            if hit is not None and hit not in seen:
+                seen.add(hit)
+                out.append(hit)
+            i = end
+        return out
+
+
+def extract_skills(text: str, matcher: Optional[SkillMatcher] = None) -> List[str]:
+    # SKILL_EXTRACTOR=vocab with a compiled matcher: known skills only; else regex tokens + noun
+    # chunks
+    if matcher is not None and settings.skill_extractor == "vocab":
+        return matcher.extract(text)
     heuristic = re.findall(r"[A-Za-z][A-Za-z0-9+.#-]{1,}\b", text or "")
     base = [normalize_skill(t) for t in heuristic]
-    if _NLP:
-        base += noun_chunk_skills(text)
+    base += noun_chunk_skills(text)
     # dedupe
     seen = set()
     out = []
@@ -68,10 +139,12 @@ def extract_skills(text: str) -> List[str]:
     return out[:200]
 
 
-def analyze_profile_text(text: str) -> Tuple[str, List[str]]:
+def analyze_profile_text(
+    text: str, matcher: Optional[SkillMatcher] = None
+) -> Tuple[str, List[str]]:
     text = (text or "").strip()
     text = re.sub(r"[\x00-\x1F]+", " ", text)[:10000]
-    skills = extract_skills(text)
+    skills = extract_skills(text, matcher)
     # naive summary: first 600 chars
     summary = text[:600]
     return summary, skills
@@ -0,0 +1,207 @@
+import json
+import os
+import shutil
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from . import loader
+from .ann import IVFIndex
+from .job_index import JobIndex, _columns
+from .lexical_index import LexicalIndex
+from .quant import QuantizedVecs
+from .skill_index import SkillIndex
+from .skills import SkillMatcher
+from ..settings import settings
+
+
+# on-disk layout: <SNAPSHOT_DIR>/<version>/{manifest.json, *.npy, *.json, jobs.pkl} plus a CURRENT
+# pointer file; arrays are plain .npy so workers memory-map them and share the page cache
+FORMAT = 1
+_CURRENT = "CURRENT"
+
+
+def _save_array(path: str, name: str, arr: np.ndarray):
+    np.save(os.path.join(path, name + ".npy"), np.ascontiguousarray(arr), allow_pickle=False)
+
+
+def _load_array(path: str, name: str) -> np.ndarray:
+    return np.load(os.path.join(path, name + ".npy"), mmap_mode="r", allow_pickle=False)
+
+
+def _source_stat(path: str) -> Dict:
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def save(snap: JobIndex, meta: Dict, root: Optional[str] = None) -> str:
+    # writes a complete artifact next to the live one, then flips CURRENT; returns its directory
+    root = root or settings.snapshot_dir
+    os.makedirs(root, exist_ok=True)
+    final = os.path.join(root, snap.version)
+    tmp = os.path.join(root, f".tmp-{snap.version}-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+
+    snap.jobs_df.to_pickle(os.path.join(tmp, "jobs.pkl"))
+    _save_array(tmp, "ids", snap.ids.astype(str))
+    _save_array(tmp, "vecs", snap.vecs.astype(np.float32, copy=False))
+    with open(os.path.join(tmp, "tfidf_vocab.json"), "w") as f:
+        json.dump({t: int(i) for t, i in snap.tfidf.vocabulary_.items()}, f)
+    _save_array(tmp, "tfidf_idf", snap.tfidf.idf_)
+    for part in ("data", "indices", "indptr"):
+        _save_array(tmp, "tfidf_" + part, getattr(snap.matrix, part))
+        _save_array(tmp, "skills_" + part, getattr(snap.skills.matrix, part))
+    with open(os.path.join(tmp, "skills_vocab.json"), "w") as f:
+        json.dump(snap.skills.vocab, f)
+    if snap.qvecs is not None:
+        _save_array(tmp, "qvecs_codes", snap.qvecs.codes)
+        if snap.qvecs.scales is not None:
+            _save_array(tmp, "qvecs_scales", snap.qvecs.scales)
+    # IVF lists are stored whatever RETRIEVAL_MODE the builder ran with, so loading processes never
+    # cluster on a retrieval=ann request
+    ann = snap.ann_index()
+    if ann is not None:
+        _save_array(tmp, "ann_centroids", ann.centroids)
+        _save_array(tmp, "ann_order", np.concatenate(ann.lists))
+        _save_array(tmp, "ann_bounds", np.cumsum([0] + [len(lst) for lst in ann.lists]))
+
+    sources = {}
+    for kind in ("jobs", "resumes"):
+        path = loader.csv_path(kind)
+        stat = _source_stat(path) if os.path.exists(path) else {}
+        sources[kind] = {**meta.get(kind, {}), **stat}
+    manifest = {
+        "format": FORMAT,
+        "version": snap.version,
+        "model_name": settings.model_name,
+        "jobs": len(snap),
+        "dim": int(snap.vecs.shape[1]),
+        "tfidf_shape": list(snap.matrix.shape),
+        "skills_shape": list(snap.skills.matrix.shape),
+        "ann": ann is not None,
+        "qvecs_dtype": snap.qvecs.dtype if snap.qvecs is not None else None,
+        "deltas_since_refit": snap.deltas_since_refit,
+        "sources": sources,
+        "created_at": time.time(),
+    }
+    with open(os.path.join(tmp, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(tmp, final)
+    pointer = os.path.join(root, f".{_CURRENT}-{os.getpid()}")
+    with open(pointer, "w") as f:
+        f.write(snap.version)
+    os.replace(pointer, os.path.join(root, _CURRENT))
+    return final
+
+
+def current_path(root: Optional[str] = None) -> Optional[str]:
+    root = root if root is not None else settings.snapshot_dir
+    if not root:
+        return None
+    try:
+        with open(os.path.join(root, _CURRENT)) as f:
+            version = f.read().strip()
+    except OSError:
+        return None
+    path = os.path.join(root, version)
+    return path if version and os.path.exists(os.path.join(path, "manifest.json")) else None
+
+
+def read_manifest(path: str) -> Dict:
+    with open(os.path.join(path, "manifest.json")) as f:
+        return json.load(f)
+
+
+def matches_sources(manifest: Dict) -> bool:
+    # the artifact is usable when it was built by this format and model from the CSVs on disk now;
+    # an unchanged size+mtime is trusted, otherwise the file is re-hashed (cheap next to a parse)
+    if manifest.get("format") != FORMAT or manifest.get("model_name") != settings.model_name:
+        return False
+    for kind, recorded in manifest.get("sources", {}).items():
+        path = loader.csv_path(kind)
+        if not os.path.exists(path):
+            if recorded.get("found", False):
+                return False
+            continue
+        if not recorded.get("found", False):
+            return False
+        stat = _source_stat(path)
+        if stat["size"] == recorded.get("size") and stat["mtime_ns"] == recorded.get("mtime_ns"):
+            continue
+        if loader.file_version(path) != recorded.get("version"):
+            return False
+    return True
+
+
+def load(path: str, manifest: Optional[Dict] = None) -> JobIndex:
+    manifest = manifest or read_manifest(path)
+    jobs_df = pd.read_pickle(os.path.join(path, "jobs.pkl"))
+    cols = _columns(jobs_df)
+    if not np.array_equal(cols["ids"].astype(str), _load_array(path, "ids")):
+        raise ValueError(f"snapshot {path}: job ids do not match jobs.pkl")
+
+    with open(os.path.join(path, "tfidf_vocab.json")) as f:
+        vocab = json.load(f)
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    tfidf = TfidfVectorizer(max_features=50000, ngram_range=(1, 2), vocabulary=vocab)
+    tfidf.idf_ = np.array(_load_array(path, "tfidf_idf"))
+    matrix = sparse.csr_matrix(
+        tuple(_load_array(path, "tfidf_" + p) for p in ("data", "indices", "indptr")),
+        shape=tuple(manifest["tfidf_shape"]), copy=False,
+    )
+    # derived, not stored: one O(nnz) pass, and LEXICAL_SCORER may differ from the builder's; left
+    # to the first retrieval=ann request unless RETRIEVAL_MODE=ann
+    lexical = None
+    if settings.retrieval_mode == "ann":
+        lexical = LexicalIndex.build(matrix, tfidf.idf_, settings.lexical_scorer)
+    with open(os.path.join(path, "skills_vocab.json")) as f:
+        skill_vocab = json.load(f)
+    skills = SkillIndex(skill_vocab, sparse.csr_matrix(
+        tuple(_load_array(path, "skills_" + p) for p in ("data", "indices", "indptr")),
+        shape=tuple(manifest["skills_shape"]), copy=False,
+    ))
+    vecs = _load_array(path, "vecs")
+    qvecs = None
+    if settings.job_vec_dtype != "float32":
+        if manifest.get("qvecs_dtype") == settings.job_vec_dtype:
+            scales = _load_array(path, "qvecs_scales") if settings.job_vec_dtype == "int8" else None
+            qvecs = QuantizedVecs(_load_array(path, "qvecs_codes"), scales)
+        else:
+            qvecs = QuantizedVecs.build(vecs, settings.job_vec_dtype)
+    ann = None
+    if manifest.get("ann"):
+        order, bounds = _load_array(path, "ann_order"), _load_array(path, "ann_bounds")
+        lists = [order[bounds[c]:bounds[c + 1]] for c in range(len(bounds) - 1)]
+        ann = IVFIndex(vecs, _load_array(path, "ann_centroids"), lists)
+    return JobIndex(
+        jobs_df, manifest["version"], loader.build_job_texts(jobs_df),
+        tfidf=tfidf, matrix=matrix, lexical=lexical, vecs=vecs, qvecs=qvecs, ann=ann, skills=skills,
+        matcher=SkillMatcher(skills.skills),
+        deltas_since_refit=manifest.get("deltas_since_refit", 0),
+        built_at=manifest.get("created_at", time.time()),
+        **cols,
+    )
+
+
+def prune(keep: int = 1, root: Optional[str] = None) -> int:
+    # drops all but the newest `keep` artifacts; the CURRENT one is never removed
+    root = root or settings.snapshot_dir
+    current = current_path(root)
+    dirs = [
+        os.path.join(root, d) for d in os.listdir(root)
+        if os.path.exists(os.path.join(root, d, "manifest.json"))
+    ]
+    dirs.sort(key=lambda d: os.path.getmtime(os.path.join(d, "manifest.json")), reverse=True)
+    removed = 0
+    for d in dirs[max(keep, 1):]:
+        if current and os.path.samefile(d, current):
+            continue
+        shutil.rmtree(d, ignore_errors=True)
+        removed += 1
+    return removed
@@ -1,3 +1,5 @@
+import re
+
 from rapidfuzz import fuzz
 
 CANONICAL = {
@@ -19,3 +21,32 @@ def canonicalize(title: str, threshold: int = 85) -> str:
     return t
 
 
+def _tokens(text: str) -> tuple:
+    return tuple(re.findall(r"[a-z0-9+#]+", (text or "").lower()))
+
+
+# whole-token patterns per family for title_family; single-word variants ("ds", "de", "swe",
+# "developer") only match a title that is exactly that word
+_FAMILY_PATTERNS = [
+    (canon, _tokens(v))
+    for canon, variants in CANONICAL.items()
+    for v in [canon, *variants]
+    if " " in v
+]
+_FAMILY_WORDS = {
+    v: canon for canon, variants in CANONICAL.items() for v in variants if " " not in v
+}
+
+
+def title_family(title: str) -> str:
+    # exact family for filtering: a canonical title or one of its variants must appear as whole,
+    # consecutive words of the title; anything else is its own family (the normalized title)
+    tokens = _tokens(title)
+    text = " ".join(tokens)
+    if text in _FAMILY_WORDS:
+        return _FAMILY_WORDS[text]
+    for canon, pattern in _FAMILY_PATTERNS:
+        n = len(pattern)
+        if any(tokens[i:i + n] == pattern for i in range(len(tokens) - n + 1)):
+            return canon
+    return text
@@ -0,0 +1,71 @@
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+from . import embeddings as emb, recommender, shards, skills
+from ..settings import settings
+from ..store import get_store
+
+
+# state: idle -> running -> ready | failed; per-stage seconds in "stages"
+_status: Dict = {
+    "state": "idle", "stage": "", "stages": {}, "error": None,
+    "started_at": None, "finished_at": None,
+}
+_lock = threading.Lock()
+_thread: threading.Thread | None = None
+
+
+def _import_scoring():
+    from sklearn.metrics.pairwise import cosine_similarity  # noqa: F401
+
+
+def _stages() -> List[Tuple[str, Callable]]:
+    # model before index: a build without a snapshot encodes the job texts
+    return [
+        ("store", get_store),
+        ("spacy", skills._nlp),
+        ("model", emb._get_model),
+        ("index", recommender.current_index),
+        ("scoring", _import_scoring),
+        ("shards", lambda: shards.start(recommender.current_index())),
+    ]
+
+
+def _run():
+    _status.update(state="running", started_at=time.time(), stages={}, error=None)
+    for name, fn in _stages():
+        _status["stage"] = name
+        t0 = time.perf_counter()
+        try:
+            fn()
+        except Exception as e:
+            _status.update(state="failed", error=f"{name}: {e!r}", finished_at=time.time())
+            return
+        _status["stages"][name] = round(time.perf_counter() - t0, 3)
+    _status.update(state="ready", stage="", finished_at=time.time())
+
+
+def start(wait: bool = False) -> Dict:
+    # loads the model, spaCy pipeline and job index on a background thread so the first
+    # request doesn't pay for them; the server accepts connections meanwhile
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, name="warmup", daemon=True)
+            _thread.start()
+        thread = _thread
+    if wait:
+        thread.join()
+    return status()
+
+
+def ready() -> bool:
+    # without WARMUP everything loads lazily on first use, so the process is ready at once
+    return not settings.warmup or _status["state"] == "ready"
+
+
+def status() -> Dict:
+    return {
+        **_status, "stages": dict(_status["stages"]), "enabled": settings.warmup, "ready": ready(),
+    }
@@ -5,10 +5,77 @@ from typing import List
 class Settings:
     data_dir: str = os.getenv("DATA_DIR", "./data")
     model_name: str = os.getenv("MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+    # parsed CSVs cached column-wise (empty disables); columns kept in memory ("*" = all)
+    csv_cache_dir: str = os.getenv("CSV_CACHE_DIR", ".cache/csv")
+    job_columns: str = os.getenv(
+        "JOB_COLUMNS",
+        "job_id,title,description,clean_skills,"
+        "experience_level,experiencelevel,years_experience,yearsofexperience",
+    )
+    resume_columns: str = os.getenv(
+        "RESUME_COLUMNS", "resume_id,summary,fulltext,clean_skills,parsed_skills"
+    )
     cache_db: str = os.getenv("CACHE_DB", ".cache/embeddings.sqlite")
+    # profile vectors in CACHE_DB are evicted by age and count; job vectors are pinned
+    embed_profile_max_rows: int = int(os.getenv("EMBED_PROFILE_MAX_ROWS", "100000"))
+    embed_profile_ttl_days: float = float(os.getenv("EMBED_PROFILE_TTL_DAYS", "30"))
+    # micro-batching of concurrent single-profile encodes on a dedicated worker thread
+    embed_batching: bool = os.getenv("EMBED_BATCHING", "1") not in ("0", "false", "False", "")
+    embed_batch_max: int = int(os.getenv("EMBED_BATCH_MAX", "32"))
+    embed_batch_wait_ms: float = float(os.getenv("EMBED_BATCH_WAIT_MS", "5"))
+    # prebuilt job index written by `python -m app.build_snapshot`; empty disables loading it
+    snapshot_dir: str = os.getenv("SNAPSHOT_DIR", ".cache/snapshot")
+    # job embeddings scored as float32, or float16/int8 with the top EMBED_RESCORE rows rescored
+    # in float32
+    job_vec_dtype: str = os.getenv("JOB_VEC_DTYPE", "float32")
+    embed_rescore: int = int(os.getenv("EMBED_RESCORE", "500"))
+    vec_spill_dir: str = os.getenv("VEC_SPILL_DIR", ".cache/vecs")
+    precompute_db: str = os.getenv("PRECOMPUTE_DB", ".cache/precomputed.sqlite")
     cors_origins: List[str] = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
     default_mode: str = os.getenv("DEFAULT_MODE", "hybrid")
     default_persona: str = os.getenv("DEFAULT_PERSONA", "Fresh Grad")
+    # "exact" scores every job; "ann" rescores only an IVF candidate pool from the embedding index
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "exact")
+    ann_candidates: int = int(os.getenv("ANN_CANDIDATES", "300"))
+    ann_nprobe: int = int(os.getenv("ANN_NPROBE", "8"))
+    # baseline mode with retrieval=ann: rescore only the top LEXICAL_CANDIDATES jobs from the
+    # inverted index, ranked by TF-IDF cosine or BM25 over the same vocabulary
+    lexical_scorer: str = os.getenv("LEXICAL_SCORER", "cosine")
+    lexical_candidates: int = int(os.getenv("LEXICAL_CANDIDATES", "300"))
+    # SCORE_SHARDS > 1 splits exact single-profile scoring of catalogs with at least
+    # SHARD_MIN_JOBS jobs across that many worker processes; each returns its top SHARD_TOP (or k)
+    # rows for the merge
+    score_shards: int = int(os.getenv("SCORE_SHARDS", "0"))
+    shard_min_jobs: int = int(os.getenv("SHARD_MIN_JOBS", "50000"))
+    shard_top: int = int(os.getenv("SHARD_TOP", "100"))
+    # seconds to wait for a shard's answer before scoring in-process and stopping the workers
+    shard_timeout: float = float(os.getenv("SHARD_TIMEOUT", "30"))
+    # 0 fuzz-scores every job; N > 0 only the top N by the cheaper components
+    kw_candidates: int = int(os.getenv("KW_CANDIDATES", "0"))
+    kw_workers: int = int(os.getenv("KW_WORKERS", "-1"))
+    # profiles scored together per matrix pass in /recommend/batch
+    batch_chunk: int = int(os.getenv("BATCH_CHUNK", "64"))
+    # /ingest/delta keeps the fitted TF-IDF vocabulary; full refit after this many deltas or a
+    # larger diff
+    ingest_refit_every: int = int(os.getenv("INGEST_REFIT_EVERY", "50"))
+    ingest_refit_fraction: float = float(os.getenv("INGEST_REFIT_FRACTION", "0.2"))
+    # "regex": every token + spaCy noun chunks; "vocab": only skills from the job catalog
+    # (+ synonyms)
+    skill_extractor: str = os.getenv("SKILL_EXTRACTOR", "regex")
+    # gap suggestions fall back to the closest catalog skill at or above this fuzz.ratio (85 is a
+    # good value); 0, the default, keeps exact matches only
+    course_fuzzy_cutoff: float = float(os.getenv("COURSE_FUZZY_CUTOFF", "0"))
+    # load the model, spaCy and the job index on a background thread at startup; /health/ready is
+    # 503 until done
+    warmup: bool = os.getenv("WARMUP", "0") not in ("0", "false", "False", "")
+    # in-process cache of scored arrays; budget covers the arrays themselves
+    result_cache_mb: int = int(os.getenv("RESULT_CACHE_MB", "64"))
+    result_cache_ttl: float = float(os.getenv("RESULT_CACHE_TTL", "600"))
+    # per-stage latency histograms served on GET /metrics (404 when off); REQUEST_TIMING adds a
+    # Server-Timing header with each response's stage breakdown, visible to clients, so it is off
+    # unless enabled for internal traffic
+    metrics: bool = os.getenv("METRICS", "1") not in ("0", "false", "False", "")
+    request_timing: bool = os.getenv("REQUEST_TIMING", "0") not in ("0", "false", "False", "")
 
 
 settings = Settings()
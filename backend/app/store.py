@@ -1,17 +1,24 @@
 import os
 import json
 import sqlite3
-from typing import Dict, List, Optional
-import pandas as pd
+import threading
+from typing import Dict, Iterable, List, Optional
 
-from .settings import settings
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER is 999 on older builds
+_LOOKUP_CHUNK = 900
 
 
 class Store:
-    def __init__(self):
-        os.makedirs(".cache", exist_ok=True)
-        self._db_path = os.path.join(".cache", "profiles.sqlite")
+    # one per process (get_store): schema and WAL are set up once, each thread keeps its own
+    # connection, so request threads never pay a connect or a CREATE TABLE per call
+
+    def __init__(self, db_path: Optional[str] = None):
+        self._db_path = db_path or os.path.join(".cache", "profiles.sqlite")
+        os.makedirs(os.path.dirname(self._db_path) or ".", exist_ok=True)
+        self._local = threading.local()
         with sqlite3.connect(self._db_path) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
             conn.execute(
                 "CREATE TABLE IF NOT EXISTS profiles (id TEXT PRIMARY KEY, summary TEXT, skills TEXT, persona TEXT)"
             )
@@ -19,32 +26,56 @@ class Store:
                 "CREATE TABLE IF NOT EXISTS feedback (profile_id TEXT, job_id TEXT, label INTEGER, ts DATETIME DEFAULT CURRENT_TIMESTAMP)"
             )
 
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            # connections must not cross a fork; a child opens its own
+            conn = sqlite3.connect(self._db_path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-8000")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
     def save_profile(self, summary: str, skills: List[str], persona: str) -> str:
         pid = str(abs(hash(summary + persona)))[0:16]
-        with sqlite3.connect(self._db_path) as conn:
+        conn = self._conn()
+        with conn:
             conn.execute(
                 "INSERT OR REPLACE INTO profiles(id, summary, skills, persona) VALUES (?, ?, ?, ?)",
                 (pid, summary, json.dumps(skills), persona),
             )
-            conn.commit()
         return pid
 
     def get_profile(self, profile_id: str) -> Optional[Dict]:
-        with sqlite3.connect(self._db_path) as conn:
-            cur = conn.execute("SELECT summary, skills, persona FROM profiles WHERE id=?", (profile_id,))
-            row = cur.fetchone()
-            if not row:
-                return None
-            return {"summary": row[0], "skills": json.loads(row[1] or "[]"), "persona": row[2]}
-
-    def get_skills_mapping(self) -> Optional[pd.DataFrame]:
-        path = os.path.join(settings.data_dir, "skills_to_courses.csv")
-        if os.path.exists(path):
-            df = pd.read_csv(path)
-            df.columns = [c.strip().lower() for c in df.columns]
-            if "skill" not in df.columns:
-                return None
-            return df.fillna("")
-        return None
+        return self.get_profiles([profile_id]).get(profile_id)
+
+    def get_profiles(self, profile_ids: Iterable[str]) -> Dict[str, Dict]:
+        # id -> profile for the ids that exist, chunked IN (...) lookups
+        unique = list(dict.fromkeys(str(p) for p in profile_ids))
+        out: Dict[str, Dict] = {}
+        conn = self._conn()
+        for start in range(0, len(unique), _LOOKUP_CHUNK):
+            chunk = unique[start:start + _LOOKUP_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            cur = conn.execute(
+                f"SELECT id, summary, skills, persona FROM profiles WHERE id IN ({marks})", chunk
+            )
+            for pid, summary, skills, persona in cur.fetchall():
+                out[pid] = {
+                    "summary": summary, "skills": json.loads(skills or "[]"), "persona": persona,
+                }
+        return out
+
+
+_store: Optional[Store] = None
+_store_lock = threading.Lock()
 
 
+def get_store() -> Store:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = Store()
+    return _store
@@ -0,0 +1,67 @@
+# Throughput of concurrent single-profile encodes with and without micro-batching.
+# Needs the sentence-transformers model. Run from backend/:
+#   python -m benchmarks.bench_embed_batching [--clients 16] [--requests 20]
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+
+from app.services import embeddings as emb
+from app.settings import settings
+
+
+def _run(clients: int, requests: int, tag: str) -> dict:
+    # unique texts so every request misses the SQLite cache and reaches the model
+    latencies = []
+    lock = threading.Lock()
+
+    def client(c: int):
+        for r in range(requests):
+            text = (
+                f"{tag} client {c} request {r}: "
+                "python developer with sql, docker and cloud experience"
+            )
+            t0 = time.perf_counter()
+            emb.encode_one(text)
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "seconds": wall,
+        "throughput_rps": len(latencies) / wall,
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p99_ms": 1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=16)
+    ap.add_argument("--requests", type=int, default=20)
+    args = ap.parse_args()
+
+    settings.cache_db = os.path.join(tempfile.mkdtemp(), "embeddings.sqlite")
+    emb._get_model()  # load outside the timed runs
+    report = {"clients": args.clients, "cpu_count": os.cpu_count()}
+    settings.embed_batching = False
+    report["unbatched"] = _run(args.clients, args.requests, "unbatched")
+    settings.embed_batching = True
+    report["batched"] = _run(args.clients, args.requests, "batched")
+    report["batcher"] = emb.batcher_stats()
+    report["speedup"] = report["batched"]["throughput_rps"] / report["unbatched"]["throughput_rps"]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
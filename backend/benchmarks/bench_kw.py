@@ -0,0 +1,60 @@
+# Per-request time of the "kw" component: per-job fuzz loop vs batched cdist.
+# Run from backend/: python -m benchmarks.bench_kw [--profiles 20] [--chars 10000]
+import argparse
+import json
+import time
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from app.services import loader, recommender as rec
+from app.settings import settings
+
+
+def _loop(profile_text, job_texts):
+    return np.array(
+        [fuzz.token_set_ratio(profile_text, jt) / 100.0 for jt in job_texts], dtype=float
+    )
+
+
+def _time(fn, profiles):
+    out = []
+    for p in profiles:
+        t0 = time.perf_counter()
+        fn(p)
+        out.append(time.perf_counter() - t0)
+    return {"mean_ms": 1000 * float(np.mean(out)), "p50_ms": 1000 * float(np.median(out))}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--profiles", type=int, default=20)
+    ap.add_argument("--chars", type=int, default=10000)
+    ap.add_argument("--top", type=int, default=200)
+    args = ap.parse_args()
+
+    jobs_df, _ = loader.get_jobs()
+    job_texts = loader.build_job_texts(jobs_df)
+    rng = np.random.default_rng(0)
+    profiles = []
+    for _ in range(args.profiles):
+        picks = rng.choice(len(job_texts), 40, replace=True)
+        profiles.append(" ".join(job_texts[i] for i in picks)[: args.chars])
+
+    for p in profiles[:3]:
+        assert np.array_equal(_loop(p, job_texts), rec._fuzz_scores(p, job_texts))
+
+    top = job_texts[: args.top]
+    report = {
+        "jobs": len(job_texts),
+        "profile_chars": args.chars,
+        "workers": settings.kw_workers,
+        "loop": _time(lambda p: _loop(p, job_texts), profiles),
+        "cdist": _time(lambda p: rec._fuzz_scores(p, job_texts), profiles),
+        f"cdist_top{args.top}": _time(lambda p: rec._fuzz_scores(p, top), profiles),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# Baseline TF-IDF retrieval: dense cosine over every job + top-k vs the inverted index's
+# early-terminating top-k (cosine and BM25), on a catalog scaled up from data/clean_jobs.csv.
+# Run from backend/:
+#   python -m benchmarks.bench_lexical [--rows 200000] [--queries 100] [--k 300]
+import argparse
+import json
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.services import loader
+from app.services.lexical_index import LexicalIndex
+from app.services.recommender import _top_k
+
+
+def _synthesize(texts, rows: int, rng) -> list:
+    # replicas of the real postings, each with a few words drawn from the whole catalog appended
+    words = " ".join(texts).split()
+    out = list(texts)
+    while len(out) < rows:
+        base = texts[len(out) % len(texts)]
+        out.append(base + " " + " ".join(rng.choice(words, 12)))
+    return out[:rows]
+
+
+def _pct(times) -> dict:
+    ms = np.sort(np.asarray(times) * 1000)
+    p99 = ms[min(len(ms) - 1, int(len(ms) * 0.99))]
+    return {"p50_ms": float(ms[len(ms) // 2]), "p99_ms": float(p99)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200000)
+    ap.add_argument("--queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=300, help="candidates per query (LEXICAL_CANDIDATES)")
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    jobs_df, _ = loader.get_jobs()
+    texts = _synthesize(loader.build_job_texts(jobs_df), args.rows, rng)
+    t0 = time.perf_counter()
+    tfidf = TfidfVectorizer(max_features=50000, ngram_range=(1, 2))
+    matrix = tfidf.fit_transform(texts)
+    fit = time.perf_counter() - t0
+    report = {
+        "rows": len(texts), "k": args.k, "matrix_nnz": int(matrix.nnz), "tfidf_fit_seconds": fit,
+    }
+
+    # profile-like queries: the opening of a posting, and a short skills line
+    picks = rng.choice(len(texts), args.queries, replace=False)
+    queries = [texts[i][:400] for i in picks] + [" ".join(texts[i].split()[-12:]) for i in picks]
+    qmat = tfidf.transform(queries)
+
+    dense, exact_tops = [], []
+    for i in range(len(queries)):
+        t0 = time.perf_counter()
+        scores = cosine_similarity(qmat[i], matrix).ravel()
+        top = _top_k(scores, args.k)
+        dense.append(time.perf_counter() - t0)
+        exact_tops.append((top, scores[top]))
+    report["dense_cosine"] = _pct(dense)
+
+    for scorer in ("cosine", "bm25"):
+        t0 = time.perf_counter()
+        index = LexicalIndex.build(matrix, tfidf.idf_, scorer)
+        entry = {"build_seconds": time.perf_counter() - t0, "bytes": index.nbytes}
+        times, mismatches = [], 0
+        for i in range(len(queries)):
+            t0 = time.perf_counter()
+            rows, scores = index.top_k(qmat[i], args.k)
+            times.append(time.perf_counter() - t0)
+            if scorer == "cosine":
+                top, exact = exact_tops[i]
+                matched = exact > 0
+                same = np.array_equal(rows, top[matched]) and np.allclose(scores, exact[matched])
+                mismatches += not same
+        entry.update(_pct(times))
+        if scorer == "cosine":
+            entry["mismatches_vs_dense"] = mismatches
+            entry["speedup_p50"] = report["dense_cosine"]["p50_ms"] / entry["p50_ms"]
+        report["index_" + scorer] = entry
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Load time and memory of the jobs frame: plain CSV parse vs the columnar cache, on a catalog
+# scaled up from data/clean_jobs.csv. Run from backend/:
+#   python -m benchmarks.bench_loader [--rows 200000]
+import argparse
+import json
+import multiprocessing as mp
+import os
+import resource
+import tempfile
+import time
+
+import pandas as pd
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _synthesize(src: str, rows: int, out_dir: str) -> str:
+    base = pd.read_csv(src)
+    reps = -(-rows // len(base))
+    df = pd.concat([base] * reps, ignore_index=True).head(rows)
+    id_col = next(
+        (c for c in df.columns if c.strip().lower().replace(" ", "_") in ("job_id", "jobid")), None
+    )
+    if id_col is not None:
+        df[id_col] = [f"SYN-{i:07d}" for i in range(len(df))]
+    path = os.path.join(out_dir, "clean_jobs.csv")
+    df.to_csv(path, index=False)
+    return path
+
+
+def _phase(data_dir: str, cache_dir: str, columns: str, out):
+    os.environ.update(DATA_DIR=data_dir, CSV_CACHE_DIR=cache_dir)
+    if columns is not None:
+        os.environ["JOB_COLUMNS"] = columns
+    from app.services import loader
+    before = _rss_bytes()
+    t0 = time.perf_counter()
+    df, meta = loader._load_jobs()
+    seconds = time.perf_counter() - t0
+    out.put({
+        "seconds": seconds,
+        "cached": meta.get("cached"),
+        "columns": len(df.columns),
+        "frame_bytes": int(df.memory_usage(deep=True).sum()),
+        "rss_delta_bytes": _rss_bytes() - before,
+    })
+
+
+def _run(*args) -> dict:
+    ctx = mp.get_context("spawn")
+    out = ctx.Queue()
+    p = ctx.Process(target=_phase, args=(*args, out))
+    p.start()
+    result = out.get()
+    p.join()
+    return result
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200000)
+    ap.add_argument("--src", default=os.path.join("..", "data", "clean_jobs.csv"))
+    args = ap.parse_args()
+
+    work = tempfile.mkdtemp()
+    path = _synthesize(args.src, args.rows, work)
+    cache = os.path.join(work, "csv-cache")
+    report = {"rows": args.rows, "csv_bytes": os.path.getsize(path)}
+    report["csv_all_columns"] = _run(work, "", "*")
+    report["csv_then_cache_write"] = _run(work, cache, None)
+    report["cache_selected_columns"] = _run(work, cache, None)
+    report["cache_all_columns"] = _run(work, cache, "*")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+# Concurrent /profile/analyze + /recommend/by_profile round trips.
+# Run from backend/ against the in-process app, or a running server with --url:
+#   python -m benchmarks.bench_profile_flow [--clients 8] [--requests 25] [--url http://localhost:8000]
+import argparse
+import json
+import os
+import threading
+import time
+
+import httpx
+
+SKILLS = [
+    "python", "sql", "docker", "aws", "react", "java", "spark", "tableau", "excel", "kubernetes",
+]
+
+
+def _client(url: str | None):
+    if url:
+        return httpx.Client(base_url=url, timeout=60)
+    from fastapi.testclient import TestClient
+    from app.main import app
+    return TestClient(app)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--clients", type=int, default=8)
+    ap.add_argument("--requests", type=int, default=25)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--url", default=None)
+    args = ap.parse_args()
+
+    client = _client(args.url)
+    # build the index first
+    client.get("/recommend/by_resume_id", params={"resume_id": "1", "k": 1})
+    latencies = []
+    lock = threading.Lock()
+
+    def run(c: int):
+        for r in range(args.requests):
+            skills = ", ".join(SKILLS[(c + r + i) % len(SKILLS)] for i in range(3))
+            text = f"Analyst {c}-{r} with experience in {skills}"
+            t0 = time.perf_counter()
+            pid = client.post("/profile/analyze", data={"text": text}).json()["profile_id"]
+            client.get("/recommend/by_profile", params={"profile_id": pid, "k": args.k})
+            with lock:
+                latencies.append(time.perf_counter() - t0)
+
+    threads = [threading.Thread(target=run, args=(c,)) for c in range(args.clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+    latencies.sort()
+    print(json.dumps({
+        "clients": args.clients,
+        "round_trips": len(latencies),
+        "cpu_count": os.cpu_count(),
+        "seconds": wall,
+        "throughput_rps": len(latencies) / wall,
+        "p50_ms": 1000 * latencies[len(latencies) // 2],
+        "p99_ms": 1000 * latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Single-profile hybrid scoring latency in-process vs sharded across 2..N worker processes, on a
+# catalog scaled up from data/clean_jobs.csv. Job and profile vectors come from the stub encoder
+# in benchmarks/synth.py so no model download is needed. Run from backend/:
+#   python -m benchmarks.bench_shards [--rows 200000] [--shards 1,2,4,8] [--queries 30]
+import argparse
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services import embeddings as emb, job_index, loader, recommender, shards
+from app.settings import settings
+from benchmarks.synth import HashEncoder
+
+
+def _catalog(rows: int) -> pd.DataFrame:
+    base, _ = loader.get_jobs()
+    reps = -(-rows // len(base))
+    df = pd.concat([base] * reps, ignore_index=True).head(rows).copy()
+    df["job_id"] = [f"SYN-{i:07d}" for i in range(len(df))]
+    # vary the replicas' text so TF-IDF, fuzz and embeddings differ between copies
+    df["title"] = df["title"].astype(str) + " " + (df.index // len(base)).astype(str)
+    return df
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200000)
+    ap.add_argument("--shards", default="1,2,4,8")
+    ap.add_argument("--queries", type=int, default=30)
+    ap.add_argument("--mode", default="hybrid")
+    args = ap.parse_args()
+
+    settings.cache_db = os.path.join(tempfile.mkdtemp(), "embeddings.sqlite")
+    settings.snapshot_dir = ""
+    settings.shard_min_jobs = 0
+    emb._MODEL = HashEncoder()
+    df = _catalog(args.rows)
+    t0 = time.perf_counter()
+    snap = recommender._publish(job_index.build(df, "bench-shards"))
+    report = {
+        "rows": len(snap), "mode": args.mode, "cpu_count": os.cpu_count(),
+        "build_seconds": time.perf_counter() - t0,
+    }
+
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(snap), args.queries, replace=False)
+    queries = [(snap.texts[i][:600], snap.skills.job_skills(int(i))) for i in picks]
+    reference = None
+    for n in [int(s) for s in args.shards.split(",")]:
+        settings.score_shards = n
+        depth = shards.depth(snap, args.mode, "exact", 10)
+        started = time.perf_counter()
+        shards.start(snap)
+        startup = time.perf_counter() - started
+        times, tops = [], []
+        for text, skills in queries:
+            t0 = time.perf_counter()
+            scores, rows = recommender._rank_request(
+                snap, text, skills, "Fresh Grad", args.mode, "exact", depth
+            )
+            times.append(time.perf_counter() - t0)
+            tops.append(recommender._format_results(scores, snap, 10, rows))
+        ms = np.sort(np.asarray(times) * 1000)
+        entry = {
+            "startup_seconds": startup,
+            "p50_ms": float(ms[len(ms) // 2]),
+            "p99_ms": float(ms[min(len(ms) - 1, int(len(ms) * 0.99))]),
+        }
+        if reference is None:
+            reference = tops
+        else:
+            entry["mismatches_vs_in_process"] = sum(a != b for a, b in zip(reference, tops))
+            entry["speedup_p50"] = report["shards_1"]["p50_ms"] / entry["p50_ms"]
+        report[f"shards_{n}"] = entry
+    report["shard_stats"] = shards.stats()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Per-resume extract_skills time and output size: regex tokens (+ spaCy when installed) vs the
+# compiled vocabulary matcher. Resumes are stitched from clean_jobs.csv text. Run from backend/:
+#   python -m benchmarks.bench_skills [--resumes 200] [--chars 10000]
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services import loader, skills
+from app.services.skill_index import SkillIndex
+from app.settings import settings
+
+
+def _resumes(n: int, chars: int, seed: int = 0):
+    raw = pd.read_csv(loader.csv_path("jobs")).fillna("").astype(str)
+    pieces = (raw.apply(lambda r: ". ".join(r.values), axis=1)).tolist()
+    rng = np.random.default_rng(seed)
+    out = []
+    for _ in range(n):
+        text = ""
+        while len(text) < chars:
+            text += "Worked on projects where I " + pieces[rng.integers(len(pieces))] + ". "
+        out.append(text[:chars])
+    return out
+
+
+def _time(texts, matcher, mode):
+    settings.skill_extractor = mode
+    times, sizes, results = [], [], []
+    for t in texts:
+        t0 = time.perf_counter()
+        found = skills.extract_skills(t, matcher)
+        times.append(time.perf_counter() - t0)
+        sizes.append(len(found))
+        results.append(found)
+    times.sort()
+    return {
+        "mean_ms": 1000 * float(np.mean(times)),
+        "p50_ms": 1000 * times[len(times) // 2],
+        "p99_ms": 1000 * times[min(len(times) - 1, int(len(times) * 0.99))],
+        "mean_skills": float(np.mean(sizes)),
+    }, results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--resumes", type=int, default=200)
+    ap.add_argument("--chars", type=int, default=10000)
+    args = ap.parse_args()
+
+    jobs_df, _ = loader.get_jobs()
+    index = SkillIndex.build(jobs_df["clean_skills"].tolist())
+    t0 = time.perf_counter()
+    matcher = skills.SkillMatcher(index.skills)
+    compile_ms = 1000 * (time.perf_counter() - t0)
+    texts = _resumes(args.resumes, args.chars)
+    vocab = set(index.vocab)
+    report = {"resumes": len(texts), "chars": args.chars, "vocabulary": matcher.size,
+              "compile_ms": compile_ms, "spacy": skills._nlp() is not None}
+    for mode in ("regex", "vocab"):
+        stats, results = _time(texts, matcher, mode)
+        stats["in_vocabulary_fraction"] = float(np.mean([
+            sum(s in vocab for s in r) / len(r) if r else 1.0 for r in results
+        ]))
+        report[mode] = stats
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Cold-start timings of a fresh API process, with and without the WARMUP phase: import of
+# app.main, first /health/live, /health/ready, and the first profile -> recommendation round trip.
+# Each scenario runs in its own subprocess. Needs the sentence-transformers model. Run from
+# backend/:
+#   python -m benchmarks.bench_startup [--repeat 3]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+_TEXT = (
+    "Python developer with SQL, Docker, React and AWS experience; "
+    "built REST APIs and data pipelines."
+)
+
+
+def _child():
+    t0 = time.perf_counter()
+    from app.main import app
+    from fastapi.testclient import TestClient
+    out = {"import_s": time.perf_counter() - t0}
+    with TestClient(app) as client:
+        assert client.get("/health/live").status_code == 200
+        out["first_health_s"] = time.perf_counter() - t0
+        while client.get("/health/ready").status_code != 200:
+            time.sleep(0.02)
+        out["ready_s"] = time.perf_counter() - t0
+        out["warmup"] = client.get("/health/ready").json()
+        t1 = time.perf_counter()
+        pid = client.post("/profile/analyze", data={"text": _TEXT}).json()["profile_id"]
+        res = client.get("/recommend/by_profile", params={"profile_id": pid, "k": 10})
+        assert res.status_code == 200, res.text
+        out["first_recommend_latency_s"] = time.perf_counter() - t1
+        out["first_recommend_s"] = time.perf_counter() - t0
+    print(json.dumps(out))
+
+
+def _scenario(warmup: bool) -> dict:
+    env = {**os.environ, "WARMUP": "1" if warmup else "0"}
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_startup", "--child"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    report["process_s"] = time.perf_counter() - t0
+    return report
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        _child()
+        return
+
+    report = {}
+    for name, warmup in (("lazy", False), ("warmup", True)):
+        runs = [_scenario(warmup) for _ in range(args.repeat)]
+        keys = [k for k, v in runs[0].items() if isinstance(v, float)]
+        report[name] = {k: min(r[k] for r in runs) for k in keys}
+        report[name]["stages"] = runs[-1]["warmup"].get("stages", {})
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
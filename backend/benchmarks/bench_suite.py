@@ -0,0 +1,196 @@
+# End-to-end offline benchmark on synthetic catalogs (benchmarks/synth.py) with the stub embedder,
+# so it needs neither the model nor the network. Per catalog size, in a fresh process: cold and warm
+# rebuild_caches, per-mode recommendation p50/p99 (distinct resumes, result cache cleared), /gaps
+# latency, hybrid throughput with concurrent clients, per-stage means from app.services.metrics and
+# peak RSS. Writes one JSON report; --baseline adds new/old ratios per metric. Run from backend/:
+#   python -m benchmarks.bench_suite [--sizes 1k,10k,100k] [--queries 50] [--clients 4]
+#       [--work ../bench-data] [--out bench.json] [--baseline previous.json]
+# 1m is accepted too; it needs several GB of RAM for the float32 job matrix and TF-IDF fit.
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+_MODES = ("baseline", "embed", "hybrid")
+
+
+def _rows(size: str) -> int:
+    size = size.strip().lower()
+    scale = {"k": 1000, "m": 1000000}.get(size[-1], 1)
+    return int(float(size.rstrip("km")) * scale)
+
+
+def _ms(times) -> dict:
+    ms = np.sort(np.asarray(times) * 1000)
+    if not len(ms):
+        return {"n": 0}
+    return {
+        "n": len(ms), "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)), "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def _child(queries: int, clients: int):
+    # DATA_DIR, CACHE_DB, CSV_CACHE_DIR etc. come from the parent's environment
+    from app.services import embeddings as emb, gaps, loader, metrics, recommender
+    from benchmarks.synth import HashEncoder
+    emb._MODEL = HashEncoder()
+    out = {}
+
+    for phase in ("rebuild_cold", "rebuild_warm"):
+        t0 = time.perf_counter()
+        loader.reload_all()
+        recommender.rebuild_caches()
+        out[phase + "_s"] = time.perf_counter() - t0
+    snap = recommender.current_index()
+    out["jobs"] = len(snap)
+    # the generated skills (not a fallback column) must be what the app indexes
+    written = pd.read_csv(loader.csv_path("jobs"), usecols=["job_id", "clean_skills"]).fillna("")
+    loaded = loader.get_jobs()[0]
+    assert list(loaded["job_id"]) == list(written["job_id"]), "job ids were not loaded"
+    assert list(loaded["clean_skills"]) == list(written["clean_skills"]), "skills were not loaded"
+    resumes = loader.get_resumes_df()["resume_id"].astype(str).tolist()
+    ids = resumes[:queries]
+    metrics.reset()
+
+    top = {}
+    for mode in _MODES:
+        recommender._results.clear()
+        times = []
+        for rid in ids:
+            t0 = time.perf_counter()
+            res = recommender.recommend_for_resume_id(rid, k=10, mode=mode)
+            times.append(time.perf_counter() - t0)
+            if mode == "hybrid" and res:
+                top[rid] = res[0]["job_id"]
+        out[mode] = _ms(times)
+
+    times = []
+    for rid, job_id in top.items():
+        t0 = time.perf_counter()
+        gaps.compute_gaps_for_resume(rid, job_id)
+        times.append(time.perf_counter() - t0)
+    out["gaps"] = _ms(times)
+
+    recommender._results.clear()
+
+    def one(rid):
+        t0 = time.perf_counter()
+        recommender.recommend_for_resume_id(rid, k=10, mode="hybrid")
+        return time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        times = list(pool.map(one, ids))
+    wall = time.perf_counter() - t0
+    qps = len(ids) / wall if wall else 0.0
+    out["hybrid_concurrent"] = {**_ms(times), "clients": clients, "qps": qps}
+
+    out["stages_mean_ms"] = {
+        name: 1000 * total[0] / sum(counts)
+        for name, (counts, total) in sorted(metrics._hist.items())
+        if sum(counts)
+    }
+    out["peak_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    print(json.dumps(out))
+
+
+def _run_size(size: str, args, work: str) -> dict:
+    from benchmarks import synth
+    rows = _rows(size)
+    data = os.path.join(work, f"{size}-seed{args.seed}")
+    synth.generate(data, rows, max(args.queries, args.resumes), args.seed)
+    scratch = tempfile.mkdtemp()
+    env = {
+        **os.environ, "DATA_DIR": data, "HF_HUB_OFFLINE": "1",
+        "CACHE_DB": os.path.join(scratch, "embeddings.sqlite"),
+        "CSV_CACHE_DIR": os.path.join(scratch, "csv"),
+        "VEC_SPILL_DIR": os.path.join(scratch, "vecs"),
+        "PRECOMPUTE_DB": os.path.join(scratch, "precomputed.sqlite"),
+        "SNAPSHOT_DIR": "", "WARMUP": "0", "METRICS": "1",
+    }
+    proc = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks.bench_suite", "--child",
+            "--queries", str(args.queries), "--clients", str(args.clients),
+        ],
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1:] or [f"exit {proc.returncode}"]
+        return {"rows": rows, "error": error}
+    report = json.loads(proc.stdout.strip().splitlines()[-1])
+    csv_bytes = os.path.getsize(os.path.join(data, "clean_jobs.csv"))
+    return {"rows": rows, "csv_bytes": csv_bytes, **report}
+
+
+def _ratios(new, old) -> dict:
+    # new/old for every numeric metric present in both reports (> 1 means slower / bigger, except
+    # qps)
+    out = {}
+    for key, value in new.items():
+        if isinstance(value, dict) and isinstance(old.get(key), dict):
+            sub = _ratios(value, old[key])
+            if sub:
+                out[key] = sub
+        elif isinstance(value, (int, float)) and key != "n":
+            base = old.get(key)
+            if isinstance(base, (int, float)) and base:
+                out[key] = value / base
+    return out
+
+
+def _git_rev() -> str:
+    try:
+        cmd = ["git", "rev-parse", "--short", "HEAD"]
+        return subprocess.run(cmd, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1k,10k,100k")
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--resumes", type=int, default=1000)
+    ap.add_argument("--clients", type=int, default=4)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--work", default=None, help="keeps generated catalogs between runs")
+    ap.add_argument("--out", default=None)
+    ap.add_argument("--baseline", default=None)
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.child:
+        _child(args.queries, args.clients)
+        return
+
+    work = args.work or tempfile.mkdtemp()
+    report = {
+        "meta": {
+            "git": _git_rev(), "python": platform.python_version(), "cpu_count": os.cpu_count(),
+            "seed": args.seed, "queries": args.queries, "clients": args.clients,
+            "created_at": time.time(),
+        },
+        "sizes": {size: _run_size(size, args, work) for size in args.sizes.split(",")},
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report["vs_baseline"] = _ratios(report["sizes"], json.load(f).get("sizes", {}))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
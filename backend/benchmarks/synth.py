@@ -0,0 +1,145 @@
+# Synthetic clean_jobs.csv / clean_resume_data.csv of any size, drawn from data/clean_jobs.csv: each
+# row starts from a real job (title, level, years, responsibilities), keeps most of its skills and
+# adds a few sampled by their catalog-wide frequency, so title/skill co-occurrence and the skill
+# frequency tail match the real file. Deterministic for a given seed. Also the stub embedder the
+# benchmarks use instead of sentence-transformers. Run from backend/:
+#   python -m benchmarks.synth --jobs 100000 --resumes 5000 --out ../bench-data/100k [--seed 0]
+import argparse
+import json
+import os
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+_SRC = os.path.join("..", "data", "clean_jobs.csv")
+# share of a template job's skills each synthetic row keeps, and how many catalog skills it adds
+_KEEP = 0.75
+_EXTRA = 3
+# bumped when the written columns change, so catalogs kept in --work are regenerated
+_FORMAT = 2
+
+
+class HashEncoder:
+    # bag of hashed tokens (sklearn's murmurhash), l2-normalized: no download, stable across runs
+    # and processes, and fast enough for a million job texts; drop-in for emb._MODEL
+    dim = 384
+
+    def __init__(self, chunk: int = 20000):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        self._vec = HashingVectorizer(
+            n_features=self.dim, alternate_sign=False, norm="l2", token_pattern=r"\S+"
+        )
+        self.chunk = chunk
+
+    def encode(self, texts, normalize_embeddings=True, **kw):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for start in range(0, len(texts), self.chunk):
+            block = texts[start:start + self.chunk]
+            out[start:start + len(block)] = self._vec.transform(block).toarray()
+        return out
+
+
+def _split(value) -> List[str]:
+    return [s.strip() for s in str(value if isinstance(value, str) else "").split(";") if s.strip()]
+
+
+def _template(src: str) -> Dict:
+    base = pd.read_csv(src).fillna("")
+    base.columns = [str(c).strip().lower().replace(" ", "_") for c in base.columns]
+    blank = pd.Series([""] * len(base))
+    skills = [_split(v) for v in base.get("cleanskills", base.get("clean_skills", blank))]
+    counts = pd.Series([s for row in skills for s in row]).value_counts()
+    return {
+        "titles": base["title"].astype(str).tolist(),
+        "levels": base.get("experiencelevel", pd.Series([""] * len(base))).astype(str).tolist(),
+        "years": base.get("yearsofexperience", pd.Series([""] * len(base))).astype(str).tolist(),
+        "resp": [_split(v) for v in base.get("responsibilities", pd.Series([""] * len(base)))],
+        "skills": skills,
+        "vocab": counts.index.to_numpy(dtype=object),
+        "freq": (counts / counts.sum()).to_numpy(),
+    }
+
+
+def _skills(t: Dict, rng: np.random.Generator, picks: np.ndarray) -> List[str]:
+    extra = rng.choice(t["vocab"], size=(len(picks), _EXTRA), p=t["freq"])
+    keep = rng.random((len(picks), max(len(s) for s in t["skills"]) or 1)) < _KEEP
+    out = []
+    for i, p in enumerate(picks):
+        own = [s for s, k in zip(t["skills"][p], keep[i]) if k]
+        out.append("; ".join(dict.fromkeys(own + list(extra[i]))))
+    return out
+
+
+def jobs_frame(rows: int, seed: int = 0, src: str = _SRC) -> pd.DataFrame:
+    t = _template(src)
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, len(t["titles"]), rows)
+    resp = []
+    for p in picks:
+        r = t["resp"][p]
+        resp.append("; ".join(rng.permutation(r)[: max(1, len(r) - 1)]) if r else "")
+    # job_id / clean_skills as the loader reads them ("JobID" and "CleanSkills" would normalize
+    # to jobid / cleanskills, which it ignores)
+    return pd.DataFrame({
+        "job_id": [f"SYN-{i:07d}" for i in range(rows)],
+        "Title": [t["titles"][p] for p in picks],
+        "ExperienceLevel": [t["levels"][p] for p in picks],
+        "YearsOfExperience": [t["years"][p] for p in picks],
+        "Responsibilities": resp,
+        "clean_skills": _skills(t, rng, picks),
+    })
+
+
+def resumes_frame(rows: int, seed: int = 0, src: str = _SRC) -> pd.DataFrame:
+    # one summary per resume written around a real job's title and level, skills drawn like jobs'
+    t = _template(src)
+    rng = np.random.default_rng(seed + 1)
+    picks = rng.integers(0, len(t["titles"]), rows)
+    skills = _skills(t, rng, picks)
+    summaries = [
+        f"{t['levels'][p]} {t['titles'][p]} with hands-on experience in {s.replace('; ', ', ')}. "
+        + (t["resp"][p][0] if t["resp"][p] else "")
+        for p, s in zip(picks, skills)
+    ]
+    return pd.DataFrame({
+        "resume_id": [f"R-{i:07d}" for i in range(rows)],
+        "summary": summaries,
+        "clean_skills": skills,
+    })
+
+
+def generate(out_dir: str, jobs: int, resumes: int, seed: int = 0, src: str = _SRC) -> Dict:
+    # writes both CSVs into out_dir (a DATA_DIR); reuses them when the manifest matches
+    manifest = {
+        "jobs": jobs, "resumes": resumes, "seed": seed, "src_bytes": os.path.getsize(src),
+        "format": _FORMAT,
+    }
+    path = os.path.join(out_dir, "manifest.json")
+    if os.path.exists(path):
+        with open(path) as f:
+            if json.load(f) == manifest:
+                return manifest
+    os.makedirs(out_dir, exist_ok=True)
+    jobs_frame(jobs, seed, src).to_csv(os.path.join(out_dir, "clean_jobs.csv"), index=False)
+    people = resumes_frame(resumes, seed, src)
+    people.to_csv(os.path.join(out_dir, "clean_resume_data.csv"), index=False)
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+    return manifest
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--jobs", type=int, default=10000)
+    ap.add_argument("--resumes", type=int, default=1000)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--src", default=_SRC)
+    ap.add_argument("--out", required=True)
+    args = ap.parse_args()
+    print(json.dumps(generate(args.out, args.jobs, args.resumes, args.seed, args.src)))
+
+
+if __name__ == "__main__":
+    main()
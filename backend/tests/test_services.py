@@ -1,13 +1,78 @@
 import os
+import zlib
+import numpy as np
 import pandas as pd
+import pytest
 from app.services import loader, skills, recommender
 
 
+def _fake_vectors(texts, pin=False):
+    # unit vectors seeded by each text, so a text embeds the same alone or in a batch
+    vecs = np.stack([np.random.default_rng(zlib.crc32(t.encode())).normal(size=8) for t in texts])
+    return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture
+def fake_embeddings(monkeypatch):
+    from app.services import embeddings as emb
+    monkeypatch.setattr(emb, "get_embeddings", _fake_vectors)
+    monkeypatch.setattr(emb, "encode_one", lambda text: _fake_vectors([text])[0])
+    return _fake_vectors
+
+
+_WORDS = ["python", "sql", "react", "cloud", "java", "ml", "excel", "docker", "spark", "linux"]
+
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch, fake_embeddings):
+    from app import store
+    # 40 jobs and 6 resumes on disk, loaded and indexed as the API would; module state restored
+    # after
+    data = tmp_path / "data"
+    data.mkdir()
+    jobs = pd.DataFrame({
+        "job_id": [f"j{i}" for i in range(40)],
+        "title": [
+            f"{['Junior', 'Senior', ''][i % 3]} {_WORDS[i % 10].title()} Engineer"
+            for i in range(40)
+        ],
+        "description": [
+            " ".join(_WORDS[(i * 3 + j) % 10] for j in range(i % 4 + 2)) for i in range(40)
+        ],
+        "clean_skills": [";".join(_WORDS[(i + j) % 10] for j in range(3)) for i in range(40)],
+    })
+    jobs.to_csv(data / "clean_jobs.csv", index=False)
+    pd.DataFrame({
+        "resume_id": [f"r{i}" for i in range(6)],
+        "summary": [
+            f"engineer with {_WORDS[i]} and {_WORDS[(i + 4) % 10]} projects" for i in range(6)
+        ],
+        "clean_skills": [f"{_WORDS[i]};{_WORDS[(i + 4) % 10]}" for i in range(6)],
+    }).to_csv(data / "clean_resume_data.csv", index=False)
+    for name, value in (
+        ("data_dir", str(data)), ("csv_cache_dir", ""), ("snapshot_dir", ""),
+        ("precompute_db", str(tmp_path / "precomputed.sqlite")), ("retrieval_mode", "exact"),
+    ):
+        # test_loader_jobs reloads app.settings, so loader may hold a different instance
+        for s in {id(s): s for s in (loader.settings, recommender.settings)}.values():
+            monkeypatch.setattr(s, name, value)
+    monkeypatch.setattr(recommender, "_snap", None)
+    monkeypatch.setattr(recommender, "_generation", recommender._generation)
+    monkeypatch.setattr(recommender, "_status", dict(recommender._status))
+    monkeypatch.setattr(recommender, "_results", recommender.ResultCache(1 << 24, 600))
+    monkeypatch.setattr(store, "_store", store.Store(str(tmp_path / "profiles.sqlite")))
+    loader.reload_all()
+    recommender.rebuild_caches()
+    yield recommender.current_index()
+    loader.publish(None, None, {})
+
+
 def test_loader_jobs(tmp_path, monkeypatch):
     p = tmp_path / "data"
     p.mkdir()
     (p / "clean_jobs.csv").write_text("job_id,title,description,clean_skills\n1,SE,Build stuff,python;sql\n")
     monkeypatch.setenv("DATA_DIR", str(p))
+    monkeypatch.setenv("CSV_CACHE_DIR", str(tmp_path / "cache"))
     from importlib import reload
     from app import settings as settings_mod
     reload(settings_mod)
@@ -27,6 +92,10 @@ def test_recommender_scoring(monkeypatch, tmp_path):
     p.mkdir()
     (p / "clean_jobs.csv").write_text("job_id,title,description,clean_skills\n1,Data Scientist,ML work,python;ml\n2,Software Engineer,Web work,javascript;react\n")
     monkeypatch.setenv("DATA_DIR", str(p))
+    monkeypatch.setenv("CSV_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setenv("CACHE_DB", str(tmp_path / "embeddings.sqlite"))
+    from app.services import embeddings as emb
+    monkeypatch.setattr(emb.settings, "cache_db", str(tmp_path / "embeddings.sqlite"))
     from importlib import reload
     from app import settings as settings_mod
     reload(settings_mod)
@@ -39,3 +108,755 @@ def test_recommender_scoring(monkeypatch, tmp_path):
     assert "embed" in comps and "skill" in comps
 
 
+def test_ivf_index_matches_exact_when_probing_all_lists():
+    from app.services.ann import IVFIndex
+    rng = np.random.default_rng(0)
+    vecs = rng.normal(size=(500, 16)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    index = IVFIndex.build(vecs, n_lists=10)
+    q = vecs[7]
+    got = index.search(q, 20, n_probe=10)
+    assert list(got) == list(np.argsort(-(vecs @ q), kind="stable")[:20])
+
+
+def test_skill_index_jaccard_matches_set_jaccard():
+    from app.services.skill_index import SkillIndex
+    raw = ["python; sql", "js, reactjs / node.js", "", "Python;Spark;pyspark"]
+    index = SkillIndex.build(raw)
+    for profile in (["python", "sql", "go"], [], ["javascript"]):
+        ps = set(profile)
+        expected = []
+        for r in raw:
+            js = set(skills.parse_skills(r))
+            union = len(ps | js) if (ps or js) else 1
+            expected.append(len(ps & js) / union)
+        assert list(index.jaccard(profile)) == expected
+    many = index.jaccard_many([["python", "sql", "go"], []])
+    assert many.shape == (2, len(raw))
+    assert list(many[0]) == list(index.jaccard(["python", "sql", "go"]))
+    assert index.job_skills(3) == ["python", "spark"]
+
+
+def test_batched_fuzz_matches_per_job_ratio():
+    from rapidfuzz import fuzz
+    texts = [
+        "Data Scientist \n ML work \n python;ml",
+        "Software Engineer \n Web work \n javascript;react",
+        "",
+    ]
+    profile = "I know python and ml projects"
+    got = recommender._fuzz_scores(profile, texts)  # type: ignore
+    assert list(got) == [fuzz.token_set_ratio(profile, t) / 100.0 for t in texts]
+
+
+def test_top_k_matches_stable_argsort():
+    final = np.array([0.5, 0.9, 0.5, 0.1, 0.9, 0.5, 0.3])
+    for k in range(0, 9):
+        assert list(recommender._top_k(final, k)) == list(np.argsort(-final, kind="stable")[:k])  # type: ignore
+
+
+def test_exp_vector_cache_is_keyed_by_bucket_weights_not_persona_text():
+    from app.services import job_index
+
+    titles = np.array(["Senior Engineer", "Junior Analyst", "Engineer"], dtype=object)
+    none = np.zeros(3, dtype=object)
+    buckets = job_index.exp_buckets(titles)
+    snap = job_index.JobIndex(None, "v", ["a", "b", "c"], none, titles, none, buckets)
+    for i in range(50):
+        vec = recommender._exp_vector(snap, f"fresh grad #{i}")  # type: ignore
+        assert list(vec) == [0.2, 1.0, 0.7]
+        recommender._exp_vector(snap, f"career switcher {i}")  # type: ignore
+    assert len(snap.exp_cache) == 2
+
+
+def test_result_cache_evicts_lru_within_budget():
+    from app.services.result_cache import ResultCache
+    cache = ResultCache(max_bytes=100, ttl_seconds=0)
+    cache.put("a", 1, 40)
+    cache.put("b", 2, 40)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 40)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1 and stats["bytes"] == 80 and stats["hits"] == 3
+
+
+def test_snapshot_roundtrip_matches_built_index(tmp_path, fake_embeddings):
+    from app.services import job_index, snapshot
+
+    df = pd.DataFrame({
+        "job_id": ["a", "b", "c"],
+        "title": ["Data Scientist", "Senior Engineer", "Junior Analyst"],
+        "description": ["ml models", "web services", "sql reports"],
+        "clean_skills": ["python;ml", "javascript;react", "sql;excel"],
+    })
+    built = job_index.build(df, "v1")
+    path = snapshot.save(built, {"jobs": {"found": True, "version": "v1"}}, str(tmp_path))
+    assert snapshot.current_path(str(tmp_path)) == path
+    loaded = snapshot.load(path)
+    assert loaded.version == "v1" and list(loaded.ids) == ["a", "b", "c"]
+    assert loaded.texts == built.texts
+    assert np.array_equal(loaded.vecs, built.vecs)
+    query = ["python sql reports"]
+    assert (abs(loaded.tfidf.transform(query) - built.tfidf.transform(query))).max() == 0
+    assert (abs(loaded.matrix - built.matrix)).max() == 0
+    assert loaded.skills.job_skills(1) == built.skills.job_skills(1)
+    assert list(loaded.skills.jaccard(["sql"])) == list(built.skills.jaccard(["sql"]))
+
+
+def test_quantized_vecs_approximate_float32_scores():
+    from app.services.quant import QuantizedVecs
+    rng = np.random.default_rng(1)
+    vecs = rng.normal(size=(300, 32)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    q = vecs[3]
+    exact = vecs @ q
+    for dtype, tol in (("float16", 1e-3), ("int8", 2e-2)):
+        qv = QuantizedVecs.build(vecs, dtype)
+        assert np.abs(qv.scores(q) - exact).max() < tol
+        rows = np.array([5, 3, 100])
+        assert np.allclose(qv.scores(q, rows), qv.scores(q)[rows])
+    assert QuantizedVecs.build(vecs, "int8").nbytes == 300 * 32 + 300 * 4
+
+
+def test_embedding_store_namespaces_by_model_and_evicts_only_profiles(tmp_path, monkeypatch):
+    from app.services import embeddings as emb
+
+    class FakeModel:
+        calls = 0
+
+        def encode(self, texts, **kwargs):
+            FakeModel.calls += 1
+            return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+    monkeypatch.setattr(emb.settings, "cache_db", str(tmp_path / "emb.sqlite"))
+    monkeypatch.setattr(emb, "_get_model", lambda: FakeModel())
+    emb.get_embeddings(["job a", "job b"], pin=True)
+    emb.get_embeddings(["profile x", "job a"])
+    assert FakeModel.calls == 2
+    monkeypatch.setattr(emb.settings, "model_name", "another-model")
+    emb.get_embeddings(["job a"], pin=True)
+    assert FakeModel.calls == 3
+    monkeypatch.undo()
+    monkeypatch.setattr(emb.settings, "cache_db", str(tmp_path / "emb.sqlite"))
+    assert emb.evict(max_rows=0, ttl_days=0) == 1
+    stats = emb.store_stats()
+    assert stats["job_rows"] == 2 and stats["profile_rows"] == 0
+    assert stats["other_namespace_rows"] == 1
+
+
+def test_embedding_encode_runs_outside_the_store_write_lock(tmp_path, monkeypatch):
+    import sqlite3
+    from app.services import embeddings as emb
+    db = str(tmp_path / "emb.sqlite")
+
+    class WritingModel:
+        def encode(self, texts, **kwargs):
+            # another writer (profile insert, second worker) must not wait for the encode
+            with sqlite3.connect(db, timeout=0) as other:
+                other.execute("UPDATE vectors SET last_used = last_used")
+            return np.ones((len(texts), 4), dtype=np.float32) / 2
+
+    monkeypatch.setattr(emb.settings, "cache_db", db)
+    monkeypatch.setattr(emb, "_get_model", lambda: WritingModel())
+    monkeypatch.setattr(emb, "_TOUCH_EVERY", -1.0)  # every hit is touched
+    emb.get_embeddings(["job a"], pin=True)
+    emb.get_embeddings(["profile x", "job a"])
+    emb.get_embeddings(["profile x", "job b"], pin=True)
+    stats = emb.store_stats()
+    assert stats["job_rows"] == 3 and stats["profile_rows"] == 0
+
+
+def test_index_build_reads_embeddings_in_one_bulk_call_and_encodes_only_misses(
+    tmp_path, monkeypatch
+):
+    from app.services import embeddings as emb, job_index
+    encoded, calls = [], []
+
+    class StubModel:
+        def encode(self, texts, **kwargs):
+            encoded.append(list(texts))
+            return _fake_vectors(texts)
+
+    get_embeddings = emb.get_embeddings
+
+    def spy(texts, pin=False):
+        calls.append(list(texts))
+        return get_embeddings(texts, pin=pin)
+
+    monkeypatch.setattr(emb.settings, "cache_db", str(tmp_path / "emb.sqlite"))
+    monkeypatch.setattr(job_index.settings, "job_vec_dtype", "float32")
+    monkeypatch.setattr(emb, "_get_model", lambda: StubModel())
+    df = pd.DataFrame({
+        "job_id": [f"j{i}" for i in range(6)],
+        "title": [f"Engineer {i}" for i in range(6)],
+        "description": [f"python task {i}" for i in range(6)],
+        "clean_skills": ["python;sql"] * 6,
+    })
+    texts = loader.build_job_texts(df)
+    emb.get_embeddings([texts[4], texts[1]], pin=True)
+    encoded.clear()
+    monkeypatch.setattr(emb, "get_embeddings", spy)
+    snap = job_index.build(df, "v-bulk")
+    assert calls == [texts]
+    assert encoded == [[texts[0], texts[2], texts[3], texts[5]]]
+    assert np.allclose(snap.vecs, _fake_vectors(texts))
+
+
+def test_store_get_profiles_batches_and_reuses_thread_connection(tmp_path):
+    from app.store import Store
+    store = Store(str(tmp_path / "profiles.sqlite"))
+    a = store.save_profile("data analyst", ["sql"], "Fresh Grad")
+    b = store.save_profile("web developer", ["react", "javascript"], "Career Switcher")
+    got = store.get_profiles([a, "missing", b, a])
+    assert set(got) == {a, b} and got[b]["skills"] == ["react", "javascript"]
+    assert store.get_profile(a)["summary"] == "data analyst"
+    assert store.get_profile("missing") is None
+    assert store._conn() is store._conn()
+
+
+def test_course_catalog_normalized_lookup_fuzzy_fallback_and_reload(tmp_path, monkeypatch):
+    from app.services import courses
+    path = tmp_path / "skills_to_courses.csv"
+    path.write_text(
+        "Skill,Course_Name,Provider,Hours\nReactJS,React Basics,Acme,12\nPostgreSQL,PG 101,Acme,8\n"
+    )
+    monkeypatch.setattr(courses.settings, "data_dir", str(tmp_path))
+    got = courses.courses_for(["react", "postgres", "cobol"], fuzzy_cutoff=85)
+    assert got["react"] == [{"course_name": "React Basics", "provider": "Acme", "hours": 12}]
+    assert got["postgres"][0]["matched_skill"] == "postgresql" and "cobol" not in got
+    assert "postgres" not in courses.courses_for(["postgres"], fuzzy_cutoff=0)
+    # off unless COURSE_FUZZY_CUTOFF opts in
+    monkeypatch.setattr(courses.settings, "course_fuzzy_cutoff", 0.0)
+    assert courses.courses_for(["postgres", "reactjs"]) == {"reactjs": got["react"]}
+    monkeypatch.setattr(courses.settings, "course_fuzzy_cutoff", 85.0)
+    assert courses.courses_for(["postgres"])["postgres"][0]["matched_skill"] == "postgresql"
+    first = courses.catalog()
+    assert courses.catalog() is first
+    path.write_text("skill,course_name,provider,hours\ncobol,Legacy Systems,Acme,20\n")
+    os.utime(path, ns=(first.mtime_ns + 10**9, first.mtime_ns + 10**9))
+    assert courses.courses_for(["cobol"])["cobol"][0]["course_name"] == "Legacy Systems"
+
+
+def test_loader_get_resume_uses_id_index(tmp_path, monkeypatch):
+    p = tmp_path / "data"
+    p.mkdir()
+    (p / "clean_resume_data.csv").write_text(
+        "resume_id,summary,clean_skills\n7,ml engineer,python\n3,web dev,react\n"
+    )
+    monkeypatch.setattr(loader.settings, "data_dir", str(p))
+    monkeypatch.setattr(loader.settings, "csv_cache_dir", str(tmp_path / "cache"))
+    loader.reload_all()
+    assert loader.get_resume("3")["summary"] == "web dev"
+    assert loader.get_resume(7)["clean_skills"] == "python"
+    assert loader.get_resume("99") is None
+    text, parsed = recommender._get_resume_text_and_skills_by_resume_id("3")  # type: ignore
+    assert text == "web dev" and parsed == ["react"]
+
+
+def test_loader_columnar_cache_selective_and_categorical(tmp_path, monkeypatch):
+    p = tmp_path / "data"
+    p.mkdir()
+    rows = "".join(
+        f"{i},Engineer {i % 2},desc {i},python;sql,Senior,noise {i}\n" for i in range(10)
+    )
+    header = "job_id,title,description,clean_skills,experience_level,responsibilities\n"
+    (p / "clean_jobs.csv").write_text(header + rows)
+    monkeypatch.setattr(loader.settings, "data_dir", str(p))
+    monkeypatch.setattr(loader.settings, "csv_cache_dir", str(tmp_path / "cache"))
+    cold, meta = loader._load_jobs()  # type: ignore
+    warm, warm_meta = loader._load_jobs()  # type: ignore
+    assert not meta["cached"] and warm_meta["cached"] and warm_meta["version"] == meta["version"]
+    assert "responsibilities" not in warm.columns and "responsibilities" in warm_meta["columns"]
+    assert str(warm["experience_level"].dtype) == "category"
+    pd.testing.assert_frame_equal(cold.reset_index(drop=True), warm.reset_index(drop=True))
+    # a truncated column falls back to the CSV parse and rewrites the cache
+    col_dir = tmp_path / "cache" / "jobs" / meta["version"]
+    (col_dir / "0.pkl").write_bytes((col_dir / "0.pkl").read_bytes()[:20])
+    again, again_meta = loader._load_jobs()  # type: ignore
+    assert not again_meta["cached"]
+    pd.testing.assert_frame_equal(cold.reset_index(drop=True), again.reset_index(drop=True))
+    assert loader._load_jobs()[1]["cached"]  # type: ignore
+    assert set(os.listdir(tmp_path / "cache" / "jobs")) == {"manifest.json", meta["version"]}
+
+
+def test_skill_matcher_extracts_known_multiword_skills(monkeypatch):
+    matcher = skills.SkillMatcher(["entity framework", "sql server", "sql", "python", "c#"])
+    text = (
+        "Built APIs in C# with Entity Framework on SQL Server; "
+        "some Python, JS and structured query language."
+    )
+    assert matcher.extract(text) == [
+        "c#", "entity framework", "sql server", "python", "javascript", "sql",
+    ]
+    monkeypatch.setattr(skills.settings, "skill_extractor", "vocab")
+    assert skills.extract_skills("python and more python", matcher) == ["python"]
+    monkeypatch.setattr(skills.settings, "skill_extractor", "regex")
+    assert "and" in skills.extract_skills("python and more python", matcher)
+
+
+def test_warmup_runs_stages_and_gates_readiness(monkeypatch):
+    from app.services import warmup
+    monkeypatch.setattr(warmup, "_thread", None)
+    monkeypatch.setattr(warmup, "_status", {**warmup._status, "stages": {}})
+    monkeypatch.setattr(warmup.settings, "warmup", True)
+    calls = []
+    stages = [("a", lambda: calls.append("a")), ("b", lambda: calls.append("b"))]
+    monkeypatch.setattr(warmup, "_stages", lambda: stages)
+    assert not warmup.ready()
+    status = warmup.start(wait=True)
+    assert calls == ["a", "b"] and status["ready"] and set(status["stages"]) == {"a", "b"}
+    monkeypatch.setattr(warmup, "_thread", None)
+    monkeypatch.setattr(warmup, "_stages", lambda: [("boom", lambda: 1 / 0)])
+    status = warmup.start(wait=True)
+    assert status["state"] == "failed" and status["error"].startswith("boom") and not warmup.ready()
+
+
+def test_lexical_index_top_k_matches_exhaustive_cosine_and_bm25():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    from app.services.lexical_index import LexicalIndex
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(300)]
+    freq = np.arange(300, 0, -1) / 45150
+    docs = [" ".join(rng.choice(words, rng.integers(5, 60), p=freq)) for _ in range(400)]
+    tfidf = TfidfVectorizer(ngram_range=(1, 2))
+    matrix = tfidf.fit_transform(docs)
+    cosine = LexicalIndex.build(matrix, tfidf.idf_, "cosine")
+    bm25 = LexicalIndex.build(matrix, tfidf.idf_, "bm25")
+    for q in docs[:20] + ["w0 w1 w250 w299", "w42"]:
+        v = tfidf.transform([q])
+        exact = cosine_similarity(v, matrix).ravel()
+        for k in (1, 10, 50):
+            top = recommender._top_k(exact, k)  # type: ignore
+            top = top[exact[top] > 0]
+            rows, scores = cosine.top_k(v, k)
+            assert np.array_equal(rows, top) and np.allclose(scores, exact[top])
+            full = bm25.postings @ (v.toarray().ravel() > 0)
+            rows, scores = bm25.top_k(v, k)
+            assert np.array_equal(rows, recommender._top_k(full, k)[:len(rows)])  # type: ignore
+            assert np.allclose(scores, full[rows])
+
+
+def test_candidate_indexes_are_built_on_first_ann_request_in_exact_mode(
+    monkeypatch, fake_embeddings
+):
+    from app.services import job_index
+
+    df = pd.DataFrame({
+        "job_id": [f"j{i}" for i in range(40)],
+        "title": [f"{_WORDS[i % 10].title()} Engineer" for i in range(40)],
+        "description": [" ".join(_WORDS[(i * 3 + j) % 10] for j in range(4)) for i in range(40)],
+        "clean_skills": [";".join(_WORDS[(i + j) % 10] for j in range(3)) for i in range(40)],
+    })
+    monkeypatch.setattr(job_index.settings, "ann_candidates", 10)
+    monkeypatch.setattr(job_index.settings, "lexical_candidates", 10)
+    monkeypatch.setattr(job_index.settings, "retrieval_mode", "ann")
+    eager = job_index.build(df, "v-eager")
+    assert eager.lexical is not None and eager.ann is not None
+    monkeypatch.setattr(job_index.settings, "retrieval_mode", "exact")
+    lazy = job_index.build(df, "v-lazy")
+    assert lazy.lexical is None and lazy.ann is None
+    recommender._rank(lazy, "python sql cloud", ["python"], "Fresh Grad", "hybrid")  # type: ignore
+    assert lazy.lazy == {}
+    for mode in ("baseline", "hybrid"):
+        args = ("python sql cloud", ["python"], "Fresh Grad", mode, "ann")
+        want, want_rows = recommender._rank(eager, *args)  # type: ignore
+        got, rows = recommender._rank(lazy, *args)  # type: ignore
+        assert np.array_equal(rows, want_rows)
+        assert np.allclose(got["final"], want["final"])
+    assert set(lazy.lazy) == {"lexical", "ann"}
+
+
+def test_sharded_scoring_matches_in_process(monkeypatch, fake_embeddings):
+    from app.services import job_index, shards
+
+    words = ["python", "sql", "react", "senior", "junior", "data", "cloud", "java", "ml", "excel"]
+    df = pd.DataFrame({
+        "job_id": [f"j{i}" for i in range(60)],
+        "title": [
+            f"{words[i % 10].title()} {['Engineer', 'Senior Analyst', 'Junior Dev'][i % 3]}"
+            for i in range(60)
+        ],
+        "description": [
+            " ".join(words[(i * 7 + j) % 10] for j in range(i % 5 + 2)) for i in range(60)
+        ],
+        "clean_skills": [";".join(words[(i + j) % 10] for j in range(3)) for i in range(60)],
+    })
+    snap = job_index.build(df, "v-shards")
+    monkeypatch.setattr(recommender, "_snap", snap)
+    monkeypatch.setattr(shards.settings, "score_shards", 3)
+    monkeypatch.setattr(shards.settings, "shard_min_jobs", 0)
+    monkeypatch.setattr(shards.settings, "shard_top", 5)
+    try:
+        for mode in ("hybrid", "baseline", "embed"):
+            depth = shards.depth(snap, mode, "exact", 7)
+            assert depth == 10
+            for text in ("python sql data", "junior react developer", "senior cloud java ml"):
+                wanted = ["python", "sql"]
+                ref, ref_rows = recommender._rank(snap, text, wanted, "Fresh Grad", mode)  # type: ignore
+                got, rows = recommender._rank_request(  # type: ignore
+                    snap, text, wanted, "Fresh Grad", mode, "exact", depth
+                )
+                assert len(rows) == 30
+                expected = recommender._format_results(ref, snap, 7, ref_rows)  # type: ignore
+                assert recommender._format_results(got, snap, 7, rows) == expected  # type: ignore
+        assert shards.stats()["fallbacks"] == 0
+    finally:
+        shards.shutdown()
+
+
+def test_sharded_scoring_falls_back_when_a_worker_times_out(monkeypatch, fake_embeddings):
+    from app.services import job_index, shards
+
+    df = pd.DataFrame({
+        "job_id": [f"j{i}" for i in range(20)],
+        "title": [f"Engineer {i}" for i in range(20)],
+        "description": [f"python sql task {i}" for i in range(20)],
+        "clean_skills": ["python;sql"] * 20,
+    })
+    snap = job_index.build(df, "v-shard-timeout")
+    monkeypatch.setattr(recommender, "_snap", snap)
+    monkeypatch.setattr(shards.settings, "score_shards", 2)
+    monkeypatch.setattr(shards.settings, "shard_min_jobs", 0)
+    monkeypatch.setattr(shards.settings, "shard_timeout", 1e-6)
+    before = shards.stats()["fallbacks"]
+    args = ("python", ["python"], "Fresh Grad")
+    try:
+        depth = shards.depth(snap, "hybrid", "exact", 5)
+        keep = recommender._ALL_COMPONENTS  # type: ignore
+        assert shards.rank(snap, *args, keep, None, depth) is None
+        assert shards.stats()["fallbacks"] == before + 1
+        ref, ref_rows = recommender._rank(snap, *args, "hybrid")  # type: ignore
+        got, rows = recommender._rank_request(snap, *args, "hybrid", "exact", depth)  # type: ignore
+        expected = recommender._format_results(ref, snap, 5, ref_rows)  # type: ignore
+        assert recommender._format_results(got, snap, 5, rows) == expected  # type: ignore
+    finally:
+        shards.shutdown()
+
+
+def test_title_filter_matches_whole_family_on_catalog_titles():
+    from app.services.filter_index import FilterIndex, JobFilter
+    from app.services.titles_ontology import title_family
+    path = os.path.join(os.path.dirname(__file__), "..", "..", "data", "clean_jobs.csv")
+    titles = pd.read_csv(path)["Title"].astype(str)
+    idx = FilterIndex.build(titles, [""] * len(titles), [""] * len(titles))
+
+    def matched(title):
+        return set(titles.iloc[idx.rows(JobFilter.parse(title=title))])
+
+    assert matched("data engineer") == {"Data Engineer"}
+    assert matched("de") == matched("data engineer")
+    assert matched("ui designer") == {"UI Designer"}
+    ml = matched("ml engineer")
+    assert ml and all(
+        "machine learning engineer" in t.lower() or "ml engineer" in t.lower() for t in ml
+    )
+    assert not any("System Engineer" in t for t in ml)
+    assert all("Data Scientist" in t for t in matched("data scientist"))
+    assert {title_family(t) for t in ("Vibe Coder", "Graphic Designer", "Product Designer")} == {
+        "vibe coder", "graphic designer", "product designer",
+    }
+    assert title_family("Web Developer") == "web developer"
+    assert title_family("Software Developer - Entry Level") == title_family("swe")
+
+
+def test_filter_index_rows_and_filtered_ranking(monkeypatch, fake_embeddings):
+    from app.services import job_index
+    from app.services.filter_index import FilterIndex, JobFilter, parse_years
+
+    assert parse_years("0–1 year") == (0, 1) and parse_years("5+ years") == (5, np.inf)
+    assert np.isnan(parse_years("")[0])
+    idx = FilterIndex.build(
+        ["Software Eng", "Data Scientist", "ML Scientist", "Chef"],
+        ["Entry-Level", "Senior", "senior level", ""],
+        ["0-1", "5+", "3-5", ""],
+    )
+    assert list(idx.rows(JobFilter.parse("senior"))) == [1, 2]
+    assert list(idx.rows(JobFilter.parse(title="ds"))) == [1, 2]
+    assert list(idx.rows(JobFilter.parse(years_min=4, years_max=6))) == [1, 2]
+    assert list(idx.rows(JobFilter.parse("senior, entry level", years_max=4))) == [0, 2]
+    assert JobFilter.parse() is None and idx.rows(None) is None
+
+    df = pd.DataFrame({
+        "job_id": [f"j{i}" for i in range(30)],
+        "title": [["Data Scientist", "Software Developer", "Chef"][i % 3] for i in range(30)],
+        "description": [f"python sql role {i}" for i in range(30)],
+        "clean_skills": ["python;sql" if i % 2 else "excel" for i in range(30)],
+        "experiencelevel": [["Fresher", "Senior"][i % 2] for i in range(30)],
+        "yearsofexperience": [["0-1", "5+"][i % 2] for i in range(30)],
+    })
+    snap = job_index.build(df, "v-filter")
+    filt = JobFilter.parse("senior", title="data scientist")
+    full, _ = recommender._rank(snap, "python sql", ["python"], "Fresh Grad", "hybrid")  # type: ignore
+    got, rows = recommender._rank(snap, "python sql", ["python"], "Fresh Grad", "hybrid", filt=filt)  # type: ignore
+    assert list(rows) == [3, 9, 15, 21, 27]
+    kept = set(rows.tolist())
+    expected = [snap.ids[i] for i in recommender._top_k(full["final"], 30) if i in kept][:3]  # type: ignore
+    assert [r["job_id"] for r in recommender._format_results(got, snap, 3, rows)] == expected  # type: ignore
+
+
+def test_metrics_stage_histograms_request_timings_and_disabled_path(monkeypatch):
+    from app.services import metrics
+    monkeypatch.setattr(metrics, "_hist", {})
+    monkeypatch.setattr(metrics.settings, "metrics", True)
+    metrics.observe("kw", 0.003)
+    metrics.observe("kw", 0.2)
+    timings, token = metrics.start_request()
+    try:
+        with metrics.stage("tfidf"):
+            pass
+    finally:
+        metrics.end_request(token)
+    assert set(timings) == {"tfidf"} and metrics.server_timing(timings).startswith("tfidf;dur=")
+    text = metrics.render([("catalog_jobs", "gauge", "Jobs.", 7)])
+    assert 'jobrec_stage_seconds_bucket{stage="kw",le="0.0025"} 0' in text
+    assert 'jobrec_stage_seconds_bucket{stage="kw",le="0.005"} 1' in text
+    assert 'jobrec_stage_seconds_bucket{stage="kw",le="+Inf"} 2' in text
+    assert 'jobrec_stage_seconds_count{stage="tfidf"} 1' in text and "jobrec_catalog_jobs 7" in text
+    monkeypatch.setattr(metrics.settings, "metrics", False)
+    assert metrics.stage("kw") is metrics._OFF
+    metrics.observe("kw", 1.0)
+    assert 'jobrec_stage_seconds_count{stage="kw"} 2' in metrics.render()
+
+
+def test_candidates_endpoint_with_repeated_summaries(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    p = tmp_path / "data"
+    p.mkdir()
+    rows = "".join(f"{i},{'ml engineer' if i % 2 else 'web dev'},python\n" for i in range(4))
+    (p / "clean_resume_data.csv").write_text("resume_id,summary,clean_skills\n" + rows)
+    monkeypatch.setattr(loader.settings, "data_dir", str(p))
+    monkeypatch.setattr(loader.settings, "csv_cache_dir", str(tmp_path / "cache"))
+    for _ in range(2):  # CSV parse, then the columnar cache
+        loader.reload_all()
+        res = TestClient(app).get("/candidates")
+        assert res.status_code == 200
+        assert [c["summary"] for c in res.json()["candidates"]] == ["web dev", "ml engineer"] * 2
+    assert loader.get_resumes_df()["summary"].dtype == object
+
+
+def test_refresh_matches_full_rebuild_for_added_removed_updated_reordered(
+    monkeypatch, fake_embeddings
+):
+    from app.services import job_index
+    monkeypatch.setattr(job_index.settings, "ingest_refit_fraction", 1.0)
+    words = ["python", "sql", "react", "cloud", "java", "ml", "excel", "docker"]
+    df = pd.DataFrame({
+        "job_id": [f"j{i}" for i in range(20)],
+        "title": [f"{words[i % 8].title()} Engineer" for i in range(20)],
+        "description": [" ".join(words[(i * 3 + j) % 8] for j in range(3)) for i in range(20)],
+        "clean_skills": [";".join(words[(i + j) % 8] for j in range(2)) for i in range(20)],
+    })
+    old = job_index.build(df, "v0")
+    added = pd.concat([df, pd.DataFrame({
+        "job_id": ["j20", "j21"], "title": ["Rust Developer", "Data Analyst"],
+        "description": ["rust systems", "sql dashboards"],
+        "clean_skills": ["rust;linux", "sql;tableau"],
+    })], ignore_index=True)
+    updated = df.copy()
+    updated.loc[[3, 11], "description"] = ["kubernetes platform", "python excel reports"]
+    updated.loc[11, "clean_skills"] = "python;excel;powerbi"
+    removed = df.drop(index=[0, 7, 19]).reset_index(drop=True)
+    reordered = df.sample(frac=1, random_state=3).reset_index(drop=True)
+    cases = {
+        "added": (added, {"added": 2, "updated": 0, "removed": 0}),
+        "removed": (removed, {"added": 0, "updated": 0, "removed": 3}),
+        "updated": (updated, {"added": 0, "updated": 2, "removed": 0}),
+        "reordered": (reordered, {"added": 0, "updated": 0, "removed": 0}),
+    }
+    for name, (jobs, counts) in cases.items():
+        new, summary = job_index.refresh(old, jobs, "v1")
+        full = job_index.build(jobs, "v1")
+        assert not summary["refit"] and {k: summary[k] for k in counts} == counts, name
+        assert new.texts == full.texts and list(new.ids) == list(full.ids), name
+        assert abs(new.matrix - old.tfidf.transform(new.texts)).max() < 1e-12, name
+        assert np.array_equal(new.vecs, full.vecs), name
+        assert [sorted(new.skills.job_skills(i)) for i in range(len(new))] == [
+            sorted(full.skills.job_skills(i)) for i in range(len(full))
+        ], name
+        assert all(
+            new.position(jid) == full.position(jid) == i for i, jid in enumerate(jobs["job_id"])
+        ), name
+        assert new.position("j0") == full.position("j0") and new.position("missing") is None
+
+
+def test_batch_matches_single_resume_endpoint(catalog):
+    from fastapi.testclient import TestClient
+    from app.main import app
+    client = TestClient(app)
+    ids = [f"r{i}" for i in range(6)]
+    for mode in ("hybrid", "baseline", "embed"):
+        for _ in range(2):  # result cache miss, then hit; the batch path has no cache
+            body = {"resume_ids": ids, "k": 5, "mode": mode}
+            batch = client.post("/recommend/batch", json=body).json()
+            assert [b["resume_id"] for b in batch["results"]] == ids
+            for rid, b in zip(ids, batch["results"]):
+                params = {"resume_id": rid, "k": 5, "mode": mode}
+                got = client.get("/recommend/by_resume_id", params=params).json()["results"]
+                assert len(got) == 5
+                job_ids = [r["job_id"] for r in got]
+                assert [r["job_id"] for r in b["results"]] == job_ids, (mode, rid)
+                scores = [r["score"] for r in got]
+                assert [r["score"] for r in b["results"]] == pytest.approx(scores, abs=1e-9)
+        assert recommender.cache_stats()["hits"] >= len(ids)
+
+
+def test_with_gaps_matches_gaps_endpoint_per_job(catalog):
+    from fastapi.testclient import TestClient
+    from app import store
+    from app.main import app
+    pid = store.get_store().save_profile(
+        "cloud docker engineer", ["cloud", "docker", "python"], "Fresh Grad"
+    )
+    client = TestClient(app)
+    for who in ({"profile_id": pid}, {"resume_id": "r2"}):
+        got = client.get("/recommend/with_gaps", params={**who, "k": 6}).json()["results"]
+        assert len(got) == 6
+        for r in got:
+            expected = client.get("/gaps", params={**who, "job_id": r["job_id"]}).json()
+            assert r["gaps"] == expected, (who, r["job_id"])
+            assert expected["present"] or expected["missing"]
+
+
+def test_embed_batcher_coalesces_concurrent_encodes_and_propagates_errors(monkeypatch):
+    import threading
+    from app.services import embeddings as emb
+    calls = []
+
+    def record(texts, pin=False):
+        calls.append(list(texts))
+        return _fake_vectors(texts)
+
+    monkeypatch.setattr(emb, "get_embeddings", record)
+    monkeypatch.setattr(emb, "_batcher", emb._Batcher(max_batch=16, max_wait=0.5))
+    monkeypatch.setattr(emb.settings, "embed_batching", True)
+    texts = [f"profile {i}" for i in range(6)]
+    out = [None] * len(texts)
+    start = threading.Barrier(len(texts))
+
+    def client(i):
+        start.wait()
+        out[i] = emb.encode_one(texts[i])
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(len(texts))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and sorted(calls[0]) == texts
+    assert all(np.array_equal(v, _fake_vectors([t])[0]) for v, t in zip(out, texts))
+    assert emb._batcher.stats()["batches"] == 1
+
+    def fail(texts, pin=False):
+        raise RuntimeError("encoder down")
+
+    monkeypatch.setattr(emb, "get_embeddings", fail)
+    futures = [emb._batcher.submit(t) for t in texts[:3]]
+    for fut in futures:
+        with pytest.raises(RuntimeError, match="encoder down"):
+            fut.result(timeout=5)
+
+
+def test_precomputed_roundtrip_staleness_k_and_retrieval(catalog, monkeypatch):
+    from app.services import precomputed
+    rows = [{"job_id": f"j{i}", "score": 1.0 - i / 10} for i in range(5)]
+    precomputed.put_many("v1", 5, [("hybrid", "r1", rows)])
+    assert precomputed.get("v1", "hybrid", "r1", 3) == rows[:3]
+    assert precomputed.get("v1", "hybrid", "r1", 5) == rows
+    assert precomputed.get("v1", "hybrid", "r1", 6) is None  # stored k too small
+    assert precomputed.get("v2", "hybrid", "r1", 3) is None  # other scoring_version: stale
+    assert precomputed.get("v1", "embed", "r1", 3) is None
+    # a catalog smaller than the stored k still serves everything it has
+    precomputed.put_many("v1", 50, [("embed", "r1", rows)])
+    assert precomputed.get("v1", "embed", "r1", 20) == rows
+    assert precomputed.prune("v1") == 0
+
+    exact = recommender.scoring_version(catalog, "exact")
+    assert exact != recommender.scoring_version(catalog, "ann")
+    marker = [{"job_id": "stored", "score": 9.0}]
+    precomputed.put_many(exact, 10, [("hybrid", "r3", marker)])
+    assert recommender.recommend_for_resume_id("r3", k=1, mode="hybrid") == marker
+    exact_hit = recommender.recommend_for_resume_id("r3", k=1, mode="hybrid", retrieval="exact")
+    assert exact_hit == marker
+    live = recommender.recommend_for_resume_id("r3", k=1, mode="hybrid", retrieval="ann")
+    assert live and live[0]["job_id"] != "stored"
+    # one connection per thread, and the version moves with the persona and skill extractor
+    assert precomputed._connect() is precomputed._connect()  # type: ignore
+    for name, value in (("default_persona", "Career Switcher"), ("skill_extractor", "vocab")):
+        before = recommender.scoring_version(catalog, "exact")
+        monkeypatch.setattr(recommender.settings, name, value)
+        assert recommender.scoring_version(catalog, "exact") != before
+
+
+def test_background_rebuild_states_errors_and_serving_old_snapshot(catalog, monkeypatch):
+    import threading
+    import time
+    from app.services import job_index
+    real_build = job_index.build
+    gate = threading.Event()
+
+    def slow_build(*args, **kwargs):
+        assert gate.wait(10)
+        return real_build(*args, **kwargs)
+
+    def wait_idle():
+        deadline = time.time() + 10
+        while recommender.index_status()["state"] == "building" and time.time() < deadline:
+            time.sleep(0.01)
+        return recommender.index_status()
+
+    old = recommender.current_index()
+    assert recommender.index_status()["state"] == "idle"
+    monkeypatch.setattr(job_index, "build", slow_build)
+    started = recommender.start_rebuild()
+    assert started["started"] and started["state"] == "building" and started["kind"] == "full"
+    assert not recommender.start_rebuild()["started"]  # one build at a time
+    # the old snapshot keeps answering until the new one is published
+    assert recommender.current_index() is old
+    assert recommender.recommend_for_resume_id("r1", k=3)
+    assert recommender.index_status()["active_generation"] == old.generation
+    gate.set()
+    status = wait_idle()
+    assert status["state"] == "idle" and status["error"] is None
+    assert status["active_generation"] == old.generation + 1
+    assert recommender.current_index() is not old
+
+    def broken_build(*args, **kwargs):
+        raise RuntimeError("tfidf exploded")
+
+    published = recommender.current_index()
+    monkeypatch.setattr(job_index, "build", broken_build)
+    assert recommender.start_rebuild(wait=True)["started"]
+    status = recommender.index_status()
+    assert status["state"] == "failed" and "tfidf exploded" in status["error"]
+    assert recommender.current_index() is published
+    assert recommender.recommend_for_resume_id("r1", k=3)
+    monkeypatch.setattr(job_index, "build", real_build)
+    # the lock was released after the failure
+    assert recommender.start_rebuild(wait=True)["started"]
+    assert recommender.index_status()["state"] == "idle"
+
+
+def test_server_timing_header_off_by_default_and_metrics_gated(monkeypatch):
+    import importlib
+    from fastapi.testclient import TestClient
+    from app import main, settings as settings_mod
+    from app.routes import api
+    from app.services import metrics
+    assert not settings_mod.Settings.request_timing
+    client = TestClient(main.app)
+    assert "server-timing" not in client.get("/health").headers
+    assert client.get("/metrics").status_code == 200
+    monkeypatch.setattr(api.settings, "metrics", False)
+    assert client.get("/metrics").status_code == 404
+    # main reads REQUEST_TIMING from app.settings when the app is built
+    monkeypatch.setattr(settings_mod.settings, "request_timing", True)
+    try:
+        timed = importlib.reload(main)
+        header = TestClient(timed.app).get("/health").headers["server-timing"]
+        assert header.startswith("total;dur=") and metrics._request.get() is None
+    finally:
+        monkeypatch.setattr(settings_mod.settings, "request_timing", False)
+        importlib.reload(main)